@@ -1,9 +1,11 @@
 # activities/activity_analyze_daily.py
 
 import logging
+from datetime import datetime, timedelta, timezone
 from typing import Any
 from framework.activity_decorator import activity, ActivityBase, ActivityResult
 from framework.memory import Memory
+from framework.memory_summaries import LLMSummarizer
 from skills.skill_chat import chat_skill
 
 logger = logging.getLogger(__name__)
@@ -37,30 +39,45 @@ class AnalyzeDailyActivity(ActivityBase):
                     success=False, error="Failed to initialize openai_chat skill"
                 )
 
-            # 2) Retrieve the last ~10 memory entries for summarization
+            # 2) Get the memory object holding the last day's records
             memory_obj: Memory = shared_data.get(
                 "system", "memory_ref"
             )  # or pass memory another way
             # If not found, fallback to your framework's global memory reference
             if not memory_obj:
-                from framework.main import DigitalBeing
+                from framework.main import get_being
 
                 # Fallback to the global being's memory if you prefer
                 # In some setups, you can pass it in shared_data, or fetch it from a global reference
-                being = DigitalBeing()
-                being.initialize()
+                being = get_being()
                 memory_obj = being.memory
 
-            recent_activities = memory_obj.get_recent_activities(limit=10, offset=0)
+            # 3) Reflect on the rolling summary of the last day (cached hour
+            # summaries, so the raw logs aren't re-read), alongside the older
+            # memories most related to it (semantic recall)
+            since = datetime.now(timezone.utc) - timedelta(days=1)
+            day_summary = await memory_obj.get_summary(
+                since=since,
+                summarizer=LLMSummarizer(chat_skill.get_chat_completion),
+            )
+            summary_text = day_summary["text"] or "No activities in the last day."
 
-            # 3) Summarize them with the chat skill
-            text_snippets = []
-            for act in recent_activities:
-                snippet = f"- {act['activity_type']}, success={act['success']}, data={act.get('data')}"
-                text_snippets.append(snippet)
+            cutoff = since.strftime("%Y-%m-%d %H:%M:%S UTC")
+            related = [
+                a
+                for a in memory_obj.recall(summary_text, k=15)
+                if a["timestamp"] < cutoff
+            ][:5]
+            related_snippets = [
+                f"- {a['timestamp']} {a['activity_type']}, success={a['success']}, data={str(a.get('data'))[:200]}"
+                for a in related
+            ]
 
-            combined_text = "\n".join(text_snippets)
-            prompt = f"Here are recent logs:\n{combined_text}\n\nProduce a short daily reflection or summary."
+            prompt = f"Here is a summary of the last day:\n{summary_text}\n\n"
+            if related_snippets:
+                related_text = "\n".join(related_snippets)
+                prompt += f"Related earlier memories:\n{related_text}\n\n"
+            prompt += "Produce a short daily reflection or summary."
 
             response = await chat_skill.get_chat_completion(
                 prompt=prompt, system_prompt=self.system_prompt, max_tokens=150
@@ -42,9 +42,8 @@ class AnalyzeNewCommitsActivity(ActivityBase):
                     success=False, error="Failed to initialize chat skill"
                 )
 
-            # 2) Retrieve memory reference and known commit SHAs (already analyzed)
+            # 2) Retrieve memory reference (its artifact index knows analyzed SHAs)
             memory_obj = self._get_memory(shared_data)
-            known_commit_shas = self._get_known_commit_shas(memory_obj)
 
             # 3) Fetch commits via Composio
             commits_response = self._list_commits_via_composio()
@@ -95,7 +94,9 @@ class AnalyzeNewCommitsActivity(ActivityBase):
 
             # 5) Determine which commits are new (not previously analyzed)
             new_commits = [
-                c for c in fresh_commits if c.get("sha") not in known_commit_shas
+                c
+                for c in fresh_commits
+                if not memory_obj.has_artifact("commit", c.get("sha"))
             ]
             if not new_commits:
                 logger.info("All recent commits were already analyzed.")
@@ -149,33 +150,13 @@ class AnalyzeNewCommitsActivity(ActivityBase):
         memory_obj: Memory = system_data.get("memory_ref")
 
         if not memory_obj:
-            from framework.main import DigitalBeing
+            from framework.main import get_being
 
-            being = DigitalBeing()
-            being.initialize()
+            being = get_being()
             memory_obj = being.memory
 
         return memory_obj
 
-    def _get_known_commit_shas(self, memory_obj: Memory, limit: int = 50) -> List[str]:
-        """
-        Reads from memory which commits were already analyzed previously by this same activity.
-        We'll skip re-analyzing them.
-        """
-        recent_activities = memory_obj.get_recent_activities(limit=limit, offset=0)
-        known_shas = set()
-        for act in recent_activities:
-            # If we see "AnalyzeNewCommitsActivity" with success, parse its data
-            if act.get("activity_type") == "AnalyzeNewCommitsActivity" and act.get(
-                "success"
-            ):
-                # We rely on the final data posted in the ActivityResult
-                # where "commits_analyzed" is a list of commit SHAs or something similar
-                commits_analyzed = act.get("data", {}).get("commits_analyzed", [])
-                for sha in commits_analyzed:
-                    known_shas.add(sha)
-        return list(known_shas)
-
     def _build_batch_prompt(self, commits: List[dict]) -> str:
         """
         Build a single prompt containing all new commits (sha + message).
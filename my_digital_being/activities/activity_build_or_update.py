@@ -7,7 +7,7 @@ from skills.skill_chat import chat_skill
 
 from framework.skill_config import DynamicComposioSkills
 from framework.api_management import api_manager
-from framework.main import DigitalBeing
+from framework.main import get_being
 
 logger = logging.getLogger(__name__)
 
@@ -67,10 +67,11 @@ class BuildOrUpdateActivity(ActivityBase):
             "# 4) Memory usage\n"
             "- If referencing memory or retrieving recent activities, you can import from 'framework.main' or 'framework.memory'.\n"
             "- Typically, do:\n"
-            "     from framework.main import DigitalBeing\n"
-            "     being = DigitalBeing()\n"
-            "     being.initialize()\n"
+            "     from framework.main import get_being\n"
+            "     being = get_being()  # The running being; never create a second one\n"
             "     mem = being.memory.get_recent_activities(limit=10)\n"
+            "- To filter the whole history, use being.memory.query(activity_type=..., success=True,\n"
+            '  where=[["data.some_field", "exists"]], fields=["data.some_field"], limit=5).\n'
             "- We do not store the skill or memory object in `shared_data` as a permanent reference. It's optional if you want.\n\n"
             "# 5) Common pitfalls\n"
             "- DO NOT reference unknown modules or placeholders like 'some_module'.\n"
@@ -127,9 +128,7 @@ class BuildOrUpdateActivity(ActivityBase):
                 )
 
             # 2) Access the being + memory
-            being = DigitalBeing()
-            being.initialize()
-            recent_activities = being.memory.get_recent_activities(limit=20)
+            being = get_being()
 
             # 3) Gather skill info (both manual + dynamic)
             skills_config = being.configs.get("skills_config", {})
@@ -159,12 +158,15 @@ class BuildOrUpdateActivity(ActivityBase):
                 all_skills_block = "(No known skills found)"
 
             # 4) Find last suggestions from memory (SuggestNewActivities)
-            suggestion_texts = []
-            for act in recent_activities:
-                if act["activity_type"] == "SuggestNewActivities":
-                    data_content = act.get("data", {})
-                    if isinstance(data_content, dict) and "suggestions" in data_content:
-                        suggestion_texts.append(data_content["suggestions"])
+            recent_suggestions = being.memory.query(
+                activity_type="SuggestNewActivities",
+                where=[["data.suggestions", "exists"]],
+                fields=["data.suggestions"],
+                limit=3,
+            )
+            suggestion_texts = [
+                act["data"]["suggestions"] for act in recent_suggestions
+            ]
 
             if not suggestion_texts:
                 return ActivityResult(
@@ -38,21 +38,18 @@ class EvaluateActivity(ActivityBase):
                 )
 
             # Possibly fetch the last created/updated code from memory
-            from framework.main import DigitalBeing
+            from framework.main import get_being
 
-            being = DigitalBeing()
-            being.initialize()
-            recents = being.memory.get_recent_activities(limit=10)
-            code_found = None
-
-            for act in recents:
-                if act["activity_type"] == "BuildOrUpdateActivity" and act.get(
-                    "data", {}
-                ):
-                    data_content = act["data"]
-                    if "code_snippet" in data_content:
-                        code_found = data_content["code_snippet"]
-                        break
+            being = get_being()
+            latest_build = being.memory.query(
+                activity_type="BuildOrUpdateActivity",
+                where=[["data.code_snippet", "exists"]],
+                fields=["data.code_snippet"],
+                limit=1,
+            )
+            code_found = (
+                latest_build[0]["data"]["code_snippet"] if latest_build else None
+            )
 
             if not code_found:
                 return ActivityResult(
@@ -95,7 +95,11 @@ class PostTweetActivity(ActivityBase):
             logger.info(f"Successfully posted tweet: {tweet_text[:50]}...")
             return ActivityResult(
                 success=True,
-                data={"tweet_id": tweet_id, "content": tweet_text},
+                data={
+                    "tweet_id": tweet_id,
+                    "content": tweet_text,
+                    "media_urls": media_urls,
+                },
                 metadata={
                     "length": len(tweet_text),
                     "method": "composio",
@@ -105,6 +109,8 @@ class PostTweetActivity(ActivityBase):
                     "prompt_used": prompt_text,
                     "image_prompt_used": image_prompt,
                     "image_count": len(media_urls),
+                    # The generated image is an artifact of this tweet
+                    "artifacts": {"image": media_urls},
                 },
             )
 
@@ -122,10 +128,9 @@ class PostTweetActivity(ActivityBase):
             return maybe_config
 
         # fallback
-        from framework.main import DigitalBeing
+        from framework.main import get_being
 
-        being = DigitalBeing()
-        being.initialize()
+        being = get_being()
         return being.configs.get("character_config", {})
 
     def _get_recent_tweets(self, shared_data, limit: int = 10) -> List[str]:
@@ -136,21 +141,19 @@ class PostTweetActivity(ActivityBase):
         memory_obj: Memory = system_data.get("memory_ref")
 
         if not memory_obj:
-            from framework.main import DigitalBeing
+            from framework.main import get_being
 
-            being = DigitalBeing()
-            being.initialize()
+            being = get_being()
             memory_obj = being.memory
 
-        recent_activities = memory_obj.get_recent_activities(limit=50, offset=0)
-        tweets = []
-        for act in recent_activities:
-            if act.get("activity_type") == "PostTweetActivity" and act.get("success"):
-                tweet_body = act.get("data", {}).get("content", "")
-                if tweet_body:
-                    tweets.append(tweet_body)
-
-        return tweets[:limit]
+        recent_tweets = memory_obj.query(
+            activity_type="PostTweetActivity",
+            success=True,
+            where=[["data.content", "!=", ""], ["data.content", "!=", None]],
+            fields=["data.content"],
+            limit=limit,
+        )
+        return [act["data"]["content"] for act in recent_tweets]
 
     def _build_chat_prompt(
         self, personality: Dict[str, Any], recent_tweets: List[str]
@@ -1,10 +1,13 @@
 import logging
+from datetime import datetime, timedelta, timezone
 from typing import Dict, Any, List
 from urllib.parse import urlparse
 
 from framework.activity_decorator import activity, ActivityBase, ActivityResult
 from framework.api_management import api_manager
 from framework.memory import Memory
+from framework.memory_artifacts import extract_artifacts
+from framework.memory_summaries import LLMSummarizer
 from skills.skill_chat import chat_skill
 from skills.skill_x_api import XAPISkill
 
@@ -38,6 +41,8 @@ class PostRecentMemoriesTweetActivity(ActivityBase):
 
         # How many recent memory entries to consider
         self.num_activities_to_fetch = num_activities_to_fetch
+        # Twitter accepts up to 4 images per tweet
+        self.max_images = 4
 
     async def execute(self, shared_data) -> ActivityResult:
         try:
@@ -55,10 +60,15 @@ class PostRecentMemoriesTweetActivity(ActivityBase):
             objectives_data = character_config.get("objectives", {})
             # For example: objectives_data might be {"primary": "Spread positivity"}
 
-            # 3) Fetch recent memories, ignoring certain activity types
-            recent_memories = self._get_recent_memories(
-                shared_data, limit=self.num_activities_to_fetch
+            # 3) Fetch the memories most relevant to our objectives and personality,
+            # ignoring certain activity types
+            recall_query = " ".join(
+                str(v) for v in [*objectives_data.values(), *personality_data.values()]
             )
+            recent_records = self._get_recent_memories(
+                shared_data, limit=self.num_activities_to_fetch, query=recall_query
+            )
+            recent_memories = [self._summarize_memory(act) for act in recent_records]
             if not recent_memories:
                 logger.info("No relevant memories found to tweet about.")
                 return ActivityResult(
@@ -81,16 +91,26 @@ class PostRecentMemoriesTweetActivity(ActivityBase):
                     success=True, data={"message": "No new memories to tweet."}
                 )
 
-            # 5) Build prompt referencing personality + objectives + the final set of memories
+            # 5) Build prompt referencing personality + objectives + the final set
+            # of memories, with the rolling summary of the past week as context
+            week_summary = await self._get_week_summary(shared_data)
             prompt_text = self._build_chat_prompt(
                 personality=personality_data,
                 objectives=objectives_data,
                 new_memories=new_memories,
+                week_summary=week_summary,
+            )
+
+            # 6) Attach the drawings of those memories that have not been tweeted yet
+            drawing_urls = self._get_untweeted_drawing_urls(
+                shared_data,
+                [
+                    act
+                    for act, summary in zip(recent_records, recent_memories)
+                    if summary in new_memories
+                ],
             )
 
-            # 6) Extract drawing URLs from memories
-            drawing_urls = self._extract_drawing_urls(new_memories)
-            
             # 7) Use chat skill to generate the tweet text
             chat_response = await chat_skill.get_chat_completion(
                 prompt=prompt_text,
@@ -137,6 +157,7 @@ class PostRecentMemoriesTweetActivity(ActivityBase):
                     "tweet_id": tweet_id,
                     "content": tweet_text,
                     "recent_memories_used": new_memories,  # store these for next run
+                    "media_urls": drawing_urls,  # marks the drawings as tweeted
                 },
                 metadata={
                     "length": len(tweet_text),
@@ -160,21 +181,20 @@ class PostRecentMemoriesTweetActivity(ActivityBase):
         system_data = shared_data.get_category_data("system")
         memory_obj: Memory = system_data.get("memory_ref")
         if not memory_obj:
-            from framework.main import DigitalBeing
+            from framework.main import get_being
 
-            being = DigitalBeing()
-            being.initialize()
+            being = get_being()
             memory_obj = being.memory
 
-        # Search in the last ~10 runs for this activity
-        recent_activities = memory_obj.get_recent_activities(limit=10, offset=0)
-        for act in recent_activities:
-            if act.get(
-                "activity_type"
-            ) == "PostRecentMemoriesTweetActivity" and act.get("success"):
-                used = act.get("data", {}).get("recent_memories_used", [])
-                if used:
-                    return used
+        last_run = memory_obj.query(
+            activity_type="PostRecentMemoriesTweetActivity",
+            success=True,
+            where=[["data.recent_memories_used", "exists"]],
+            fields=["data.recent_memories_used"],
+            limit=1,
+        )
+        if last_run:
+            return last_run[0]["data"]["recent_memories_used"] or []
         return []
 
     def _get_character_config(self, shared_data) -> Dict[str, Any]:
@@ -187,49 +207,75 @@ class PostRecentMemoriesTweetActivity(ActivityBase):
             return maybe_config
 
         # fallback
-        from framework.main import DigitalBeing
+        from framework.main import get_being
 
-        being = DigitalBeing()
-        being.initialize()
+        being = get_being()
         return being.configs.get("character_config", {})
 
-    def _get_recent_memories(self, shared_data, limit: int = 10) -> List[str]:
+    def _get_recent_memories(
+        self, shared_data, limit: int = 10, query: str = ""
+    ) -> List[Dict[str, Any]]:
         """
-        Pull up to 'limit' recent memory items (activities),
-        ignoring certain activity types in self.ignored_activity_types.
-        We'll just gather a short summary for each activity.
+        Pull up to 'limit' memory items (activities), ignoring certain activity
+        types in self.ignored_activity_types. With a query, the items are the
+        ones semantically closest to it (Memory.recall); otherwise, or if
+        nothing matches, the most recent ones.
         """
         system_data = shared_data.get_category_data("system")
         memory_obj: Memory = system_data.get("memory_ref")
 
         if not memory_obj:
-            from framework.main import DigitalBeing
+            from framework.main import get_being
 
-            being = DigitalBeing()
-            being.initialize()
+            being = get_being()
             memory_obj = being.memory
 
-        recent_activities = memory_obj.get_recent_activities(limit=50, offset=0)
+        recent_activities = []
+        if query.strip():
+            recent_activities = memory_obj.recall(query, k=limit * 5)
+        if not recent_activities:
+            recent_activities = memory_obj.query(
+                where=[["activity_type", "not_in", self.ignored_activity_types]],
+                limit=limit,
+            )
         memories = []
         for act in recent_activities:
             act_type = act.get("activity_type")
             if act_type in self.ignored_activity_types:
                 continue  # skip
 
-            # Some minimal representation
-            summary = f"{act_type} => {act.get('data', {})}"
-            memories.append(summary)
+            memories.append(act)
 
             if len(memories) >= limit:
                 break
 
         return memories
 
+    @staticmethod
+    def _summarize_memory(act: Dict[str, Any]) -> str:
+        """Some minimal representation of an activity for the prompt."""
+        return f"{act.get('activity_type')} => {act.get('data', {})}"
+
+    async def _get_week_summary(self, shared_data) -> str:
+        """
+        Summary of the last 7 days from Memory's cached day/hour summaries;
+        only windows closed since the last run need a chat call.
+        """
+        memory_obj: Memory = shared_data.get_category_data("system").get("memory_ref")
+        if not memory_obj:
+            return ""
+        summary = await memory_obj.get_summary(
+            since=datetime.now(timezone.utc) - timedelta(days=7),
+            summarizer=LLMSummarizer(chat_skill.get_chat_completion),
+        )
+        return summary["text"]
+
     def _build_chat_prompt(
         self,
         personality: Dict[str, Any],
         objectives: Dict[str, Any],
         new_memories: List[str],
+        week_summary: str = "",
     ) -> str:
         """
         Construct the user prompt: combine personality + objectives + the new memory summaries,
@@ -262,38 +308,43 @@ class PostRecentMemoriesTweetActivity(ActivityBase):
             f"{objectives_str}\n\n"
             f"Here are some new memories:\n"
             f"{memories_str}\n\n"
-            f"Please craft a short tweet (under 280 chars) that references these memories, "
-            f"reflects the personality and objectives, and ensures it's not repetitive or dull. "
-            f"Keep it interesting, cohesive, and mindful of the overall tone.\n"
+        )
+        if week_summary:
+            prompt += f"For context, here is what it did over the past week:\n{week_summary}\n\n"
+        prompt += (
+            "Please craft a short tweet (under 280 chars) that references these memories, "
+            "reflects the personality and objectives, and ensures it's not repetitive or dull. "
+            "Keep it interesting, cohesive, and mindful of the overall tone.\n"
         )
         return prompt
 
-    def _extract_drawing_urls(self, memories: List[str]) -> List[str]:
+    def _get_untweeted_drawing_urls(
+        self, shared_data, memories: List[Dict[str, Any]]
+    ) -> List[str]:
         """
-        Extract URLs from all DrawActivity entries in memories.
-        Returns a list of valid URLs, empty list if none found.
+        URLs of the images produced by the given memories that no tweet has
+        used yet, per Memory's artifact index. Returns a list of valid URLs,
+        empty list if none found.
         """
+        memory_obj: Memory = shared_data.get_category_data("system").get("memory_ref")
+        if not memory_obj:
+            return []
+
         drawing_urls = []
-        
-        for memory in memories:
-            if memory.startswith("DrawActivity =>"):
-                try:
-                    # Extract the JSON-like string after '=>'
-                    data_str = memory.split("=>")[1].strip()
-                    # Convert string representation to dict
-                    data = eval(data_str)
-                    
-                    # Extract URL from image_data
-                    if 'image_data' in data and 'url' in data['image_data']:
-                        url = data['image_data']['url']
-                        # Validate URL
-                        result = urlparse(url)
-                        if all([result.scheme, result.netloc]):
-                            drawing_urls.append(url)
-                        else:
-                            logger.warning(f"Invalid URL format found in DrawActivity: {url}")
-                except Exception as e:
-                    logger.error(f"Failed to extract drawing URL: {e}")
+        for act in memories:
+            produced, _ = extract_artifacts(act)
+            for kind, url in produced:
+                if kind != "image" or url in drawing_urls:
+                    continue
+                artifact = memory_obj.get_artifact("image", url)
+                if artifact and artifact["used_by"]:
+                    continue  # Already tweeted
+                # Local paths can be indexed too; only URLs can be posted
+                result = urlparse(url)
+                if not all([result.scheme, result.netloc]):
+                    logger.warning(f"Skipping image that is not a URL: {url}")
                     continue
-        
+                drawing_urls.append(url)
+                if len(drawing_urls) >= self.max_images:
+                    return drawing_urls
         return drawing_urls
@@ -48,8 +48,17 @@ class SoulReflectionActivity(ActivityBase):
             # Get recent memories from shared_data if available
             recent_activities = shared_data.get("memory", "recent_activities") or []
 
+            # Otherwise reflect on the rolling summary of the last day
+            day_summary = ""
+            memory_obj = shared_data.get("system", "memory_ref")
+            if not recent_activities and memory_obj:
+                summary = await memory_obj.get_summary()
+                day_summary = summary["text"] if summary["count"] else ""
+
             # Create a perception for the soul to reflect on
-            if recent_activities:
+            if day_summary:
+                perception = f"Here is what my day looked like:\n{day_summary}\nHow do I feel about my progress and purpose?"
+            elif recent_activities:
                 recent_summary = ", ".join([
                     str(a.get("activity_type", "unknown"))
                     for a in recent_activities[:5]
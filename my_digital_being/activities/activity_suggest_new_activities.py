@@ -7,7 +7,7 @@ from skills.skill_chat import chat_skill
 
 # We import these so we can list out both manual + dynamic skill records
 from framework.skill_config import DynamicComposioSkills
-from framework.main import DigitalBeing
+from framework.main import get_being
 
 logger = logging.getLogger(__name__)
 
@@ -45,8 +45,7 @@ If relevant, mention which skill(s) would be used for each suggestion.
                 )
 
             # 2) Gather the being + config
-            being = DigitalBeing()
-            being.initialize()
+            being = get_being()
             char_cfg = being.configs.get("character_config", {})
             objectives = char_cfg.get("objectives", {})
             primary_obj = objectives.get("primary", "No primary objective found.")
@@ -90,17 +89,27 @@ If relevant, mention which skill(s) would be used for each suggestion.
             if not all_skills_block.strip():
                 all_skills_block = "(No known skills found)"
 
-            # 5) Build final prompt
+            # 5) Recall the past activities most relevant to the objective
+            relevant = being.memory.recall(str(primary_obj), k=5)
+            history_block = "\n".join(
+                f"- {a['activity_type']}, success={a['success']}, data={str(a.get('data'))[:200]}"
+                for a in relevant
+            )
+            if not history_block:
+                history_block = "(No relevant past activities)"
+
+            # 6) Build final prompt
             prompt_text = (
                 f"My primary objective: {primary_obj}\n"
                 f"Global constraints or notes: {global_cons}\n\n"
                 f"Known Skills:\n{all_skills_block}\n\n"
+                f"Relevant past activities:\n{history_block}\n\n"
                 f"Propose up to 3 new or modified Activities to help achieve my goal. "
                 f"Highlight how each might use one or more of these skills (if relevant). "
                 f"Keep suggestions short."
             )
 
-            # 6) LLM call
+            # 7) LLM call
             response = await chat_skill.get_chat_completion(
                 prompt=prompt_text, system_prompt=self.system_prompt, max_tokens=300
             )
@@ -51,10 +51,18 @@ class ActivityLoader:
             )
 
         self.loaded_activities: Dict[str, Type[Any]] = {}
+        # File name -> size, mtime and activity class of every recognized file
+        self.manifest: Dict[str, Dict[str, Any]] = {}
         logger.info(f"ActivityLoader initialized with path: {self.activities_path}")
 
-    def load_activities(self):
-        """Load all activities from the activities directory."""
+    def load_activities(self, manifest: Optional[Dict[str, Dict[str, Any]]] = None):
+        """
+        Load all activities from the activities directory.
+        :param manifest: self.manifest of an earlier run; files it lists with
+            the same size and mtime are imported without being scanned for
+            their activity class first.
+        """
+        manifest = manifest or {}
         if not self.activities_path.exists():
             logger.error(f"Activities directory not found: {self.activities_path}")
             return
@@ -63,17 +71,30 @@ class ActivityLoader:
         for activity_file in self.activities_path.glob("activity_*.py"):
             try:
                 logger.info(f"Found activity file: {activity_file}")
-                file_text = activity_file.read_text()
-
-                # We expect a pattern like: class SomeActivity(ActivityBase):
-                class_match = re.search(
-                    r"class\s+(\w+)\(.*ActivityBase.*\):", file_text
-                )
-                if not class_match:
-                    logger.error(f"No recognized activity class in {activity_file}")
-                    continue
-
-                class_name = class_match.group(1)
+                stat = activity_file.stat()
+                known = manifest.get(activity_file.name, {})
+                if (known.get("size"), known.get("mtime_ns")) == (
+                    stat.st_size,
+                    stat.st_mtime_ns,
+                ):
+                    class_name = known["class_name"]
+                else:
+                    file_text = activity_file.read_text()
+
+                    # We expect a pattern like: class SomeActivity(ActivityBase):
+                    class_match = re.search(
+                        r"class\s+(\w+)\(.*ActivityBase.*\):", file_text
+                    )
+                    if not class_match:
+                        logger.error(f"No recognized activity class in {activity_file}")
+                        continue
+                    class_name = class_match.group(1)
+
+                self.manifest[activity_file.name] = {
+                    "size": stat.st_size,
+                    "mtime_ns": stat.st_mtime_ns,
+                    "class_name": class_name,
+                }
                 module_name = activity_file.stem  # e.g. "activity_draw"
 
                 # Possibly skip if "enabled": false in activities_config
@@ -1,10 +1,14 @@
 import logging
+import math
 import random
 from typing import Dict, Any, Optional, List, Tuple
 from datetime import datetime, timedelta
 
 logger = logging.getLogger(__name__)
 
+# Longest the loop sleeps when nothing is runnable, in case a prediction is off
+MAX_IDLE_SECONDS = 300
+
 
 class ActivitySelector:
     def __init__(self, constraints: Dict[str, Any], state):
@@ -87,6 +91,23 @@ class ActivitySelector:
 
         return selected_activity
 
+    def get_cooldowns(self) -> Dict[str, str]:
+        """When each activity class was last picked (ISO), for checkpoints."""
+        return {
+            name: picked.isoformat()
+            for name, picked in self.last_activity_times.items()
+        }
+
+    def restore_cooldowns(self, cooldowns: Dict[str, str]):
+        """Restore get_cooldowns() output, so cooldowns survive a restart."""
+        for name, picked in cooldowns.items():
+            try:
+                picked_at = datetime.fromisoformat(picked)
+            except (TypeError, ValueError):
+                continue
+            # Picks made since startup are newer than anything checkpointed
+            self.last_activity_times.setdefault(name, picked_at)
+
     def get_next_available_times(self) -> List[Dict[str, Any]]:
         """
         Provide info on when each loaded activity class will be available again.
@@ -132,6 +153,50 @@ class ActivitySelector:
         # sort by soonest availability
         return sorted(next_available, key=lambda x: x["available_in_seconds"])
 
+    def seconds_until_next_activity(self) -> Optional[float]:
+        """
+        Seconds until some enabled activity is both off cooldown and
+        affordable with regenerating energy; None if none ever will be.
+        """
+        if not self.activity_loader:
+            return None
+        current_time = datetime.now()
+        activities_config = self.constraints.get("activities_config", {})
+        soonest = None
+
+        for activity_class in self.activity_loader.get_all_activities().values():
+            base_name = activity_class.__name__
+            if activities_config.get(base_name, {}).get("enabled", True) is False:
+                continue
+
+            cooldown = getattr(activity_class, "cooldown", 0)
+            last_time = self.last_activity_times.get(base_name)
+            cooldown_left = 0.0
+            if last_time:
+                time_since_last = (current_time - last_time).total_seconds()
+                cooldown_left = max(0.0, cooldown - time_since_last)
+
+            energy_cost = getattr(activity_class, "energy_cost", 0.2)
+            energy_wait = self.state.seconds_until_energy(energy_cost, current_time)
+            if energy_wait is None:
+                continue  # Costs more than the maximum energy
+
+            wait = max(cooldown_left, energy_wait)
+            if soonest is None or wait < soonest:
+                soonest = wait
+        return soonest
+
+    def idle_delay(self, minimum: float) -> float:
+        """
+        How long the loop should sleep after finding nothing to run: until the
+        next activity becomes runnable, but at least `minimum` seconds and at
+        most MAX_IDLE_SECONDS.
+        """
+        wait = self.seconds_until_next_activity()
+        if wait is None:
+            return MAX_IDLE_SECONDS
+        return min(max(math.ceil(wait), minimum), MAX_IDLE_SECONDS)
+
     def _get_available_activities(self) -> List[Any]:
         """
         Return a list of *activity instances* that:
@@ -193,7 +258,7 @@ class ActivitySelector:
         """
         Check if the being has enough energy for the activity (activity.energy_cost).
         """
-        current_energy = self.state.get_current_state().get("energy", 1.0)
+        current_energy = self.state.get_energy()
         required_energy = getattr(activity, "energy_cost", 0.2)
         has_energy = current_energy >= required_energy
 
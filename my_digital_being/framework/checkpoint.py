@@ -0,0 +1,118 @@
+"""
+Whole-runtime checkpoint, so a restart resumes where the last run stopped.
+
+The checkpoint is one binary file of named sections:
+
+    magic     b"DBCKPT01"
+    count     uint32
+    table     count x (name 16s, offset uint64, length uint64, crc32 uint32)
+    payloads  one JSON document per section
+
+At boot the file is memory-mapped and only the table is read; a section is
+decoded when asked for, and dropped (treated as missing) if its checksum does
+not match. Writes go to a temp file that replaces the checkpoint.
+"""
+
+import json
+import logging
+import mmap
+import os
+import struct
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"DBCKPT01"
+_COUNT = struct.Struct("<I")
+_ENTRY = struct.Struct("<16sQQI")
+_NAME_BYTES = 16
+
+
+def write_checkpoint(path: Path, sections: Dict[str, Any]):
+    """
+    Atomically write `sections` (name -> JSON-serializable value) to `path`.
+    Raises ValueError for a section name longer than the 16 bytes the table
+    holds (UTF-8 encoded), rather than storing it cut short.
+    """
+    path = Path(path)
+    for name in sections:
+        if len(name.encode("utf-8")) > _NAME_BYTES:
+            raise ValueError(
+                f"Checkpoint section name {name!r} is longer than {_NAME_BYTES} bytes"
+            )
+    payloads = {
+        name: json.dumps(value, separators=(",", ":"), default=str).encode("utf-8")
+        for name, value in sections.items()
+    }
+    offset = len(MAGIC) + _COUNT.size + _ENTRY.size * len(payloads)
+    table = []
+    for name, payload in payloads.items():
+        table.append(
+            _ENTRY.pack(name.encode("utf-8"), offset, len(payload), zlib.crc32(payload))
+        )
+        offset += len(payload)
+
+    temp_file = path.with_suffix(path.suffix + ".tmp")
+    with open(temp_file, "wb") as f:
+        f.write(MAGIC)
+        f.write(_COUNT.pack(len(payloads)))
+        f.write(b"".join(table))
+        for payload in payloads.values():
+            f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    temp_file.replace(path)
+
+
+class Checkpoint:
+    """A memory-mapped checkpoint whose sections are decoded on access."""
+
+    def __init__(self, path: Path, mapped: mmap.mmap):
+        self.path = Path(path)
+        self._mapped = mapped
+        self._table: Dict[str, tuple] = {}
+        count = _COUNT.unpack_from(mapped, len(MAGIC))[0]
+        position = len(MAGIC) + _COUNT.size
+        for _ in range(count):
+            name, offset, length, crc = _ENTRY.unpack_from(mapped, position)
+            if offset + length > len(mapped):
+                raise ValueError("Checkpoint is truncated")
+            self._table[name.rstrip(b"\0").decode("utf-8")] = (offset, length, crc)
+            position += _ENTRY.size
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["Checkpoint"]:
+        """Map the checkpoint at `path`; None if it is missing or unreadable."""
+        path = Path(path)
+        try:
+            if not path.exists() or path.stat().st_size < len(MAGIC) + _COUNT.size:
+                return None
+            with open(path, "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            if mapped[: len(MAGIC)] != MAGIC:
+                mapped.close()
+                logger.warning(f"Ignoring {path}: not a runtime checkpoint")
+                return None
+            return cls(path, mapped)
+        except Exception as e:
+            logger.error(f"Failed to load checkpoint {path}: {e}")
+            return None
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._table
+
+    def section(self, name: str, default: Any = None) -> Any:
+        """Decode one section; `default` if it is missing or corrupt."""
+        if name not in self._table:
+            return default
+        offset, length, crc = self._table[name]
+        payload = self._mapped[offset : offset + length]
+        if zlib.crc32(payload) != crc:
+            logger.warning(f"Checkpoint section '{name}' is corrupt, ignoring it")
+            return default
+        return json.loads(payload)
+
+    def close(self):
+        self._mapped.close()
@@ -3,8 +3,10 @@ import logging
 from pathlib import Path
 from typing import Dict, Any, Optional
 import asyncio
+import time
 from datetime import datetime
 
+from .checkpoint import Checkpoint, write_checkpoint
 from .memory import Memory
 from .state import State
 from .activity_selector import ActivitySelector
@@ -15,6 +17,20 @@ from .activity_decorator import ActivityResult
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# The being initialized in this process (see get_being())
+_current_being: Optional["DigitalBeing"] = None
+
+
+def get_being() -> "DigitalBeing":
+    """
+    The DigitalBeing running in this process, so skills and activities use its
+    configs, memory and state instead of opening a second set over the same
+    storage. Outside a running being (scripts, tools) one is initialized.
+    """
+    if _current_being is None:
+        DigitalBeing().initialize()
+    return _current_being
+
 
 class DigitalBeing:
     def __init__(self, config_path: Optional[str] = None):
@@ -23,9 +39,42 @@ class DigitalBeing:
             config_path = str(Path(__file__).parent.parent / "config")
         self.config_path = Path(config_path)
         self.configs = self._load_configs()
-        self.shared_data = SharedData()
-        self.memory = Memory()
-        self.state = State()
+        self.shared_data = SharedData(
+            self.configs.get("activity_constraints", {}).get("shared_data_config")
+        )
+        checkpoint_config = self.configs.get("activity_constraints", {}).get(
+            "checkpoint_config", {}
+        )
+        self.checkpoint_file = Path("./storage") / "runtime.ckpt"
+        self.checkpoint_interval = checkpoint_config.get("interval_seconds", 300)
+        self._last_checkpoint = time.monotonic()
+        # The last run's checkpoint, until initialize() has restored from it
+        self._checkpoint = (
+            Checkpoint.load(self.checkpoint_file)
+            if checkpoint_config.get("enabled", True)
+            else None
+        )
+        checkpoint = self._checkpoint
+        memory_config = self.configs.get("activity_constraints", {}).get(
+            "memory_config", {}
+        )
+        self.memory = Memory(
+            backend=memory_config.get("backend", "json"),
+            cold_after_days=memory_config.get("cold_after_days", 30),
+            blob_threshold=memory_config.get("blob_threshold_bytes", 4096),
+            retention=memory_config.get("retention"),
+            collapse_repeats=memory_config.get("collapse_repeats", True),
+            cursor=checkpoint.section("memory") if checkpoint else None,
+        )
+        state_config = self.configs.get("activity_constraints", {}).get(
+            "state_config", {}
+        )
+        self.state = State(
+            flush_delay=state_config.get("flush_delay_seconds", 2.0),
+            energy_regen_per_hour=state_config.get("energy_regen_per_hour", 0.1),
+            energy_notify_interval=state_config.get("energy_notify_seconds", 60.0),
+            timeseries=state_config.get("timeseries"),
+        )
         self.activity_loader = ActivityLoader()
         self.activity_selector = ActivitySelector(
             self.configs.get("activity_constraints", {}), self.state
@@ -52,7 +101,9 @@ class DigitalBeing:
 
     def initialize(self):
         """Initialize the digital being."""
+        global _current_being
         logger.info("Initializing digital being...")
+        _current_being = self
 
         # Load configurations
         self.configs = self._load_configs()
@@ -79,19 +130,80 @@ class DigitalBeing:
                         f"Registered API key requirements for {skill_name}: {required_keys}"
                     )
 
-        # Initialize sub-components
-        self.memory.initialize()
-        self.state.initialize(self.configs.get("character_config", {}))
+        checkpoint = self._checkpoint
+        self._checkpoint = None
+
+        def restored(name: str) -> Dict[str, Any]:
+            return (checkpoint.section(name) if checkpoint else None) or {}
+
+        # Initialize sub-components (memory already loaded itself on construction)
+        self.state.initialize(
+            self.configs.get("character_config", {}),
+            fallback_state=restored("state"),
+        )
 
         # Load activities
-        self.activity_loader.load_activities()
+        self.activity_loader.load_activities(manifest=restored("loader"))
         self.shared_data.initialize()
+        self.shared_data.restore(restored("shared_data"), restored("shared_ttl"))
+        # Lets activities query (and recall from) the live memory
+        self.shared_data.set("system", "memory_ref", self.memory)
 
         # Set loader in selector
         self.activity_selector.set_activity_loader(self.activity_loader)
+        self._restore_cooldowns(restored("cooldowns"))
+        if checkpoint:
+            logger.info(f"Resumed from checkpoint {checkpoint.path}")
+            checkpoint.close()
 
         logger.info("Digital being initialization complete")
 
+    def _restore_cooldowns(self, cooldowns: Dict[str, Any]):
+        """Put checkpointed cooldown tables back on the selector and classes."""
+        self.activity_selector.restore_cooldowns(cooldowns.get("selector", {}))
+        executions = cooldowns.get("classes", {})
+        for activity_class in self.activity_loader.get_all_activities().values():
+            executed = executions.get(activity_class.__name__)
+            if executed and getattr(activity_class, "last_execution", None) is None:
+                activity_class.last_execution = datetime.fromisoformat(executed)
+
+    def write_checkpoint(self):
+        """
+        Snapshot the runtime (memory cursor, state, cooldowns, shared data and
+        the loader manifest) into one file the next start resumes from.
+        """
+        executions = {
+            activity_class.__name__: activity_class.last_execution.isoformat()
+            for activity_class in self.activity_loader.get_all_activities().values()
+            if getattr(activity_class, "last_execution", None)
+        }
+        try:
+            write_checkpoint(
+                self.checkpoint_file,
+                {
+                    "saved_at": datetime.now().isoformat(),
+                    "memory": self.memory.snapshot_cursor(),
+                    "state": self.state.current_state,
+                    "cooldowns": {
+                        "selector": self.activity_selector.get_cooldowns(),
+                        "classes": executions,
+                    },
+                    "shared_data": self.shared_data.export_serializable(),
+                    "shared_ttl": self.shared_data.export_write_times(),
+                    "loader": self.activity_loader.manifest,
+                },
+            )
+        except Exception as e:
+            logger.error(f"Failed to write checkpoint: {e}")
+        self._last_checkpoint = time.monotonic()
+
+    def maybe_checkpoint(self):
+        """Write a checkpoint if checkpoint_interval has passed since the last."""
+        if not self.checkpoint_interval:
+            return
+        if time.monotonic() - self._last_checkpoint >= self.checkpoint_interval:
+            self.write_checkpoint()
+
     def is_configured(self) -> bool:
         """
         Check if being is 'configured'.
@@ -126,7 +238,14 @@ class DigitalBeing:
 
                 self.state.update()
                 self.memory.persist()
-                await asyncio.sleep(1)  # short delay to avoid busy-waiting
+                self.shared_data.expire()
+                self.maybe_checkpoint()
+                if current_activity:
+                    await asyncio.sleep(1)  # short delay to avoid busy-waiting
+                else:
+                    # Nothing runnable: sleep until a cooldown ends or energy
+                    # regenerates enough for the next activity
+                    await asyncio.sleep(self.activity_selector.idle_delay(minimum=1))
 
         except KeyboardInterrupt:
             logger.info("Shutting down digital being...")
@@ -138,7 +257,9 @@ class DigitalBeing:
             logger.info(
                 f"Starting execution of activity: {activity.__class__.__name__}"
             )
+            started = time.monotonic()
             result = await activity.execute(self.shared_data)
+            duration = time.monotonic() - started
 
             if not isinstance(result, ActivityResult):
                 logger.warning(
@@ -155,6 +276,7 @@ class DigitalBeing:
                 "timestamp": datetime.now().isoformat(),
                 "activity_type": activity.__class__.__name__,
                 "result": result.to_dict(),
+                "duration": duration,
             }
             self.memory.store_activity_result(activity_record)
 
@@ -185,8 +307,13 @@ class DigitalBeing:
 
     def cleanup(self):
         """Cleanup resources before shutdown."""
-        self.memory.persist()
-        self.state.save()
+        global _current_being
+        if _current_being is self:
+            _current_being = None
+        self.memory.close()
+        self.state.close()
+        # After memory is compacted, so the cursor points into the final file
+        self.write_checkpoint()
         logger.info("Cleanup completed")
 
 
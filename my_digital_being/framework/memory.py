@@ -1,58 +1,296 @@
 """Memory management system for storing and retrieving activity history."""
 
+import base64
+import heapq
 import json
 import logging
+from collections import deque
+from itertools import islice, takewhile
 from pathlib import Path
-from typing import Dict, List, Any
-from datetime import datetime, timezone
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Tuple, Union
+from datetime import datetime, timedelta, timezone
+
+from .memory_archive import MemoryArchive
+from .memory_artifacts import ArtifactIndex
+from .memory_blobs import BlobStore
+from .memory_columns import MemoryColumnStore, to_epoch
+from .memory_journal import MemoryJournal
+from .memory_lock import StorageLock
+from .memory_record import MemoryRecord, bisect_records
+from .memory_retention import (
+    DAY_SECONDS,
+    EvictionSummaries,
+    RetentionPolicy,
+    RetentionRecord,
+    RetentionTotals,
+    plan_evictions,
+)
+from .memory_query import compile_where, parse_sort, parse_where, project, sort_key
+from .memory_search import MemorySearchIndex
+from .memory_summaries import ExtractiveSummarizer, MemorySummaries
+from .memory_vectors import MemoryVectorIndex
+from .memory_snapshot import LazyLongTermMemory, load_snapshot, write_snapshot
+from .memory_sqlite import SqliteMemoryStore, migrate_json_memory
 
 logger = logging.getLogger(__name__)
 
 
 class Memory:
-    def __init__(self, storage_path: str = "./storage"):
+    def __init__(
+        self,
+        storage_path: str = "./storage",
+        journal: bool = True,
+        backend: str = "json",
+        cold_after_days: int = 30,
+        blob_threshold: Optional[int] = 4096,
+        retention: Optional[Dict[str, Any]] = None,
+        collapse_repeats: bool = True,
+        cursor: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        :param storage_path: Directory holding memory.json and its journal.
+        :param journal: If True, new records are appended to memory.journal.jsonl
+            and only periodically compacted into memory.json. If False, the
+            whole memory file is rewritten on every store (legacy behaviour).
+        :param backend: "json" keeps long-term memory resident and persists it
+            to memory.json. "sqlite" keeps only short-term memory resident and
+            stores every record in an indexed memory.db (WAL mode); an existing
+            memory.json is migrated into it on first start. "tiered" is sqlite
+            plus a cold tier: records older than `cold_after_days` move out of
+            memory.db into compressed per-month archives under archive/.
+        :param cold_after_days: Age after which the tiered backend archives records.
+        :param blob_threshold: data/metadata fields whose JSON encoding exceeds
+            this many bytes are stored once in blobs/ (content-addressed) and
+            referenced from the record. 0 or None keeps payloads inline.
+        :param retention: memory_config.retention settings (see
+            memory_retention); None keeps every record.
+        :param collapse_repeats: If True, a result identical to the previous
+            one of its activity type extends that record's run (count,
+            last_seen) instead of being stored again.
+        :param cursor: A snapshot cursor saved by an earlier run (see
+            snapshot_cursor()); lets the json backend load memory.json
+            without scanning it, if the file has not changed since.
+        """
         self.storage_path = Path(storage_path)
         self.storage_path.mkdir(exist_ok=True)
-        self.short_term_memory: List[Dict[str, Any]] = []
-        self.long_term_memory: Dict[str, Any] = {}
+        # Held until close(); raises StorageLockedError if another process
+        # has this storage open
+        self._lock = StorageLock(self.storage_path / "memory.lock")
+        self._lock.acquire()
+        self.short_term_memory: List[MemoryRecord] = []
+        # Buckets are paged in from memory.json on first access per activity type
+        self.long_term_memory: Dict[str, Any] = LazyLongTermMemory()
         self.memory_file = self.storage_path / "memory.json"
+        self._seq = 0  # Sequence number of the newest stored record
+        # Where memory.json's sections are, as of the last load or write
+        self._cursor = cursor
+        # Display-formatted mirror of short_term_memory, oldest on the left
+        self._recent: deque = deque()
+
+        if backend not in ("json", "sqlite", "tiered"):
+            logger.warning(f"Unknown memory backend '{backend}', using json")
+            backend = "json"
+        self.backend = backend
+        self.cold_after_days = cold_after_days
+        self.collapse_repeats = collapse_repeats
+        self._store = (
+            SqliteMemoryStore(self.storage_path / "memory.db")
+            if backend in ("sqlite", "tiered")
+            else None
+        )
+        self._archive = (
+            MemoryArchive(self.storage_path / "archive")
+            if backend == "tiered"
+            else None
+        )
+        self._journal = (
+            MemoryJournal(self.storage_path / "memory.journal.jsonl")
+            if journal and not self._store
+            else None
+        )
+        # Derived indexes over all records, loaded on first use and then kept
+        # up to date on every store
+        self._index_factories = {
+            "search": lambda: MemorySearchIndex(
+                self.storage_path / "memory.search.idx"
+            ),
+            "vectors": lambda: MemoryVectorIndex(self.storage_path / "memory.vectors"),
+            "columns": lambda: MemoryColumnStore(self.storage_path / "memory.columns"),
+            "artifacts": lambda: ArtifactIndex(
+                self.storage_path / "memory.artifacts.json"
+            ),
+            "retention": lambda: RetentionTotals(
+                self.storage_path / "memory.retention.json"
+            ),
+        }
+        self._indexes: Dict[str, Any] = {}
+        self._blobs = (
+            BlobStore(self.storage_path / "blobs", blob_threshold)
+            if blob_threshold
+            else None
+        )
+        policy = RetentionPolicy(retention or {})
+        self._retention = policy if policy.enabled else None
+        self._stores_since_retention = 0
+        self._eviction_summaries = EvictionSummaries(
+            self.storage_path / "memory.evicted.json"
+        )
+        # Rolling hour/day/week summaries; activities may pass their own
+        # summarizer (e.g. LLMSummarizer) to get_summary()
+        self.summarizer = ExtractiveSummarizer()
+        self._summaries = MemorySummaries(
+            self.storage_path / "memory.summaries.json",
+            fetch=lambda since, until: self._iter_entries(since=since, until=until),
+        )
         self.initialize()
 
     def initialize(self):
         """Initialize memory system."""
-        self._load_memory()
+        if self._store:
+            self._load_from_store()
+        else:
+            self._load_memory()
+        self._rebuild_recent_index()
+
+    def _rebuild_recent_index(self):
+        """Rebuild the recent-activity index from short-term memory."""
+        ordered = sorted(self.short_term_memory, key=lambda x: x["timestamp"])
+        self._recent = deque(
+            self._format_entry(activity, resolve_blobs=False) for activity in ordered
+        )
+
+    def _load_from_store(self):
+        """Load short-term memory from the SQLite store, migrating memory.json once."""
+        try:
+            archived_seq = self._archive.max_seq() if self._archive else 0
+            if (
+                self._store.max_seq() == 0
+                and archived_seq == 0
+                and self.memory_file.exists()
+            ):
+                self._migrate_json_memory()
+
+            self._seq = max(self._store.max_seq(), archived_seq)
+            self.long_term_memory = {}
+            self.short_term_memory = [
+                MemoryRecord.from_dict(entry)
+                for entry in self._store.query(
+                    min_seq=self._short_term_start_seq(), newest_first=False
+                )
+            ]
+            self._archive_cold_records()
+        except Exception as e:
+            logger.error(f"Failed to load memory from {self._store.db_file}: {e}")
+            self.long_term_memory = {}
+            self.short_term_memory = []
+
+    def _migrate_json_memory(self):
+        """Import memory.json (plus any pending journal) into the SQLite store."""
+        legacy = Memory(self.storage_path, journal=True, backend="json")
+        try:
+            start_seq = migrate_json_memory(
+                legacy.short_term_memory, legacy.long_term_memory, self._store
+            )
+        finally:
+            legacy.close()
+        self._store.set_meta("short_term_start_seq", start_seq)
+
+    def _archive_cold_records(self):
+        """Move long-term records older than cold_after_days into the archive."""
+        if not self._archive:
+            return
+        cutoff = datetime.now(timezone.utc) - timedelta(days=self.cold_after_days)
+        cold_filter = {
+            "until": cutoff.isoformat(),
+            "max_seq": self._short_term_start_seq() - 1,
+        }
+        if not self._store.count(**cold_filter):
+            return
+        # Archive first, then delete: a crash in between is healed on the next
+        # run because the archive skips sequence numbers it already holds.
+        moved = self._archive.add(self._store.iter_records(**cold_filter))
+        self._store.delete(**cold_filter)
+        logger.info(f"Moved {moved} memory records into the cold archive")
+
+    def _short_term_start_seq(self) -> int:
+        """First sequence number still held in short-term memory (SQLite backend)."""
+        return self._store.get_meta("short_term_start_seq", 1)
 
     def _load_memory(self):
-        """Load memory from persistent storage."""
+        """
+        Load memory from persistent storage.
+        Only the header and short-term memory are decoded at startup; long-term
+        buckets are read on first access.
+        """
         try:
             if self.memory_file.exists():
-                with open(self.memory_file, "r") as f:
-                    try:
-                        data = json.load(f)
-                        if isinstance(data, dict):
-                            self.long_term_memory = data.get("long_term", {})
-                            self.short_term_memory = data.get("short_term", [])
-                        else:
-                            logger.warning(
-                                "Invalid memory file format, resetting memory"
-                            )
-                            self.long_term_memory = {}
-                            self.short_term_memory = []
-                            self.persist()  # Reset the file with proper format
-                    except json.JSONDecodeError as je:
-                        logger.error(f"Failed to parse memory file: {je}")
-                        # Backup corrupted file
-                        backup_path = self.memory_file.with_suffix(".json.bak")
-                        self.memory_file.rename(backup_path)
-                        logger.info(f"Backed up corrupted memory file to {backup_path}")
-                        # Reset memory
-                        self.long_term_memory = {}
-                        self.short_term_memory = []
-                        self.persist()  # Create new file with proper format
+                try:
+                    snapshot = load_snapshot(self.memory_file, self._cursor)
+                    if snapshot:
+                        (
+                            self._seq,
+                            self.short_term_memory,
+                            self.long_term_memory,
+                            self._cursor,
+                        ) = snapshot
+                    else:
+                        self._load_legacy_memory()
+                except json.JSONDecodeError as je:
+                    logger.error(f"Failed to parse memory file: {je}")
+                    # Backup corrupted file
+                    backup_path = self.memory_file.with_suffix(".json.bak")
+                    self.memory_file.rename(backup_path)
+                    logger.info(f"Backed up corrupted memory file to {backup_path}")
+                    # Reset memory
+                    self.long_term_memory = LazyLongTermMemory()
+                    self.short_term_memory = []
+                    self._write_snapshot()  # Create new file with proper format
         except Exception as e:
             logger.error(f"Failed to load memory: {e}")
-            self.long_term_memory = {}
+            self.long_term_memory = LazyLongTermMemory()
+            self.short_term_memory = []
+
+        self._replay_journal()
+
+    def _load_legacy_memory(self):
+        """Fully parse a memory.json written before the line-oriented layout."""
+        with open(self.memory_file, "r") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            long_term = {
+                activity_type: [MemoryRecord.from_dict(entry) for entry in entries]
+                for activity_type, entries in data.get("long_term", {}).items()
+            }
+            self.long_term_memory = LazyLongTermMemory(loaded=long_term)
+            self.short_term_memory = [
+                MemoryRecord.from_dict(entry) for entry in data.get("short_term", [])
+            ]
+            self._seq = data.get("seq", self.get_activity_count())
+        else:
+            logger.warning("Invalid memory file format, resetting memory")
+            self.long_term_memory = LazyLongTermMemory()
             self.short_term_memory = []
+            self._write_snapshot()  # Reset the file with proper format
+
+    def _replay_journal(self):
+        """Re-apply records journaled after the last snapshot (crash recovery)."""
+        if not self._journal:
+            return
+        try:
+            replayed = self._journal.replay(after_seq=self._seq)
+        except Exception as e:
+            logger.error(f"Failed to replay memory journal: {e}")
+            return
+
+        for seq, memory_entry, update in replayed:
+            if update:
+                self._replace_record(MemoryRecord.from_dict(memory_entry))
+                continue
+            self.short_term_memory.append(MemoryRecord.from_dict(memory_entry))
+            self._consolidate_memory()
+            self._seq = seq
+        if replayed:
+            logger.info(f"Recovered {len(replayed)} memory records from journal")
 
     def store_activity_result(self, activity_record: Dict[str, Any]):
         """Store the result of an activity in memory."""
@@ -73,10 +311,51 @@ class Memory:
                     "error": result.get("error"),
                     "data": result.get("data"),
                     "metadata": result.get("metadata", {}),
+                    "duration": activity_record.get("duration"),
                 }
-                self.short_term_memory.append(memory_entry)
+                # Indexes see the full payload; stored copies reference blobs
+                full_entry = memory_entry
+                if self._blobs:
+                    memory_entry = {
+                        **memory_entry,
+                        "data": self._blobs.externalize(memory_entry["data"]),
+                        "metadata": self._blobs.externalize(memory_entry["metadata"]),
+                    }
+                if self.collapse_repeats and self._extend_repeat(
+                    memory_entry, full_entry
+                ):
+                    logger.info(
+                        f"Stored repeated activity result for {memory_entry['activity_type']}"
+                    )
+                    return
+                self._seq += 1
+                if self._store:
+                    self._store.append(self._seq, memory_entry)
+                self.short_term_memory.append(MemoryRecord.from_dict(memory_entry))
+                self._recent.append(
+                    self._format_entry(memory_entry, resolve_blobs=False)
+                )
+                for index in self._indexes.values():
+                    index.add(
+                        memory_entry
+                        if getattr(index, "stored_entries", False)
+                        else full_entry
+                    )
+                    index.indexed_seq = self._seq
                 self._consolidate_memory()
-                self.persist()  # Persist after each update
+                if self._journal:
+                    # O(record) append; the full snapshot is only rewritten on compaction
+                    self._journal.append(self._seq, memory_entry)
+                    if self._journal.needs_compaction:
+                        self.compact()
+                elif not self._store:
+                    self.persist()  # Persist after each update
+                self._stores_since_retention += 1
+                if (
+                    self._retention
+                    and self._stores_since_retention >= self._retention.check_every
+                ):
+                    self.apply_retention()
                 logger.info(
                     f"Stored activity result for {memory_entry['activity_type']}"
                 )
@@ -86,6 +365,95 @@ class Memory:
         except Exception as e:
             logger.error(f"Failed to store activity result: {e}")
 
+    def _extend_repeat(
+        self, memory_entry: Dict[str, Any], full_entry: Dict[str, Any]
+    ) -> bool:
+        """
+        Fold a result identical to the previous one of its activity type into
+        that record's run instead of storing a new record. Only short-term
+        records are extended, and a run never crosses a UTC hour: aggregates
+        (activity_timeseries, summaries, column rebuilds) place all of a run's
+        results at its start timestamp, so bounding runs to the hour keeps
+        every hourly, daily and weekly window counting each result where it
+        happened. A busy loop still folds up to an hour of repeats per record.
+        Returns False if the result starts a new record.
+        """
+        activity_type = memory_entry["activity_type"]
+        for i in range(len(self.short_term_memory) - 1, -1, -1):
+            previous = self.short_term_memory[i]
+            if previous.activity_type == activity_type:
+                break
+        else:
+            return False
+
+        timestamp = memory_entry["timestamp"]
+        if (
+            previous["timestamp"][:13] != timestamp[:13]  # Same UTC hour
+            or previous.success != memory_entry["success"]
+            or previous.error != memory_entry["error"]
+            or previous.data != memory_entry["data"]
+            or previous.metadata != memory_entry["metadata"]
+        ):
+            return False
+
+        # The run keeps the mean duration of its results, so a rebuild of the
+        # columns (count rows of that duration) yields the same avg_duration
+        duration = previous.duration
+        if duration is not None and memory_entry["duration"] is not None:
+            duration += (memory_entry["duration"] - duration) / (previous.count + 1)
+        record = MemoryRecord.from_dict(
+            {
+                **previous.to_dict(),
+                "duration": duration,
+                "count": previous.count + 1,
+                "last_seen": timestamp,
+            }
+        )
+        self._replace_record(record)
+        if self._store:
+            self._store.update_repeat(
+                activity_type, record["timestamp"], record.count, timestamp, duration
+            )
+        if self._journal:
+            self._journal.append(self._seq, record.to_dict(), update=True)
+            if self._journal.needs_compaction:
+                self.compact()
+        elif not self._store:
+            self.persist()
+        columns = self._indexes.get("columns")
+        if columns is not None:
+            # One row per result at the run's start, as after a rebuild
+            columns.add({**full_entry, "timestamp": record["timestamp"]})
+        totals = self._indexes.get("retention")
+        if totals is not None:
+            totals.remove([RetentionRecord(None, previous.to_dict())])
+            totals.add(record.to_dict())
+        return True
+
+    def _replace_record(self, record: MemoryRecord):
+        """Swap in a new version of the record with the same type and timestamp."""
+        timestamp = record["timestamp"]
+        for i in range(len(self.short_term_memory) - 1, -1, -1):
+            current = self.short_term_memory[i]
+            if (
+                current.activity_type == record.activity_type
+                and current["timestamp"] == timestamp
+            ):
+                self.short_term_memory[i] = record
+                offset = len(self._recent) - len(self.short_term_memory)
+                if i + offset >= 0:
+                    self._recent[i + offset] = self._format_entry(
+                        record, resolve_blobs=False
+                    )
+                return
+        if self._store:
+            return  # Nothing resident to update
+        # Consolidated while its journal update was pending
+        bucket = self.long_term_memory.get(record.activity_type, [])
+        i = bisect_records(bucket, timestamp)
+        if i < len(bucket) and bucket[i]["timestamp"] == timestamp:
+            bucket[i] = record
+
     def _consolidate_memory(self):
         """Consolidate short-term memory into long-term memory."""
         if len(self.short_term_memory) > 100:  # Keep last 100 activities in short-term
@@ -93,37 +461,74 @@ class Memory:
                 :-50
             ]  # Move older ones to long-term
             self.short_term_memory = self.short_term_memory[-50:]
+            while len(self._recent) > len(self.short_term_memory):
+                self._recent.popleft()
+
+            if self._store:
+                # Older records already live in the database; just move the split
+                self._store.set_meta(
+                    "short_term_start_seq",
+                    self._seq - len(self.short_term_memory) + 1,
+                )
+                self._archive_cold_records()
+                return
 
             for memory in older_memories:
-                activity_type = memory["activity_type"]
-                if activity_type not in self.long_term_memory:
-                    self.long_term_memory[activity_type] = []
-                self.long_term_memory[activity_type].append(memory)
+                self.long_term_memory.add_entry(memory["activity_type"], memory)
 
     def get_recent_activities(
-        self, limit: int = 10, offset: int = 0
+        self, limit: int = 10, offset: int = 0, resolve_blobs: bool = True
     ) -> List[Dict[str, Any]]:
-        """Get recent activities from memory with success/failure status."""
-        # Sort all activities by timestamp in descending order (most recent first)
-        all_activities = sorted(
-            self.short_term_memory, key=lambda x: x["timestamp"], reverse=True
-        )
+        """
+        Get recent activities from memory with success/failure status.
+        With resolve_blobs=False, large payload fields are left as
+        {"$blob": <sha256>, "bytes": <size>} references (see load_blob()).
+        """
+        # Records arrive in time order, so walking the index backwards yields
+        # most recent first without sorting; timestamps are pre-formatted.
+        page = islice(reversed(self._recent), offset, offset + limit)
+        if resolve_blobs:
+            return [self._resolve_entry(activity) for activity in page]
+        return [dict(activity) for activity in page]
 
-        # Apply pagination
-        paginated_activities = all_activities[offset : offset + limit]
+    def _format_entry(
+        self, activity: Dict[str, Any], resolve_blobs: bool = True
+    ) -> Dict[str, Any]:
+        """Convert a stored entry into the display format returned to callers."""
+        formatted = {
+            "timestamp": self._format_timestamp(activity["timestamp"]),
+            "activity_type": activity["activity_type"],
+            "success": activity["success"],
+            "error": activity.get("error"),
+            "data": activity.get("data"),
+            "metadata": activity.get("metadata", {}),
+            "duration": activity.get("duration"),
+        }
+        if activity.get("count", 1) > 1:
+            formatted["count"] = activity["count"]
+            formatted["first_seen"] = formatted["timestamp"]
+            formatted["last_seen"] = self._format_timestamp(activity["last_seen"])
+        return self._resolve_entry(formatted) if resolve_blobs else formatted
 
-        # Format timestamps for display
-        return [
-            {
-                "timestamp": self._format_timestamp(activity["timestamp"]),
-                "activity_type": activity["activity_type"],
-                "success": activity["success"],
-                "error": activity.get("error"),
-                "data": activity.get("data"),
-                "metadata": activity.get("metadata", {}),
+    def _resolve_entry(self, activity: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy of an entry with its blob references replaced by the payloads."""
+        if not self._blobs:
+            return dict(activity)
+        try:
+            return {
+                **activity,
+                "data": self._blobs.resolve(activity.get("data")),
+                "metadata": self._blobs.resolve(activity.get("metadata", {})),
             }
-            for activity in paginated_activities
-        ]
+        except Exception as e:
+            logger.error(f"Failed to resolve memory blobs: {e}")
+            return dict(activity)
+
+    def load_blob(self, digest: str) -> Any:
+        """Load a payload stored under a {"$blob": digest} reference."""
+        if not self._blobs:
+            raise ValueError("Blob storage is disabled")
+        return self._blobs.get(digest)
 
     def _format_timestamp(self, timestamp_str: str) -> str:
         """Format ISO timestamp to human-readable format."""
@@ -133,49 +538,1038 @@ class Memory:
         except Exception:
             return timestamp_str
 
+    @staticmethod
+    def _to_iso(value: Union[str, datetime, None]) -> Optional[str]:
+        """Normalize a datetime (naive = local time) or ISO string to UTC ISO."""
+        if value is None:
+            return None
+        if isinstance(value, str):
+            value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        return value.astimezone(timezone.utc).isoformat()
+
+    def find_activities(
+        self,
+        activity_type: Union[str, Iterable[str], None] = None,
+        success: Optional[bool] = None,
+        since: Union[str, datetime, None] = None,
+        until: Union[str, datetime, None] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        resolve_blobs: bool = True,
+    ) -> List[Dict[str, Any]]:
+        """
+        Find activities across short- and long-term memory, most recent first.
+        Filters by activity type (one or several), success and a [since, until)
+        time range. Uses the SQLite indexes when that backend is active.
+        """
+        since, until = self._to_iso(since), self._to_iso(until)
+        end = None if limit is None else offset + limit
+        if self._store:
+            matches = self._store.query(
+                activity_type=activity_type,
+                success=success,
+                since=since,
+                until=until,
+                limit=end,
+            )
+            if self._archive and (end is None or len(matches) < end):
+                # Everything archived is older than the warm tier
+                for _, activity in self._archive.iter_records(
+                    activity_type, success, since, until, newest_first=True
+                ):
+                    matches.append(activity)
+                    if end is not None and len(matches) >= end:
+                        break
+            return [
+                self._format_entry(activity, resolve_blobs)
+                for activity in matches[offset:end]
+            ]
+
+        types = None
+        if activity_type is not None:
+            types = (
+                {activity_type}
+                if isinstance(activity_type, str)
+                else set(activity_type)
+            )
+        candidates = [
+            activity
+            for bucket_type in self.long_term_memory
+            if types is None or bucket_type in types
+            for activity in self.long_term_memory[bucket_type]
+        ] + self.short_term_memory
+        matches = [
+            activity
+            for activity in candidates
+            if (types is None or activity["activity_type"] in types)
+            and (success is None or bool(activity["success"]) == success)
+            and (since is None or activity["timestamp"] >= since)
+            and (until is None or activity["timestamp"] < until)
+        ]
+        matches.sort(key=lambda x: x["timestamp"], reverse=True)
+        return [
+            self._format_entry(activity, resolve_blobs)
+            for activity in matches[offset:end]
+        ]
+
+    def page_activities(
+        self,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        activity_type: Union[str, Iterable[str], None] = None,
+        resolve_blobs: bool = True,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Page through the whole history, most recent first, walking from
+        short-term memory into long-term (and archived) records in a stable
+        order. Returns (activities, next_cursor); pass next_cursor back to get
+        the following page. next_cursor is None on the last page.
+
+        Cursors are opaque. They hold the position of the last record returned
+        (its timestamp plus sequence number, or activity type on the json
+        backend, whose long-term entries carry no sequence number), so a page
+        costs the same however far back it is and is unaffected by records
+        stored in between.
+        """
+        before = self._decode_cursor(cursor) if cursor else None
+        if self._store:
+            page = self._store.page(
+                before=before, activity_type=activity_type, limit=limit + 1
+            )
+            if self._archive and len(page) <= limit:
+                # Archived records are all older than the database ones
+                if page:
+                    archive_before = (page[-1][1]["timestamp"], page[-1][0])
+                else:
+                    archive_before = before
+                for seq, activity in self._archive.iter_records(
+                    activity_type, newest_first=True, before=archive_before
+                ):
+                    page.append((seq, activity))
+                    if len(page) > limit:
+                        break
+            keys = [(activity["timestamp"], seq) for seq, activity in page]
+            activities = [activity for _, activity in page]
+        else:
+            activities = self._json_page(before, activity_type, limit + 1)
+            keys = [(a["timestamp"], a["activity_type"]) for a in activities]
+
+        next_cursor = None
+        if len(activities) > limit:
+            activities = activities[:limit]
+            next_cursor = self._encode_cursor(keys[limit - 1])
+        return [self._format_entry(a, resolve_blobs) for a in activities], next_cursor
+
+    def _json_page(
+        self,
+        before: Optional[Tuple[str, str]],
+        activity_type: Union[str, Iterable[str], None],
+        limit: int,
+    ) -> List[Dict[str, Any]]:
+        """
+        Newest-first page of the json backend, ordered by (timestamp,
+        activity_type): bisects into every long-term bucket and merges them.
+        """
+        types = None
+        if activity_type is not None:
+            types = (
+                {activity_type}
+                if isinstance(activity_type, str)
+                else set(activity_type)
+            )
+
+        def key(activity):
+            return (activity["timestamp"], activity["activity_type"])
+
+        recent = [
+            activity
+            for activity in reversed(self.short_term_memory)
+            if (types is None or activity["activity_type"] in types)
+            and (before is None or key(activity) < before)
+        ]
+        if len(recent) >= limit:
+            return recent[:limit]  # Long-term buckets never need paging in
+
+        def older(activity_type: str) -> Iterator[Dict[str, Any]]:
+            bucket = self.long_term_memory[activity_type]
+            end = len(bucket)
+            if before is not None:
+                end = bisect_records(bucket, *before)
+            for i in range(end - 1, -1, -1):
+                yield bucket[i]
+
+        buckets = [
+            older(bucket_type)
+            for bucket_type in self.long_term_memory
+            if types is None or bucket_type in types
+        ]
+        merged = heapq.merge(iter(recent), *buckets, key=key, reverse=True)
+        return list(islice(merged, limit))
+
+    @staticmethod
+    def _encode_cursor(key: Tuple[str, Any]) -> str:
+        return base64.urlsafe_b64encode(json.dumps(key).encode("utf-8")).decode("ascii")
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> Tuple[str, Any]:
+        try:
+            timestamp, tiebreak = json.loads(base64.urlsafe_b64decode(cursor))
+            return timestamp, tiebreak
+        except Exception:
+            raise ValueError(f"Invalid cursor: {cursor!r}")
+
     def get_activity_history(self, activity_type: str) -> List[Dict[str, Any]]:
         """Get history of specific activity type."""
-        activities = self.long_term_memory.get(activity_type, [])
+        if self._store:
+            activities = self._store.query(
+                activity_type=activity_type,
+                max_seq=self._short_term_start_seq() - 1,
+                newest_first=False,
+            )
+            if self._archive:
+                cold = self._archive.iter_records(activity_type=activity_type)
+                activities = [activity for _, activity in cold] + activities
+        else:
+            activities = self.long_term_memory.get(activity_type, [])
         return [
-            {**activity, "timestamp": self._format_timestamp(activity["timestamp"])}
+            {
+                **self._resolve_entry(activity),
+                "timestamp": self._format_timestamp(activity["timestamp"]),
+            }
             for activity in activities
         ]
 
-    def persist(self):
-        """Persist memory to storage."""
+    def query(
+        self,
+        activity_type: Union[str, Iterable[str], None] = None,
+        success: Optional[bool] = None,
+        since: Union[str, datetime, None] = None,
+        until: Union[str, datetime, None] = None,
+        where: Optional[List[List[Any]]] = None,
+        fields: Optional[List[str]] = None,
+        sort: str = "-timestamp",
+        limit: Optional[int] = None,
+        offset: int = 0,
+        resolve_blobs: bool = True,
+    ) -> List[Dict[str, Any]]:
+        """
+        Query the whole history. activity_type, success and the [since, until)
+        range go through the backend's indexes (SQLite indexes and archive
+        manifest, or the json type buckets bisected by time); `where`
+        predicates on any field, e.g. [["data.tweet_id", "exists"],
+        ["metadata.model", "==", "gpt-4o"]], are checked on the candidates
+        (see memory_query for the operators). Results are sorted by the
+        `sort` field ("-" for descending) and reduced to the dotted `fields`
+        paths when given. Sorting by timestamp streams candidates in index
+        order and stops after offset + limit matches. Raises ValueError for
+        malformed predicates or timestamps.
+        """
+        conditions = parse_where(where)
+        sort_field, descending = parse_sort(sort)
+        since, until = self._to_iso(since), self._to_iso(until)
+        resolve = (lambda ref: self.load_blob(ref["$blob"])) if self._blobs else None
+
+        candidates = self._query_candidates(
+            activity_type,
+            success,
+            since,
+            until,
+            newest_first=descending or sort_field != "timestamp",
+        )
+        if conditions:
+            candidates = filter(compile_where(conditions, resolve), candidates)
+
+        end = None if limit is None else offset + limit
+        if sort_field == "timestamp":
+            selected = list(islice(candidates, offset, end))
+        else:
+            key = sort_key(sort_field, resolve)
+            matches = sorted(candidates, key=key, reverse=descending)
+            if descending:
+                # Missing values sort last either way
+                missing = [a for a in matches if key(a)[0] == 2]
+                matches = [a for a in matches if key(a)[0] != 2] + missing
+            selected = matches[offset:end]
+        return [project(self._format_entry(a, resolve_blobs), fields) for a in selected]
+
+    def explain_query(
+        self,
+        activity_type: Union[str, Iterable[str], None] = None,
+        success: Optional[bool] = None,
+        since: Union[str, datetime, None] = None,
+        until: Union[str, datetime, None] = None,
+        where: Optional[List[List[Any]]] = None,
+        sort: str = "-timestamp",
+    ) -> Dict[str, Any]:
+        """Describe how query() would run with these arguments."""
+        sort_field, _ = parse_sort(sort)
+        scan_filters = [path for path, _, _ in parse_where(where)]
+        if self._store:
+            source = "sqlite indexes (timestamp, activity_type, success)"
+            if self._archive:
+                source += " + archive months pruned by manifest"
+            indexable = ("activity_type", "success", "since", "until")
+        else:
+            source = "type buckets" if activity_type is not None else "all buckets"
+            if since is not None or until is not None:
+                source += ", bisected by time"
+            indexable = ("activity_type", "since", "until")
+            if success is not None:
+                scan_filters.insert(0, "success")  # No success index here
+        filters = {
+            "activity_type": activity_type,
+            "success": success,
+            "since": since,
+            "until": until,
+        }
+        index_filters = [name for name in indexable if filters[name] is not None]
+        return {
+            "source": source,
+            "index_filters": index_filters,
+            "scan_filters": scan_filters,
+            "order": "index" if sort_field == "timestamp" else f"sort by {sort_field}",
+        }
+
+    def _query_candidates(
+        self,
+        activity_type: Union[str, Iterable[str], None],
+        success: Optional[bool],
+        since: Optional[str],
+        until: Optional[str],
+        newest_first: bool,
+    ) -> Iterator[Dict[str, Any]]:
+        """Records matching the indexable filters, streamed in time order."""
+        if self._store:
+            tiers = [
+                (
+                    activity
+                    for _, activity in self._store.iter_query(
+                        activity_type, success, since, until, newest_first
+                    )
+                )
+            ]
+            if self._archive:
+                # Archived records are all older than the database ones
+                archived = (
+                    activity
+                    for _, activity in self._archive.iter_records(
+                        activity_type, success, since, until, newest_first
+                    )
+                )
+                if newest_first:
+                    tiers.append(archived)
+                else:
+                    tiers.insert(0, archived)
+            for tier in tiers:
+                yield from tier
+            return
+
+        types = None
+        if activity_type is not None:
+            types = (
+                {activity_type}
+                if isinstance(activity_type, str)
+                else set(activity_type)
+            )
+
+        def matches(activity) -> bool:
+            return (
+                (types is None or activity["activity_type"] in types)
+                and (success is None or bool(activity["success"]) == success)
+                and (since is None or activity["timestamp"] >= since)
+                and (until is None or activity["timestamp"] < until)
+            )
+
+        def bucket_slice(bucket_type: str) -> Iterator[Dict[str, Any]]:
+            bucket = self.long_term_memory[bucket_type]
+            start = bisect_records(bucket, since) if since is not None else 0
+            end = bisect_records(bucket, until) if until is not None else len(bucket)
+            indexes = (
+                range(end - 1, start - 1, -1) if newest_first else range(start, end)
+            )
+            for i in indexes:
+                if success is None or bool(bucket[i]["success"]) == success:
+                    yield bucket[i]
+
+        buckets = [
+            bucket_slice(bucket_type)
+            for bucket_type in self.long_term_memory
+            if types is None or bucket_type in types
+        ]
+        recent = [activity for activity in self.short_term_memory if matches(activity)]
+        recent.sort(key=lambda x: x["timestamp"], reverse=newest_first)
+        yield from heapq.merge(
+            iter(recent), *buckets, key=lambda x: x["timestamp"], reverse=newest_first
+        )
+
+    def search(
+        self, query: str, limit: int = 10, activity_type: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Full-text search over the data, error and metadata of every record,
+        ranked by BM25. Returns display-formatted records with a "score" key,
+        best match first.
+        """
+        try:
+            hits = self._index("search").search(query, limit, activity_type)
+        except Exception as e:
+            logger.error(f"Memory search failed: {e}")
+            return []
+
+        results = []
+        for score, timestamp, hit_type in hits:
+            activity = self._find_entry(hit_type, timestamp)
+            if activity is not None:
+                results.append(
+                    {**self._format_entry(activity), "score": round(score, 4)}
+                )
+        return results
+
+    def recall(
+        self, query: str, k: int = 5, activity_type: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Semantic recall: the `k` records most similar to `query` under offline
+        hashed embeddings, as display-formatted records with a "similarity"
+        key, best match first.
+        """
+        try:
+            hits = self._index("vectors").search(query, k, activity_type)
+        except Exception as e:
+            logger.error(f"Memory recall failed: {e}")
+            return []
+
+        results = []
+        for similarity, timestamp, hit_type in hits:
+            activity = self._find_entry(hit_type, timestamp)
+            if activity is not None:
+                results.append(
+                    {**self._format_entry(activity), "similarity": round(similarity, 4)}
+                )
+        return results
+
+    def has_artifact(self, kind: str, value: Any) -> bool:
+        """
+        Whether a stored record produced this artifact, e.g.
+        has_artifact("commit", sha). Kinds: image, tweet, commit, activity_file.
+        """
+        try:
+            return self._index("artifacts").contains(kind, value)
+        except Exception as e:
+            logger.error(f"Artifact lookup failed: {e}")
+            return False
+
+    def get_artifact(self, kind: str, value: Any) -> Optional[Dict[str, Any]]:
+        """
+        {kind, value, timestamp, activity_type, used_by} for an artifact, where
+        used_by lists the [kind, value] artifacts of the records that used it.
+        """
         try:
-            memory_data = {
-                "short_term": self.short_term_memory,
-                "long_term": self.long_term_memory,
+            return self._index("artifacts").get(kind, value)
+        except Exception as e:
+            logger.error(f"Artifact lookup failed: {e}")
+            return None
+
+    def get_artifacts(
+        self,
+        kind: str,
+        unused: bool = False,
+        limit: Optional[int] = None,
+        newest_first: bool = True,
+    ) -> List[str]:
+        """
+        Artifact values of a kind, newest first. With `unused`, only those no
+        record has used yet (e.g. images not yet posted in a tweet).
+        """
+        try:
+            return self._index("artifacts").values(kind, unused, limit, newest_first)
+        except Exception as e:
+            logger.error(f"Artifact lookup failed: {e}")
+            return []
+
+    async def get_summary(
+        self,
+        since: Union[str, datetime, None] = None,
+        until: Union[str, datetime, None] = None,
+        summarizer=None,
+    ) -> Dict[str, Any]:
+        """
+        Summary of the activities in [since, until) (default: the last day up to
+        now) as {"since", "until", "count", "counts", "text"}, where counts maps
+        activity type to [successes, failures]. Built from cached hour/day/week
+        summaries (see memory_summaries), so after the first call for a range
+        only the newest windows are summarized. Windows are built offline;
+        `summarizer` (default: self.summarizer) only writes the final text.
+        """
+        now = datetime.now(timezone.utc)
+        # Round up, so records stored earlier in the current second are included
+        until_epoch = (
+            to_epoch(self._to_iso(until)) if until else int(now.timestamp()) + 1
+        )
+        since_epoch = to_epoch(self._to_iso(since)) if since else until_epoch - 86400
+        try:
+            return await self._summaries.summarize(
+                since_epoch,
+                until_epoch,
+                int(now.timestamp()),
+                summarizer or self.summarizer,
+            )
+        except Exception as e:
+            logger.error(f"Failed to summarize memory: {e}")
+            return {
+                "since": self._to_iso(
+                    datetime.fromtimestamp(since_epoch, timezone.utc)
+                ),
+                "until": self._to_iso(
+                    datetime.fromtimestamp(until_epoch, timezone.utc)
+                ),
+                "count": 0,
+                "counts": {},
+                "text": "",
             }
 
-            # Write to a temporary file first
-            temp_file = self.memory_file.with_suffix(".json.tmp")
-            with open(temp_file, "w") as f:
-                json.dump(memory_data, f, indent=2)
+    def aggregate(
+        self,
+        group_by: Iterable[str] = ("activity_type",),
+        bucket: Union[str, int] = "day",
+        since: Union[str, datetime, None] = None,
+        until: Union[str, datetime, None] = None,
+        activity_type: Union[str, Iterable[str], None] = None,
+        success: Optional[bool] = None,
+        utc_offset: int = 0,
+    ) -> List[Dict[str, Any]]:
+        """
+        Aggregate statistics over the whole history from the columnar store.
+        Groups by any of "activity_type", "time" (buckets of `bucket`: "hour",
+        "day", "week", "month" or seconds, aligned to `utc_offset` seconds east
+        of UTC) and "success", and returns one dict per group with count,
+        success_count, success_rate and avg_duration. "time" is reported as
+        the bucket's ISO start.
+
+        Example, success rate per activity over the last 30 days:
+            memory.aggregate(since=datetime.now() - timedelta(days=30))
+        """
+        since, until = self._to_iso(since), self._to_iso(until)
+        rows = self._index("columns").aggregate(
+            group_by,
+            bucket,
+            since=None if since is None else to_epoch(since),
+            until=None if until is None else to_epoch(until),
+            activity_type=activity_type,
+            success=success,
+            utc_offset=utc_offset,
+        )
+        for row in rows:
+            if "time" in row:
+                row["time"] = datetime.fromtimestamp(
+                    row["time"], timezone.utc
+                ).isoformat()
+        return rows
 
-            # Rename temporary file to actual file (atomic operation)
-            temp_file.replace(self.memory_file)
+    def _index(self, name: str):
+        """Load a derived index on first use and bring it up to date."""
+        if name in self._indexes:
+            return self._indexes[name]
 
+        index = self._index_factories[name]()
+        # The retention totals count records as stored, blob references and all
+        resolve = (
+            (lambda activity: activity)
+            if getattr(index, "stored_entries", False)
+            else self._resolve_entry
+        )
+        missing = self._seq - index.indexed_seq if index.load() else -1
+        if missing < 0 or (missing > 0 and index.last_timestamp is None):
+            entries = (resolve(a) for a in self._iter_entries())
+            index.rebuild(entries, self._seq)
+            index.save()
+        elif missing > 0:
+            # Records stored since the index was last saved (e.g. after a crash)
+            last_indexed = index.last_timestamp
+            newer = [
+                activity
+                for activity in self._iter_entries(since=last_indexed)
+                if activity["timestamp"] > last_indexed
+            ]
+            for activity in newer[-missing:]:
+                index.add(resolve(activity))
+            index.indexed_seq = self._seq
+            logger.info(
+                f"Caught up memory {name} index with {len(newer[-missing:])} records"
+            )
+        self._indexes[name] = index
+        return index
+
+    def _drop_indexes(self):
+        """Delete the derived indexes; each is rebuilt on its next use."""
+        self._indexes = {}
+        for factory in self._index_factories.values():
+            factory().delete()
+
+    def _iter_entries(
+        self, since: Optional[str] = None, until: Optional[str] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Iterate over every stored record (optionally in [since, until)), oldest first."""
+        if self._store:
+            if self._archive:
+                for _, activity in self._archive.iter_records(since=since, until=until):
+                    yield activity
+            for _, activity in self._store.iter_records(since=since, until=until):
+                yield activity
+            return
+
+        buckets = []
+        for activity_type in self.long_term_memory:
+            bucket = self.long_term_memory[activity_type]
+            if since is not None:
+                start = bisect_records(bucket, since)
+                bucket = islice(bucket, start, None)
+            buckets.append(bucket)
+        merged = heapq.merge(*buckets, key=lambda x: x["timestamp"])
+        if until is not None:
+            merged = takewhile(lambda x: x["timestamp"] < until, merged)
+        yield from merged
+        for activity in self.short_term_memory:
+            if (since is None or activity["timestamp"] >= since) and (
+                until is None or activity["timestamp"] < until
+            ):
+                yield activity
+
+    def _find_entry(
+        self, activity_type: str, timestamp: str
+    ) -> Optional[Dict[str, Any]]:
+        """Look up a single record by activity type and exact ISO timestamp."""
+        for activity in reversed(self.short_term_memory):
+            if (
+                activity["timestamp"] == timestamp
+                and activity["activity_type"] == activity_type
+            ):
+                return activity
+
+        if self._store:
+            found = self._store.query(
+                activity_type=activity_type,
+                since=timestamp,
+                limit=1,
+                newest_first=False,
+            )
+            if found and found[0]["timestamp"] == timestamp:
+                return found[0]
+            if self._archive:
+                for _, activity in self._archive.iter_records(
+                    activity_type, since=timestamp
+                ):
+                    return activity if activity["timestamp"] == timestamp else None
+            return None
+
+        # Long-term buckets are in time order
+        bucket = self.long_term_memory.get(activity_type, [])
+        i = bisect_records(bucket, timestamp)
+        if i < len(bucket) and bucket[i]["timestamp"] == timestamp:
+            return bucket[i]
+        return None
+
+    def apply_retention(self, now: Optional[datetime] = None) -> int:
+        """
+        Evict long-term records over the configured retention limits and fold
+        them into eviction summaries. Runs automatically every `check_every`
+        stores. Returns the number of evicted records.
+
+        Counts and bytes per type come from the retention totals, so records
+        are only read when a limit can be exceeded: those past a type's
+        max_age_days, all of a type over max_count/max_bytes, or all records
+        when max_total_bytes is exceeded. References to them are looked for
+        in every record outside the cold archive. Evicted records are then
+        removed from the derived indexes, and their blobs deleted once no
+        other record references them.
+        """
+        self._stores_since_retention = 0
+        if not self._retention:
+            return 0
+        try:
+            now_epoch = (now or datetime.now(timezone.utc)).timestamp()
+            totals = self._index("retention")
+            records = self._retention_candidates(totals, now_epoch)
+            if not records:
+                return 0
+            keys = {record.key for record in records}
+            recent = [
+                RetentionRecord(None, entry)
+                for key, entry in self._iter_long_term(archive=False)
+                if key not in keys
+            ] + [RetentionRecord(None, e) for e in self.short_term_memory]
+            evicted = plan_evictions(
+                records, recent, self._retention, now_epoch, totals.counts()
+            )
+            if not evicted:
+                return 0
+
+            self._evict([record.key for record in evicted])
+            self._eviction_summaries.add(
+                evicted, now_epoch, self._retention.summary_days
+            )
+            self._eviction_summaries.save()
+            self._remove_from_indexes(evicted)
+            logger.info(f"Retention evicted {len(evicted)} memory records")
+            return len(evicted)
+        except Exception as e:
+            logger.error(f"Failed to apply memory retention: {e}")
+            return 0
+
+    def _retention_candidates(
+        self, totals: RetentionTotals, now: float
+    ) -> List[RetentionRecord]:
+        """The long-term records a retention pass may have to evict."""
+        policy = self._retention
+        if policy.max_total_bytes and totals.total_bytes > policy.max_total_bytes:
+            return [
+                RetentionRecord(key, entry) for key, entry in self._iter_long_term()
+            ]
+
+        records = []
+        for activity_type, (count, size) in totals.types.items():
+            limits = policy.limits(activity_type)
+            max_count, max_bytes = limits.get("max_count"), limits.get("max_bytes")
+            max_age = limits.get("max_age_days")
+            if (max_count is not None and count > max_count) or (
+                max_bytes is not None and size > max_bytes
+            ):
+                until = None
+            elif max_age is not None:
+                cutoff = now - max_age * DAY_SECONDS
+                until = datetime.fromtimestamp(cutoff, timezone.utc).isoformat()
+            else:
+                continue
+            records.extend(
+                RetentionRecord(key, entry)
+                for key, entry in self._iter_long_term(activity_type, until)
+            )
+        return records
+
+    def _remove_from_indexes(self, evicted: List[RetentionRecord]):
+        """Take evicted records out of the derived indexes and delete orphaned blobs."""
+        unreferenced = self._index("retention").remove(evicted)
+        if self._blobs and unreferenced:
+            self._blobs.remove(unreferenced)
+        removed = [
+            {
+                "timestamp": record.timestamp,
+                "activity_type": record.activity_type,
+                "success": record.success,
+                "count": record.count,
+            }
+            for record in evicted
+        ]
+        for name, factory in self._index_factories.items():
+            index = self._indexes.get(name)
+            if index is None:
+                index = factory()
+                if not index.load():
+                    continue  # Built without the evicted records on first use
+            if name != "retention":
+                index.remove(removed)
+            index.save()
+
+    def _iter_long_term(
+        self,
+        activity_type: Optional[str] = None,
+        until: Optional[str] = None,
+        archive: bool = True,
+    ) -> Iterator[Tuple[Any, Dict[str, Any]]]:
+        """
+        (key, entry) for every long-term record, optionally of one type and
+        before `until`; keys are used by _evict(). `archive=False` leaves out
+        the records in the cold archive.
+        """
+        if self._store:
+            if self._archive and archive:
+                for seq, activity in self._archive.iter_records(
+                    activity_type, until=until
+                ):
+                    yield ("archive", seq, activity["timestamp"]), activity
+            for seq, activity in self._store.iter_records(
+                activity_type,
+                until=until,
+                max_seq=self._short_term_start_seq() - 1,
+            ):
+                yield ("db", seq), activity
+            return
+        types = (
+            list(self.long_term_memory) if activity_type is None else [activity_type]
+        )
+        for bucket_type in types:
+            for i, activity in enumerate(self.long_term_memory.get(bucket_type, [])):
+                if until is not None and activity["timestamp"] >= until:
+                    break  # Buckets are in time order
+                yield (bucket_type, i), activity
+
+    def _evict(self, keys: List[Tuple]):
+        """Delete the long-term records identified by _iter_long_term() keys."""
+        if self._store:
+            self._store.delete_seqs(key[1] for key in keys if key[0] == "db")
+            archived = [(key[1], key[2]) for key in keys if key[0] == "archive"]
+            if archived:
+                self._archive.remove(archived)
+            return
+
+        by_type: Dict[str, set] = {}
+        for activity_type, i in keys:
+            by_type.setdefault(activity_type, set()).add(i)
+        for activity_type, indexes in by_type.items():
+            bucket = self.long_term_memory[activity_type]
+            self.long_term_memory[activity_type] = [
+                activity for i, activity in enumerate(bucket) if i not in indexes
+            ]
+        self.compact()
+
+    def get_eviction_summaries(
+        self, activity_type: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Summaries of records removed by retention, oldest span first."""
+        return self._eviction_summaries.get(activity_type)
+
+    def export_records(
+        self,
+        since: Union[str, datetime, None] = None,
+        until: Union[str, datetime, None] = None,
+        activity_type: Union[str, Iterable[str], None] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Stream records in [since, until), optionally of the given types, oldest
+        first, with blob references resolved (see memory_ndjson). Records are
+        read through the backend's indexes one at a time, never all at once.
+        """
+        since, until = self._to_iso(since), self._to_iso(until)
+        for activity in self._query_candidates(
+            activity_type, None, since, until, newest_first=False
+        ):
+            yield self._resolve_entry(activity)
+
+    def import_records(
+        self, records: Iterable[Dict[str, Any]], batch_size: int = 1000
+    ) -> int:
+        """
+        Bulk-load records (e.g. from export_records on another machine or
+        backend), keeping their timestamps. The sqlite backends insert them in
+        transactions of `batch_size` records and renumber once at the end, so
+        sequence order stays time order; the json backend merges them into its
+        resident buckets and writes a single snapshot. Records are added as-is, so
+        importing the same export twice duplicates it. Raises ValueError for
+        a record without a valid timestamp or activity type; records before
+        it stay imported. Returns the number of imported records.
+        """
+        imported = 0
+
+        def prepared() -> Iterator[Dict[str, Any]]:
+            nonlocal imported
+            for entry in records:
+                yield self._import_entry(entry, imported + 1)
+                imported += 1
+
+        try:
+            if self._store:
+                first_seq = (self._archive.max_seq() if self._archive else 0) + 1
+                try:
+                    self._store.append_many(
+                        (
+                            (self._seq + i, entry)
+                            for i, entry in enumerate(prepared(), start=1)
+                        ),
+                        batch_size,
+                    )
+                finally:
+                    if imported:
+                        self._seq = self._store.resequence(first_seq)
+                        keep = max(len(self.short_term_memory), 50)
+                        start_seq = max(self._seq - keep + 1, first_seq)
+                        self._store.set_meta("short_term_start_seq", start_seq)
+                        self.short_term_memory = [
+                            MemoryRecord.from_dict(entry)
+                            for entry in self._store.query(
+                                min_seq=start_seq, newest_first=False
+                            )
+                        ]
+                        self._archive_cold_records()
+            else:
+                try:
+                    self._import_into_buckets(prepared())
+                finally:
+                    if imported:
+                        self._seq += imported
+                        self.compact()
+        finally:
+            if imported:
+                self._rebuild_recent_index()
+                self._drop_indexes()
+                self._summaries.clear()  # Cached windows may have gained records
+                logger.info(f"Imported {imported} memory records")
+        return imported
+
+    def _import_entry(self, entry: Dict[str, Any], position: int) -> Dict[str, Any]:
+        """Validate and normalize an imported record, moving large fields to blobs."""
+        try:
+            timestamp = self._to_iso(entry["timestamp"])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(
+                f"Record {position} has no valid timestamp: {entry.get('timestamp')!r}"
+            ) from None
+        activity_type = entry.get("activity_type")
+        if not isinstance(activity_type, str) or not activity_type:
+            raise ValueError(f"Record {position} has no activity_type")
+        memory_entry = {
+            "timestamp": timestamp,
+            "activity_type": activity_type,
+            "success": bool(entry.get("success", False)),
+            "error": entry.get("error"),
+            "data": entry.get("data"),
+            "metadata": entry.get("metadata") or {},
+            "duration": entry.get("duration"),
+        }
+        if entry.get("count", 1) > 1:
+            memory_entry["count"] = int(entry["count"])
+            memory_entry["last_seen"] = self._to_iso(
+                entry.get("last_seen") or timestamp
+            )
+        if self._blobs:
+            memory_entry["data"] = self._blobs.externalize(memory_entry["data"])
+            memory_entry["metadata"] = self._blobs.externalize(memory_entry["metadata"])
+        return memory_entry
+
+    def _import_into_buckets(self, entries: Iterable[Dict[str, Any]]):
+        """
+        Merge imported entries into the json backend's type buckets, then make
+        the newest records short-term again. Buckets are resident on this
+        backend anyway, so each is merged once, after the whole import.
+        """
+        by_timestamp = lambda x: x["timestamp"]  # noqa: E731
+        imported: Dict[str, List[MemoryRecord]] = {}
+
+        def merge(new_by_type: Dict[str, List[MemoryRecord]]):
+            for activity_type, new in new_by_type.items():
+                bucket = (
+                    self.long_term_memory[activity_type]
+                    if activity_type in self.long_term_memory
+                    else []
+                )
+                # Two sorted runs: timsort merges them in linear time
+                new.sort(key=by_timestamp)
+                self.long_term_memory[activity_type] = sorted(
+                    bucket + new, key=by_timestamp
+                )
+
+        try:
+            for entry in entries:
+                record = MemoryRecord.from_dict(entry)
+                imported.setdefault(record.activity_type, []).append(record)
+        finally:
+            # Short-term memory holds the newest records, imported or not
+            keep = max(len(self.short_term_memory), 50)
+            for record in self.short_term_memory:
+                imported.setdefault(record.activity_type, []).append(record)
+            merge(imported)
+            tails = [
+                self.long_term_memory[activity_type][-keep:]
+                for activity_type in self.long_term_memory
+            ]
+            newest = heapq.nlargest(
+                keep, (r for tail in tails for r in tail), key=by_timestamp
+            )
+            taken: Dict[str, int] = {}
+            for record in newest:
+                taken[record.activity_type] = taken.get(record.activity_type, 0) + 1
+            short_term = []
+            for activity_type, count in taken.items():
+                bucket = self.long_term_memory[activity_type]
+                short_term.extend(bucket[-count:])
+                self.long_term_memory[activity_type] = bucket[:-count]
+            self.short_term_memory = sorted(short_term, key=by_timestamp)
+
+    def persist(self):
+        """
+        Persist memory to storage.
+        In journal mode records are already on disk, so this only makes sure
+        pending journal writes are fsynced.
+        """
+        if self._store:
+            return  # Every store is its own committed transaction
+        try:
+            if self._journal:
+                self._journal.sync()
+            else:
+                self._write_snapshot()
         except Exception as e:
             logger.error(f"Failed to persist memory: {e}")
 
+    def snapshot_cursor(self) -> Optional[Dict[str, Any]]:
+        """
+        Cursor into memory.json as last loaded or written (json backend), for
+        a later Memory(cursor=...) to load it without a scan.
+        """
+        return None if self._store else self._cursor
+
+    def compact(self):
+        """Fold the journal into a fresh memory.json snapshot and empty it."""
+        try:
+            for index in self._indexes.values():
+                index.save()
+            if self._store:
+                self._store.checkpoint()
+                return
+            self._write_snapshot()
+            if self._journal:
+                self._journal.reset()
+        except Exception as e:
+            logger.error(f"Failed to compact memory: {e}")
+
+    def close(self):
+        """Compact and release the journal (or database) before shutdown."""
+        self.compact()
+        if self._journal:
+            self._journal.close()
+        if self._store:
+            self._store.close()
+        self._lock.release()
+
+    def _write_snapshot(self):
+        """Atomically rewrite memory.json with the full memory contents."""
+        # Written to a temporary file first, then renamed (atomic operation)
+        self._cursor = write_snapshot(
+            self.memory_file, self._seq, self.short_term_memory, self.long_term_memory
+        )
+
     def clear(self):
         """Clear all memory."""
         self.short_term_memory = []
-        self.long_term_memory = {}
-        self.persist()
+        self.long_term_memory = LazyLongTermMemory()
+        self._recent.clear()
+        # Derived indexes are rebuilt (empty) on next use
+        self._drop_indexes()
+        if self._store:
+            self._store.clear()
+        if self._archive:
+            self._archive.clear()
+        if self._blobs:
+            self._blobs.clear()
+        self._eviction_summaries.clear()
+        self._summaries.clear()
+        self.compact()
 
     def get_activity_count(self) -> int:
-        """Get total number of activities in memory."""
-        return len(self.short_term_memory) + sum(
-            len(activities) for activities in self.long_term_memory.values()
+        """
+        Get total number of activities in memory, counting every result
+        folded into a repeat run.
+        """
+        if self._store:
+            archived = self._archive.results() if self._archive else 0
+            return self._store.count_results() + archived
+        return sum(entry.get("count", 1) for entry in self.short_term_memory) + sum(
+            self.long_term_memory.bucket_results(activity_type)
+            for activity_type in self.long_term_memory
         )
 
     def get_last_activity_timestamp(self) -> str:
         """Get formatted timestamp of the last activity."""
-        if not self.short_term_memory:
+        if not self._recent:
             return "No activities recorded"
 
-        last_activity = max(self.short_term_memory, key=lambda x: x["timestamp"])
-        return self._format_timestamp(last_activity["timestamp"])
+        return self._recent[-1]["timestamp"]
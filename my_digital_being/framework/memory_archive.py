@@ -0,0 +1,300 @@
+"""Cold-tier storage for Memory: compressed, per-month archives of old records."""
+
+import gzip
+import io
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import zstandard
+
+logger = logging.getLogger(__name__)
+
+# Resolved archive directory -> lock shared by every MemoryArchive on it
+_dir_locks: Dict[Path, threading.RLock] = {}
+_dir_locks_guard = threading.Lock()
+
+
+def _dir_lock(archive_dir: Path) -> threading.RLock:
+    with _dir_locks_guard:
+        return _dir_locks.setdefault(archive_dir.resolve(), threading.RLock())
+
+
+class MemoryArchive:
+    """
+    Stores old memory records as compressed JSONL, one file per calendar month.
+
+    New months are zstd-compressed; months archived as gzip by older versions
+    stay gzip and remain readable and appendable. A small manifest keeps per-month record counts
+    by activity type, so counts and type/time lookups only ever decompress the
+    months that can actually contain matching records.
+
+    The manifest is reloaded whenever another instance on the same directory
+    has rewritten it, and every write reloads it first under a lock shared by
+    those instances, so a second archive never overwrites months it did not see.
+    """
+
+    def __init__(self, archive_dir: Path):
+        self.archive_dir = Path(archive_dir)
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        self.manifest_file = self.archive_dir / "manifest.json"
+        self.suffix = ".jsonl.zst"
+        self._lock = _dir_lock(self.archive_dir)
+        self._manifest_stamp: Optional[Tuple[int, int, int]] = None
+        self.manifest: Dict[str, Dict[str, Any]] = self._load_manifest()
+
+    def _stat_manifest(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            st = os.stat(self.manifest_file)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _load_manifest(self) -> Dict[str, Dict[str, Any]]:
+        self._manifest_stamp = self._stat_manifest()
+        try:
+            if self.manifest_file.exists():
+                with open(self.manifest_file, "r") as f:
+                    return json.load(f)
+        except Exception as e:
+            logger.error(f"Failed to load archive manifest: {e}")
+        return {}
+
+    def _refresh(self):
+        """Reload the manifest if it changed on disk since we last read or wrote it."""
+        if self._stat_manifest() != self._manifest_stamp:
+            self.manifest = self._load_manifest()
+
+    def _save_manifest(self):
+        temp_file = self.manifest_file.with_suffix(".json.tmp")
+        with open(temp_file, "w") as f:
+            json.dump(self.manifest, f, indent=2)
+        temp_file.replace(self.manifest_file)
+        self._manifest_stamp = self._stat_manifest()
+
+    @staticmethod
+    def _append_compressed(path: Path, data: bytes):
+        """Append `data` to `path` as a new zstd frame or gzip member."""
+        if path.name.endswith(".zst"):
+            with open(path, "ab") as f:
+                f.write(zstandard.ZstdCompressor().compress(data))
+        else:
+            with gzip.open(path, "ab") as f:
+                f.write(data)
+
+    @staticmethod
+    def _read_lines(path: Path) -> Iterator[bytes]:
+        """Iterate over the decompressed lines of an archive file."""
+        if path.name.endswith(".zst"):
+            with open(path, "rb") as raw:
+                reader = zstandard.ZstdDecompressor().stream_reader(
+                    raw, read_across_frames=True
+                )
+                yield from io.BufferedReader(reader)
+        else:
+            with gzip.open(path, "rb") as f:
+                yield from f
+
+    def add(self, records: Iterable[Tuple[int, Dict[str, Any]]]) -> int:
+        """
+        Append (seq, entry) pairs, in sequence order, to their month's archive
+        file. Appends add a new compressed frame/member, so existing data is
+        never rewritten, and records at or below a month's max_seq are skipped
+        so re-archiving after a crash is idempotent.
+        """
+        with self._lock:
+            self._refresh()
+            by_month: Dict[str, List[Tuple[int, Dict[str, Any]]]] = {}
+            for seq, entry in records:
+                month = entry["timestamp"][:7]
+                if seq <= self.manifest.get(month, {}).get("max_seq", 0):
+                    continue  # Already archived by an interrupted earlier run
+                by_month.setdefault(month, []).append((seq, entry))
+
+            for month, month_records in by_month.items():
+                info = self.manifest.setdefault(
+                    month,
+                    {
+                        "file": f"{month}{self.suffix}",
+                        "count": 0,
+                        "results": 0,
+                        "types": {},
+                        "max_seq": 0,
+                    },
+                )
+                lines = "".join(
+                    json.dumps({"seq": seq, "record": entry}, separators=(",", ":"))
+                    + "\n"
+                    for seq, entry in month_records
+                )
+                self._append_compressed(
+                    self.archive_dir / info["file"], lines.encode("utf-8")
+                )
+
+                info["count"] += len(month_records)
+                info["results"] = info.get(
+                    "results", info["count"] - len(month_records)
+                )
+                for _, entry in month_records:
+                    info["results"] += entry.get("count", 1)
+                    activity_type = entry["activity_type"]
+                    info["types"][activity_type] = (
+                        info["types"].get(activity_type, 0) + 1
+                    )
+                info["max_seq"] = max(info["max_seq"], month_records[-1][0])
+
+            if by_month:
+                self._save_manifest()
+            return sum(len(month_records) for month_records in by_month.values())
+
+    def _months(
+        self,
+        types: Optional[set],
+        since: Optional[str],
+        until: Optional[str],
+        newest_first: bool,
+    ) -> List[str]:
+        """Months whose manifest says they may hold matching records."""
+        self._refresh()
+        months = []
+        for month, info in self.manifest.items():
+            if since is not None and month < since[:7]:
+                continue
+            if until is not None and month > until[:7]:
+                continue
+            if types is not None and not types.intersection(info["types"]):
+                continue
+            months.append(month)
+        return sorted(months, reverse=newest_first)
+
+    def iter_records(
+        self,
+        activity_type: Union[str, Iterable[str], None] = None,
+        success: Optional[bool] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        newest_first: bool = False,
+        before: Optional[Tuple[str, int]] = None,
+    ) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Stream archived (seq, entry) pairs matching the filters. Only one month
+        is decompressed at a time; months are visited in time order.
+        `before` keeps only records ordered before a (timestamp, seq) key.
+        """
+        types = None
+        if activity_type is not None:
+            types = (
+                {activity_type}
+                if isinstance(activity_type, str)
+                else set(activity_type)
+            )
+
+        months = self._months(types, since, until, newest_first)
+        if before is not None:
+            months = [month for month in months if month <= before[0][:7]]
+        for month in months:
+            month_records = []
+            for raw_line in self._read_lines(
+                self.archive_dir / self.manifest[month]["file"]
+            ):
+                line = json.loads(raw_line)
+                entry = line["record"]
+                if types is not None and entry["activity_type"] not in types:
+                    continue
+                if success is not None and bool(entry["success"]) != success:
+                    continue
+                if since is not None and entry["timestamp"] < since:
+                    continue
+                if until is not None and entry["timestamp"] >= until:
+                    continue
+                if before is not None and (entry["timestamp"], line["seq"]) >= before:
+                    continue
+                month_records.append((line["seq"], entry))
+            # Imports can append older records to a month after newer ones
+            month_records.sort(key=lambda r: (r[1]["timestamp"], r[0]))
+            if newest_first:
+                month_records.reverse()
+            yield from month_records
+
+    def remove(self, records: Iterable[Tuple[int, str]]) -> int:
+        """
+        Remove archived records given as (seq, timestamp) pairs. Each affected
+        month is decompressed once and rewritten without them; its manifest
+        entry (and max_seq) is kept even if the month ends up empty.
+        """
+        with self._lock:
+            self._refresh()
+            by_month: Dict[str, set] = {}
+            for seq, timestamp in records:
+                by_month.setdefault(timestamp[:7], set()).add(seq)
+
+            removed = 0
+            for month, seqs in by_month.items():
+                info = self.manifest.get(month)
+                if not info:
+                    continue
+                path = self.archive_dir / info["file"]
+                kept = []
+                for raw_line in self._read_lines(path):
+                    line = json.loads(raw_line)
+                    if line["seq"] not in seqs:
+                        kept.append(raw_line)
+                        continue
+                    activity_type = line["record"]["activity_type"]
+                    info["types"][activity_type] -= 1
+                    if not info["types"][activity_type]:
+                        del info["types"][activity_type]
+                    info["count"] -= 1
+                    info["results"] = info.get("results", info["count"] + 1) - line[
+                        "record"
+                    ].get("count", 1)
+                    removed += 1
+
+                temp_file = path.with_name(path.name + ".tmp")
+                data = b"".join(kept)
+                if path.name.endswith(".zst"):
+                    compressed = zstandard.ZstdCompressor().compress(data)
+                else:
+                    compressed = gzip.compress(data)
+                with open(temp_file, "wb") as f:
+                    f.write(compressed)
+                temp_file.replace(path)
+
+            if by_month:
+                self._save_manifest()
+            return removed
+
+    def count(self, activity_type: Optional[str] = None) -> int:
+        """Number of archived records, optionally for a single activity type."""
+        self._refresh()
+        if activity_type is None:
+            return sum(info["count"] for info in self.manifest.values())
+        return sum(
+            info["types"].get(activity_type, 0) for info in self.manifest.values()
+        )
+
+    def results(self) -> int:
+        """
+        Number of archived results: repeat runs count every result folded
+        into them (manifests from before runs count records).
+        """
+        self._refresh()
+        return sum(
+            info.get("results", info["count"]) for info in self.manifest.values()
+        )
+
+    def max_seq(self) -> int:
+        """Highest archived sequence number, or 0 if the archive is empty."""
+        self._refresh()
+        return max((info["max_seq"] for info in self.manifest.values()), default=0)
+
+    def clear(self):
+        with self._lock:
+            self._refresh()
+            for info in self.manifest.values():
+                (self.archive_dir / info["file"]).unlink(missing_ok=True)
+            self.manifest = {}
+            self._save_manifest()
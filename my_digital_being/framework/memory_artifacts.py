@@ -0,0 +1,252 @@
+"""
+Typed index of the artifacts activities produce: generated images, posted
+tweets, analyzed commits and generated activity files.
+
+Artifacts are taken from the data of every stored record, by path:
+
+    image           data.image_data.url, data.image_data.path, data.image_url,
+                    data.image_path
+    tweet           data.tweet_id
+    commit          data.commits_analyzed, data.commit_sha
+    activity_file   data.filename (BuildOrUpdateActivity only)
+
+and a record marks artifacts as used through data.media_urls (images posted
+with a tweet). Activities can also declare them explicitly in metadata:
+
+    "artifacts": {"image": ["https://..."]}, "artifacts_used": {"image": [...]}
+
+Artifacts of a kind are kept in insertion (time) order, so membership tests
+are O(1) and "the newest k images not yet used" is O(k).
+"""
+
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .memory_query import _MISSING, get_path
+
+logger = logging.getLogger(__name__)
+
+KINDS = ("image", "tweet", "commit", "activity_file")
+
+# kind -> data paths holding one artifact value or a list of them
+ARTIFACT_PATHS: Dict[str, Tuple[str, ...]] = {
+    "image": (
+        "image_data.url",
+        "image_data.path",
+        "image_url",
+        "image_path",
+    ),
+    "tweet": ("tweet_id",),
+    "commit": ("commits_analyzed", "commit_sha"),
+}
+# Paths whose meaning depends on the activity that returned them
+TYPE_ARTIFACT_PATHS: Dict[str, Dict[str, Tuple[str, ...]]] = {
+    "BuildOrUpdateActivity": {"activity_file": ("filename",)},
+}
+# kind -> data paths listing artifacts the record used
+USE_PATHS: Dict[str, Tuple[str, ...]] = {"image": ("media_urls",)}
+
+
+def _values(entry: Dict[str, Any], paths: Iterable[str]) -> List[str]:
+    values = []
+    for path in paths:
+        value = get_path(entry.get("data"), path)
+        if value is _MISSING or value is None:
+            continue
+        for item in value if isinstance(value, list) else [value]:
+            if item is not None and item != "" and not isinstance(item, (dict, list)):
+                values.append(str(item))
+    return values
+
+
+def extract_artifacts(
+    entry: Dict[str, Any],
+) -> Tuple[List[Tuple[str, str]], List[Tuple[str, str]]]:
+    """(produced, used) lists of (kind, value) for a resolved record."""
+    produced: List[Tuple[str, str]] = []
+    used: List[Tuple[str, str]] = []
+    if not entry.get("success"):
+        return produced, used
+
+    paths = dict(ARTIFACT_PATHS)
+    for kind, type_paths in TYPE_ARTIFACT_PATHS.get(
+        entry.get("activity_type"), {}
+    ).items():
+        paths[kind] = paths.get(kind, ()) + type_paths
+    for kind, kind_paths in paths.items():
+        produced.extend((kind, value) for value in _values(entry, kind_paths))
+    for kind, kind_paths in USE_PATHS.items():
+        used.extend((kind, value) for value in _values(entry, kind_paths))
+
+    metadata = entry.get("metadata")
+    if isinstance(metadata, dict):
+        for key, target in (("artifacts", produced), ("artifacts_used", used)):
+            declared = metadata.get(key)
+            if not isinstance(declared, dict):
+                continue
+            for kind, values in declared.items():
+                if kind not in KINDS:
+                    logger.warning(f"Ignoring artifact of unknown kind '{kind}'")
+                    continue
+                for value in values if isinstance(values, list) else [values]:
+                    if value is not None and value != "":
+                        target.append((kind, str(value)))
+    return produced, used
+
+
+class ArtifactIndex:
+    """
+    Artifacts by kind and value, with what used them. Has the same lifecycle
+    as the other derived memory indexes (load/add/rebuild/save, persisted
+    with the memory sequence number it covers).
+    """
+
+    def __init__(self, index_file: Path):
+        self.index_file = Path(index_file)
+        # kind -> value -> {"timestamp", "activity_type", "used_by"}
+        self.artifacts: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        # kind -> values that nothing has used yet, in insertion order
+        self.unused: Dict[str, Dict[str, None]] = {}
+        # Uses seen before the artifact itself: kind -> value -> used_by
+        self.pending_uses: Dict[str, Dict[str, List[List[str]]]] = {}
+        self.indexed_seq = 0  # Memory sequence number covered by the index
+        self.last_timestamp: Optional[str] = None
+
+    def load(self) -> bool:
+        """Load the persisted index. Returns False if it is missing or unreadable."""
+        try:
+            if not self.index_file.exists():
+                return False
+            with open(self.index_file, "r") as f:
+                state = json.load(f)
+            self.artifacts = state["artifacts"]
+            self.pending_uses = state["pending_uses"]
+            self.indexed_seq = state["indexed_seq"]
+            self.last_timestamp = state["last_timestamp"]
+            self.unused = {
+                kind: {
+                    value: None
+                    for value, artifact in by_value.items()
+                    if not artifact["used_by"]
+                }
+                for kind, by_value in self.artifacts.items()
+            }
+            return True
+        except Exception as e:
+            logger.error(f"Failed to load artifact index, it will be rebuilt: {e}")
+            self.clear()
+            return False
+
+    def save(self):
+        """Atomically persist the index."""
+        state = {
+            "artifacts": self.artifacts,
+            "pending_uses": self.pending_uses,
+            "indexed_seq": self.indexed_seq,
+            "last_timestamp": self.last_timestamp,
+        }
+        temp_file = self.index_file.with_suffix(".tmp")
+        with open(temp_file, "w") as f:
+            json.dump(state, f, separators=(",", ":"))
+        temp_file.replace(self.index_file)
+
+    def clear(self):
+        self.artifacts = {}
+        self.unused = {}
+        self.pending_uses = {}
+        self.indexed_seq = 0
+        self.last_timestamp = None
+
+    def delete(self):
+        """Clear the index and remove its file."""
+        self.clear()
+        self.index_file.unlink(missing_ok=True)
+
+    def add(self, entry: Dict[str, Any]):
+        """Index the artifacts of a single record."""
+        self.last_timestamp = entry["timestamp"]
+        produced, used = extract_artifacts(entry)
+        if not produced and not used:
+            return
+        for kind, value in produced:
+            by_value = self.artifacts.setdefault(kind, {})
+            if value in by_value:
+                continue  # Keep the first producer
+            by_value[value] = {
+                "timestamp": entry["timestamp"],
+                "activity_type": entry["activity_type"],
+                "used_by": self.pending_uses.get(kind, {}).pop(value, []),
+            }
+            if not by_value[value]["used_by"]:
+                self.unused.setdefault(kind, {})[value] = None
+
+        # Uses are attributed to the record's first own artifact that it did
+        # not also use (its tweet rather than the image it generated for it)
+        user = next(
+            (list(artifact) for artifact in produced if artifact not in used),
+            ["record", entry["timestamp"]],
+        )
+        for kind, value in used:
+            artifact = self.artifacts.get(kind, {}).get(value)
+            if artifact is None:
+                self.pending_uses.setdefault(kind, {}).setdefault(value, []).append(
+                    user
+                )
+                continue
+            artifact["used_by"].append(user)
+            self.unused.get(kind, {}).pop(value, None)
+
+    def remove(self, entries: Iterable[Dict[str, Any]]):
+        """
+        Forget the artifacts that removed records produced. Their uses of
+        other artifacts stay recorded, so an image whose tweet was evicted
+        is still not offered as unused.
+        """
+        removed = {(entry["timestamp"], entry["activity_type"]) for entry in entries}
+        for kind, by_value in self.artifacts.items():
+            for value in [
+                value
+                for value, artifact in by_value.items()
+                if (artifact["timestamp"], artifact["activity_type"]) in removed
+            ]:
+                del by_value[value]
+                self.unused.get(kind, {}).pop(value, None)
+
+    def rebuild(self, entries: Iterable[Dict[str, Any]], indexed_seq: int):
+        """Re-index every record from scratch."""
+        self.clear()
+        for entry in entries:
+            self.add(entry)
+        self.indexed_seq = indexed_seq
+        count = sum(len(by_value) for by_value in self.artifacts.values())
+        logger.info(f"Rebuilt memory artifact index with {count} artifacts")
+
+    def contains(self, kind: str, value: Any) -> bool:
+        return str(value) in self.artifacts.get(kind, {})
+
+    def get(self, kind: str, value: Any) -> Optional[Dict[str, Any]]:
+        artifact = self.artifacts.get(kind, {}).get(str(value))
+        if artifact is None:
+            return None
+        return {"kind": kind, "value": str(value), **artifact}
+
+    def values(
+        self,
+        kind: str,
+        unused: bool = False,
+        limit: Optional[int] = None,
+        newest_first: bool = True,
+    ) -> List[str]:
+        """Values of a kind (only never-used ones with `unused`), up to `limit`."""
+        source = (self.unused if unused else self.artifacts).get(kind, {})
+        ordered: Iterator[str] = reversed(source) if newest_first else iter(source)
+        if limit is None:
+            return list(ordered)
+        values = []
+        for value in ordered:
+            if len(values) >= limit:
+                break
+            values.append(value)
+        return values
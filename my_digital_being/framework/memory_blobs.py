@@ -0,0 +1,160 @@
+"""
+Content-addressed storage for large memory payloads.
+
+A reference only ever stands for a whole data/metadata payload or one of its
+top-level fields, so only those positions are resolved. User values there
+that look like a reference are stored as blobs themselves (see externalize),
+which keeps every reference a record holds a real one.
+"""
+
+import copy
+import hashlib
+import json
+import logging
+import shutil
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterable, Set
+
+logger = logging.getLogger(__name__)
+
+BLOB_KEY = "$blob"
+
+
+def is_blob_ref(value: Any) -> bool:
+    """True for the {"$blob": <sha256>, "bytes": <size>} placeholders in records."""
+    return (
+        isinstance(value, dict)
+        and len(value) == 2
+        and isinstance(value.get(BLOB_KEY), str)
+        and isinstance(value.get("bytes"), int)
+    )
+
+
+def _is_digest(digest: str) -> bool:
+    return len(digest) == 64 and all(c in "0123456789abcdef" for c in digest)
+
+
+class BlobStore:
+    """
+    Stores JSON values under blobs/<aa>/<sha256>, keyed by the SHA-256 of their
+    canonical encoding, so identical payloads are written once. Records keep a
+    small reference instead of the payload; resolved blobs are kept in a
+    small LRU cache.
+    """
+
+    def __init__(self, blob_dir: Path, threshold: int = 4096, cache_size: int = 128):
+        """
+        :param blob_dir: Directory holding the blobs.
+        :param threshold: Encoded size in bytes above which a field is moved
+            into the store.
+        :param cache_size: Number of resolved blobs kept in memory.
+        """
+        self.blob_dir = Path(blob_dir)
+        self.threshold = threshold
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, Any]" = OrderedDict()
+
+    def _path(self, digest: str) -> Path:
+        return self.blob_dir / digest[:2] / digest
+
+    def put(self, value: Any) -> Dict[str, Any]:
+        """Store a value (once per distinct content) and return its reference."""
+        encoded = json.dumps(value, sort_keys=True, separators=(",", ":")).encode(
+            "utf-8"
+        )
+        digest = hashlib.sha256(encoded).hexdigest()
+        path = self._path(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temp_file = path.with_suffix(".tmp")
+            with open(temp_file, "wb") as f:
+                f.write(encoded)
+            temp_file.replace(path)
+        return {BLOB_KEY: digest, "bytes": len(encoded)}
+
+    def get(self, digest: str) -> Any:
+        """
+        Load a blob by its SHA-256 hex digest. Returns a copy, so callers may
+        change it without affecting the cached value.
+        """
+        if digest in self._cache:
+            self._cache.move_to_end(digest)
+            return copy.deepcopy(self._cache[digest])
+        if not _is_digest(digest):
+            raise ValueError(f"Invalid blob digest: {digest!r}")
+        with open(self._path(digest), "rb") as f:
+            value = json.loads(f.read())
+        self._cache[digest] = value
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return copy.deepcopy(value)
+
+    def externalize(self, payload: Any) -> Any:
+        """
+        Replace oversized parts of a data/metadata payload with references:
+        each top-level field of a dict, or the whole payload otherwise. Values
+        shaped like a reference are always stored, so they cannot be mistaken
+        for one.
+        """
+        if is_blob_ref(payload):
+            return self.put(payload)
+        if isinstance(payload, dict):
+            externalized = {}
+            for key, value in payload.items():
+                externalized[key] = value
+                if is_blob_ref(value) or (
+                    isinstance(value, (dict, list, str)) and self._is_large(value)
+                ):
+                    externalized[key] = self.put(value)
+            return externalized
+        if isinstance(payload, (list, str)) and self._is_large(payload):
+            return self.put(payload)
+        return payload
+
+    def _is_large(self, value: Any) -> bool:
+        # json.dumps escapes a character to at most 12 bytes (an astral one
+        # becomes a \uXXXX\uXXXX surrogate pair), plus 2 for the quotes
+        if isinstance(value, str) and len(value) * 12 + 2 <= self.threshold:
+            return False  # Can't exceed the threshold even fully escaped
+        return len(json.dumps(value, separators=(",", ":"))) > self.threshold
+
+    def resolve(self, payload: Any) -> Any:
+        """Inverse of externalize(): load the blobs a payload references."""
+        if is_blob_ref(payload):
+            return self.get(payload[BLOB_KEY])
+        if isinstance(payload, dict) and any(
+            is_blob_ref(value) for value in payload.values()
+        ):
+            return {
+                key: self.get(value[BLOB_KEY]) if is_blob_ref(value) else value
+                for key, value in payload.items()
+            }
+        return payload
+
+    def collect(self, live: Set[str]) -> int:
+        """Delete blobs whose digest is not in `live`; returns how many."""
+        removed = 0
+        for path in self.blob_dir.glob("*/*"):
+            if path.name not in live:
+                path.unlink(missing_ok=True)
+                self._cache.pop(path.name, None)
+                removed += 1
+        return removed
+
+    def remove(self, digests: Iterable[str]) -> int:
+        """Delete the given blobs; returns how many existed."""
+        removed = 0
+        for digest in digests:
+            if not _is_digest(digest):
+                continue
+            path = self._path(digest)
+            if path.exists():
+                path.unlink()
+                removed += 1
+            self._cache.pop(digest, None)
+        return removed
+
+    def clear(self):
+        self._cache.clear()
+        shutil.rmtree(self.blob_dir, ignore_errors=True)
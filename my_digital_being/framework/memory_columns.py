@@ -0,0 +1,408 @@
+"""
+Columnar side store of memory records for fast aggregate statistics.
+
+Every record contributes one row (a repeat run one per result, all at the
+run's start and with the run's mean duration) to four fixed-width columns, each kept in its own file under
+memory.columns/:
+
+    timestamp.i64   epoch seconds (int64)
+    type.i32        interned activity type id (int32, names in meta.json)
+    success.u8      1 for success, 0 for failure
+    duration.f64    seconds the activity ran, NaN when unknown
+
+Saved rows are memory-mapped, new rows are buffered in `array`s until the
+next save. Aggregations run vectorized over the columns with NumPy. Rows of
+removed records are deleted by rewriting the column files.
+"""
+
+import json
+import logging
+import math
+import mmap
+from array import array
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# name -> array typecode
+COLUMNS = {"timestamp": "q", "type": "i", "success": "B", "duration": "d"}
+_SUFFIXES = {"q": "i64", "i": "i32", "B": "u8", "d": "f64"}
+BUCKET_SECONDS = {"hour": 3600, "day": 86400, "week": 7 * 86400}
+_WEEK_OFFSET = 4 * 86400  # The epoch was a Thursday; weeks start on Monday
+GROUP_KEYS = ("activity_type", "time", "success")
+
+
+def to_epoch(timestamp: str) -> int:
+    """ISO timestamp (naive = local time) to epoch seconds."""
+    return int(datetime.fromisoformat(timestamp.replace("Z", "+00:00")).timestamp())
+
+
+class MemoryColumnStore:
+    """Append-only columns (timestamp, type, success, duration) of all records."""
+
+    def __init__(self, column_dir: Path, flush_rows: int = 1000):
+        """
+        :param column_dir: Directory holding one file per column plus meta.json.
+        :param flush_rows: Buffered rows after which add() appends them to disk.
+        """
+        self.column_dir = Path(column_dir)
+        self.meta_file = self.column_dir / "meta.json"
+        self.flush_rows = flush_rows
+
+        self.types: List[str] = []  # type id -> activity type
+        self._type_ids: Dict[str, int] = {}
+        self.indexed_seq = 0  # Memory sequence number covered by the store
+        self.last_timestamp: Optional[str] = None
+        self._saved_rows = 0
+        self._mapped: Dict[str, Any] = {}  # column -> memoryview over the file
+        self._maps: List[mmap.mmap] = []  # Open mappings behind _mapped
+        self._pending: Dict[str, array] = self._empty_columns()
+
+    @staticmethod
+    def _empty_columns() -> Dict[str, array]:
+        return {name: array(typecode) for name, typecode in COLUMNS.items()}
+
+    def _column_file(self, name: str) -> Path:
+        return self.column_dir / f"{name}.{_SUFFIXES[COLUMNS[name]]}"
+
+    def __len__(self) -> int:
+        return self._saved_rows + len(self._pending["timestamp"])
+
+    def load(self) -> bool:
+        """Load the persisted store. Returns False if it is missing or unreadable."""
+        try:
+            if not self.meta_file.exists():
+                return False
+            with open(self.meta_file, "r") as f:
+                meta = json.load(f)
+            self.types = meta["types"]
+            self._type_ids = {name: i for i, name in enumerate(self.types)}
+            self.indexed_seq = meta["indexed_seq"]
+            self.last_timestamp = meta["last_timestamp"]
+            self._saved_rows = meta["rows"]
+            self._map_columns()
+            return True
+        except Exception as e:
+            logger.error(f"Failed to load memory columns, they will be rebuilt: {e}")
+            self.clear()
+            return False
+
+    def _map_columns(self):
+        """Memory-map the saved rows of every column."""
+        self._unmap()
+        if not self._saved_rows:
+            return
+        for name, typecode in COLUMNS.items():
+            with open(self._column_file(name), "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps.append(mapped)
+            # Rows past the recorded count are a torn append and are ignored
+            size = self._saved_rows * array(typecode).itemsize
+            self._mapped[name] = memoryview(mapped)[:size].cast(typecode)
+
+    def _unmap(self):
+        """Release the column views and close their mappings."""
+        try:
+            for view in self._mapped.values():
+                view.release()
+            for mapped in self._maps:
+                mapped.close()
+        except BufferError:
+            pass  # Still exported (e.g. a live NumPy view); closed on collection
+        self._mapped = {}
+        self._maps = []
+
+    def save(self):
+        """Append buffered rows to the column files and rewrite meta.json."""
+        self.column_dir.mkdir(parents=True, exist_ok=True)
+        pending_rows = len(self._pending["timestamp"])
+        if pending_rows:
+            for name, column in self._pending.items():
+                path = self._column_file(name)
+                with open(path, "r+b" if path.exists() else "wb") as f:
+                    f.seek(self._saved_rows * column.itemsize)
+                    f.write(column.tobytes())
+                    f.truncate()
+            self._saved_rows += pending_rows
+            self._pending = self._empty_columns()
+            self._map_columns()
+
+        meta = {
+            "rows": self._saved_rows,
+            "types": self.types,
+            "indexed_seq": self.indexed_seq,
+            "last_timestamp": self.last_timestamp,
+        }
+        temp_file = self.meta_file.with_suffix(".json.tmp")
+        with open(temp_file, "w") as f:
+            json.dump(meta, f)
+        temp_file.replace(self.meta_file)
+
+    def clear(self):
+        self.types = []
+        self._type_ids = {}
+        self.indexed_seq = 0
+        self.last_timestamp = None
+        self._saved_rows = 0
+        self._unmap()
+        self._pending = self._empty_columns()
+
+    def delete(self):
+        """Clear the store and remove its files."""
+        self.clear()
+        for name in COLUMNS:
+            self._column_file(name).unlink(missing_ok=True)
+        self.meta_file.unlink(missing_ok=True)
+
+    def _type_id(self, activity_type: str) -> int:
+        type_id = self._type_ids.get(activity_type)
+        if type_id is None:
+            type_id = self._type_ids[activity_type] = len(self.types)
+            self.types.append(activity_type)
+        return type_id
+
+    def add(self, entry: Dict[str, Any]):
+        """
+        Append one record's row, or one per result for a repeat run. Memory
+        adds each further result of a live run as a single row at the run's
+        start, so the rows match what a rebuild derives from the run record.
+        """
+        duration = entry.get("duration")
+        rows = entry.get("count", 1)
+        self._pending["timestamp"].extend([to_epoch(entry["timestamp"])] * rows)
+        self._pending["type"].extend([self._type_id(entry["activity_type"])] * rows)
+        self._pending["success"].extend([1 if entry.get("success") else 0] * rows)
+        self._pending["duration"].extend(
+            [math.nan if duration is None else duration] * rows
+        )
+        self.last_timestamp = entry["timestamp"]
+        if len(self._pending["timestamp"]) >= self.flush_rows:
+            self.save()
+
+    def remove(self, entries: Iterable[Dict[str, Any]]):
+        """
+        Delete the rows of removed records, matched by start second, type and
+        success (one row per result of a repeat run).
+        """
+        wanted: Dict[tuple, int] = {}
+        for entry in entries:
+            type_id = self._type_ids.get(entry["activity_type"])
+            if type_id is None:
+                continue
+            key = (
+                to_epoch(entry["timestamp"]),
+                type_id,
+                1 if entry.get("success") else 0,
+            )
+            wanted[key] = wanted.get(key, 0) + entry.get("count", 1)
+        if not wanted:
+            return
+
+        columns = self._columns_numpy()
+        keep = np.ones(len(columns["timestamp"]), dtype=bool)
+        timestamps = {key[0] for key in wanted}
+        for row in np.flatnonzero(np.isin(columns["timestamp"], list(timestamps))):
+            key = (
+                int(columns["timestamp"][row]),
+                int(columns["type"][row]),
+                int(columns["success"][row]),
+            )
+            if wanted.get(key):
+                wanted[key] -= 1
+                keep[row] = False
+        if keep.all():
+            return
+
+        self._unmap()
+        self.column_dir.mkdir(parents=True, exist_ok=True)
+        for name, column in columns.items():
+            path = self._column_file(name)
+            temp_file = path.with_name(path.name + ".tmp")
+            column[keep].tofile(temp_file)
+            temp_file.replace(path)
+        self._saved_rows = int(keep.sum())
+        self._pending = self._empty_columns()
+        self._map_columns()
+
+    def rebuild(self, entries: Iterable[Dict[str, Any]], indexed_seq: int):
+        """Re-derive every column from scratch."""
+        self.delete()
+        for entry in entries:
+            self.add(entry)
+        self.indexed_seq = indexed_seq
+        logger.info(f"Rebuilt memory columns over {len(self)} records")
+
+    def aggregate(
+        self,
+        group_by: Iterable[str] = ("activity_type",),
+        bucket: Union[str, int] = "day",
+        since: Optional[int] = None,
+        until: Optional[int] = None,
+        activity_type: Union[str, Iterable[str], None] = None,
+        success: Optional[bool] = None,
+        utc_offset: int = 0,
+    ) -> List[Dict[str, Any]]:
+        """
+        Group rows by any of "activity_type", "time" and "success" and return
+        one dict per group with count, success_count, success_rate and
+        avg_duration, ordered by the group keys.
+
+        :param bucket: Time bucket for the "time" key: "hour", "day", "week"
+            (Monday-based), "month", or a width in seconds. Buckets are
+            reported as the epoch second they start at.
+        :param utc_offset: Seconds east of UTC that bucket boundaries are
+            aligned to (e.g. local midnight instead of UTC midnight).
+        :param since: Only rows at or after this epoch second.
+        :param until: Only rows before this epoch second.
+        """
+        group_by = tuple(group_by)
+        unknown = set(group_by) - set(GROUP_KEYS)
+        if unknown:
+            raise ValueError(f"Unknown group_by keys: {sorted(unknown)}")
+        if bucket != "month" and not isinstance(bucket, int):
+            if bucket not in BUCKET_SECONDS:
+                raise ValueError(f"Unknown time bucket: {bucket}")
+
+        type_ids = None
+        if activity_type is not None:
+            names = [activity_type] if isinstance(activity_type, str) else activity_type
+            type_ids = {self._type_ids[n] for n in names if n in self._type_ids}
+            if not type_ids:
+                return []
+
+        groups = self._aggregate_numpy(
+            group_by, bucket, since, until, type_ids, success, utc_offset
+        )
+
+        results = []
+        for key in sorted(groups):
+            count, successes, duration_total, duration_count = groups[key]
+            row = dict(zip(group_by, key))
+            if "activity_type" in row:
+                row["activity_type"] = self.types[row["activity_type"]]
+            if "success" in row:
+                row["success"] = bool(row["success"])
+            row.update(
+                {
+                    "count": count,
+                    "success_count": successes,
+                    "success_rate": successes / count if count else 0.0,
+                    "avg_duration": (
+                        duration_total / duration_count if duration_count else None
+                    ),
+                }
+            )
+            results.append(row)
+        return results
+
+    def _columns_numpy(self) -> Dict[str, Any]:
+        """Whole columns as NumPy arrays (mapped rows plus buffered rows)."""
+        columns = {}
+        for name, typecode in COLUMNS.items():
+            parts = [np.frombuffer(self._pending[name], dtype=typecode)]
+            if name in self._mapped:
+                parts.insert(0, np.frombuffer(self._mapped[name], dtype=typecode))
+            columns[name] = np.concatenate(parts)
+        return columns
+
+    def _aggregate_numpy(
+        self, group_by, bucket, since, until, type_ids, success, utc_offset
+    ):
+        columns = self._columns_numpy()
+        timestamps = columns["timestamp"]
+        mask = np.ones(len(timestamps), dtype=bool)
+        if since is not None:
+            mask &= timestamps >= since
+        if until is not None:
+            mask &= timestamps < until
+        if type_ids is not None:
+            mask &= np.isin(columns["type"], list(type_ids))
+        if success is not None:
+            mask &= columns["success"] == (1 if success else 0)
+
+        keys = []
+        for name in group_by:
+            if name == "activity_type":
+                keys.append(columns["type"][mask].astype(np.int64))
+            elif name == "success":
+                keys.append(columns["success"][mask].astype(np.int64))
+            else:
+                keys.append(_bucket_starts_numpy(timestamps[mask], bucket, utc_offset))
+        successes = columns["success"][mask].astype(np.float64)
+        durations = columns["duration"][mask]
+        known = ~np.isnan(durations)
+
+        if not len(durations):
+            return {}
+        if not keys:
+            return {
+                (): (
+                    len(durations),
+                    int(successes.sum()),
+                    float(durations[known].sum()),
+                    int(known.sum()),
+                )
+            }
+
+        unique, inverse = np.unique(np.stack(keys, axis=1), axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        size = len(unique)
+        counts = np.bincount(inverse, minlength=size)
+        success_counts = np.bincount(inverse, weights=successes, minlength=size)
+        duration_totals = np.bincount(
+            inverse[known], weights=durations[known], minlength=size
+        )
+        duration_counts = np.bincount(inverse[known], minlength=size)
+        return {
+            tuple(int(v) for v in unique[i]): (
+                int(counts[i]),
+                int(success_counts[i]),
+                float(duration_totals[i]),
+                int(duration_counts[i]),
+            )
+            for i in range(size)
+        }
+
+
+def _bucket_start(timestamp: int, bucket: Union[str, int], utc_offset: int = 0) -> int:
+    """Epoch second at which the bucket holding `timestamp` starts."""
+    local = timestamp + utc_offset
+    if bucket == "month":
+        dt = datetime.fromtimestamp(local, timezone.utc)
+        start = int(datetime(dt.year, dt.month, 1, tzinfo=timezone.utc).timestamp())
+    else:
+        width = BUCKET_SECONDS.get(bucket, bucket)
+        offset = _WEEK_OFFSET if bucket == "week" else 0
+        start = (local - offset) // width * width + offset
+    return start - utc_offset
+
+
+def _bucket_starts_numpy(timestamps, bucket: Union[str, int], utc_offset: int = 0):
+    """Vectorized _bucket_start()."""
+    local = timestamps + utc_offset
+    if bucket == "month":
+        months = local.astype("datetime64[s]").astype("datetime64[M]")
+        return months.astype("datetime64[s]").astype(np.int64) - utc_offset
+    width = BUCKET_SECONDS.get(bucket, bucket)
+    offset = _WEEK_OFFSET if bucket == "week" else 0
+    return (local - offset) // width * width + offset - utc_offset
+
+
+def bucket_starts(
+    since: int, until: int, bucket: Union[str, int], utc_offset: int = 0
+) -> List[int]:
+    """Start of every bucket overlapping [since, until), for zero-filling series."""
+    starts = []
+    start = _bucket_start(since, bucket, utc_offset)
+    while start < until:
+        starts.append(start)
+        if bucket == "month":
+            # Any second ~32 days on lands in the next month
+            start = _bucket_start(start + 32 * 86400, bucket, utc_offset)
+        else:
+            start += BUCKET_SECONDS.get(bucket, bucket)
+    return starts
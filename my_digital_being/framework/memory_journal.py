@@ -0,0 +1,129 @@
+"""Append-only journal used by Memory to persist activity records incrementally."""
+
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryJournal:
+    """
+    Append-only JSONL journal of memory records.
+
+    Every stored record is written as a single line, so persisting one activity
+    costs O(record) instead of rewriting the whole memory file. Update lines
+    carry the new state of an already stored record (a repeat run's count) and
+    are replayed even at the snapshot's sequence number, since re-applying
+    them is harmless. fsync calls are
+    coalesced to at most one every `fsync_interval` seconds. Memory folds the
+    journal into its snapshot once `compact_threshold` records have piled up,
+    and replays it on startup to recover anything written after the last
+    snapshot.
+    """
+
+    def __init__(
+        self,
+        journal_file: Path,
+        fsync_interval: float = 1.0,
+        compact_threshold: int = 500,
+    ):
+        self.journal_file = Path(journal_file)
+        self.fsync_interval = fsync_interval
+        self.compact_threshold = compact_threshold
+        self.record_count = 0  # Records written since the last snapshot
+        self._handle = None
+        self._last_fsync = 0.0
+        self._unsynced = False
+
+    @property
+    def needs_compaction(self) -> bool:
+        """Whether the journal has grown enough to be folded into a snapshot."""
+        return self.record_count >= self.compact_threshold
+
+    def replay(self, after_seq: int = 0) -> List[Tuple[int, Dict[str, Any], bool]]:
+        """
+        Read back (seq, record, is_update) for journaled records with a
+        sequence number above `after_seq` (updates: at or above it).
+        A torn or corrupt tail (e.g. from a crash mid-write) is truncated away.
+        """
+        self.close()
+        self.record_count = 0
+        if not self.journal_file.exists():
+            return []
+
+        records = []
+        good_offset = 0
+        with open(self.journal_file, "rb") as f:
+            for raw_line in f:
+                if not raw_line.endswith(b"\n"):
+                    break  # Partial write, nothing after it can be trusted
+                try:
+                    line = json.loads(raw_line)
+                    seq, record = int(line["seq"]), line["record"]
+                    update = bool(line.get("update"))
+                except (ValueError, KeyError, TypeError) as e:
+                    logger.warning(f"Stopping journal replay at corrupt line: {e}")
+                    break
+
+                good_offset += len(raw_line)
+                self.record_count += 1
+                if seq > after_seq or (update and seq == after_seq):
+                    records.append((seq, record, update))
+
+        size = self.journal_file.stat().st_size
+        if good_offset < size:
+            logger.warning(
+                f"Discarding {size - good_offset} bytes of incomplete journal data"
+            )
+            with open(self.journal_file, "r+b") as f:
+                f.truncate(good_offset)
+
+        return records
+
+    def append(self, seq: int, record: Dict[str, Any], update: bool = False):
+        """
+        Append a single record to the journal. With `update`, the line replaces
+        the stored record with the same activity type and timestamp instead.
+        """
+        if self._handle is None:
+            self._handle = open(self.journal_file, "ab")
+
+        payload = {"seq": seq, "record": record}
+        if update:
+            payload["update"] = True
+        line = json.dumps(payload, separators=(",", ":"))
+        self._handle.write(line.encode("utf-8") + b"\n")
+        self._handle.flush()
+        self.record_count += 1
+        self._unsynced = True
+
+        if time.monotonic() - self._last_fsync >= self.fsync_interval:
+            self.sync()
+
+    def sync(self):
+        """fsync any journal writes that are not yet durable."""
+        if self._handle is None or not self._unsynced:
+            return
+        self._handle.flush()
+        os.fsync(self._handle.fileno())
+        self._last_fsync = time.monotonic()
+        self._unsynced = False
+
+    def reset(self):
+        """Empty the journal once its records are covered by a snapshot."""
+        self.close()
+        with open(self.journal_file, "wb") as f:
+            os.fsync(f.fileno())
+        self.record_count = 0
+
+    def close(self):
+        """Sync and close the journal file handle."""
+        if self._handle is None:
+            return
+        self.sync()
+        self._handle.close()
+        self._handle = None
@@ -0,0 +1,71 @@
+"""
+Advisory lock on a memory storage directory (storage/memory.lock), so two
+processes never write the same journal, snapshot or database at once, e.g.
+tools/memory_ndjson.py importing while the being is running.
+
+The lock is an flock() on the lock file, held for as long as a Memory is
+open. Memories opened on the same directory within one process share it.
+On platforms without fcntl the lock is not enforced.
+"""
+
+import logging
+import os
+from pathlib import Path
+from typing import Dict, List
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Resolved lock file path -> [file descriptor, holders in this process]
+_held: Dict[Path, List[int]] = {}
+
+
+class StorageLockedError(RuntimeError):
+    """Another process holds the memory storage lock."""
+
+
+class StorageLock:
+    def __init__(self, lock_file: Path):
+        self.lock_file = Path(lock_file).resolve()
+        self.held = False
+
+    def acquire(self):
+        """Take the lock without waiting; raises StorageLockedError if taken."""
+        if self.held:
+            return
+        entry = _held.get(self.lock_file)
+        if entry is not None:
+            entry[1] += 1
+            self.held = True
+            return
+        fd = os.open(self.lock_file, os.O_RDWR | os.O_CREAT, 0o644)
+        if fcntl is not None:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                os.close(fd)
+                raise StorageLockedError(
+                    f"{self.lock_file.parent} is in use by another process "
+                    "(is the being running?)"
+                ) from None
+        else:
+            logger.debug("fcntl unavailable; memory storage lock not enforced")
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode("ascii"))
+        _held[self.lock_file] = [fd, 1]
+        self.held = True
+
+    def release(self):
+        """Drop this holder; the file lock goes with the last one."""
+        if not self.held:
+            return
+        self.held = False
+        entry = _held[self.lock_file]
+        entry[1] -= 1
+        if entry[1] == 0:
+            del _held[self.lock_file]
+            os.close(entry[0])  # Closing the descriptor releases the flock
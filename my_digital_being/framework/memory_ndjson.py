@@ -0,0 +1,63 @@
+"""
+Streaming NDJSON encoding of memory records, for Memory.export_records() and
+Memory.import_records().
+
+One record per line, with the stored fields (timestamp, activity_type,
+success, error, data, metadata, duration) and blob references resolved, so an
+export is self-contained. Writers and readers work line by line (optionally
+gzip-compressed), so neither side ever holds the whole history.
+"""
+
+import gzip
+import json
+from pathlib import Path
+from typing import Any, Dict, IO, Iterable, Iterator, Union
+
+CHUNK_BYTES = 64 * 1024
+
+
+def encode_record(entry: Dict[str, Any]) -> str:
+    """A record as one NDJSON line (with the trailing newline)."""
+    return json.dumps(entry, separators=(",", ":"), default=str) + "\n"
+
+
+def iter_chunks(
+    records: Iterable[Dict[str, Any]], chunk_bytes: int = CHUNK_BYTES
+) -> Iterator[str]:
+    """Group encoded records into chunks of about `chunk_bytes` (whole lines)."""
+    lines = []
+    size = 0
+    for entry in records:
+        line = encode_record(entry)
+        lines.append(line)
+        size += len(line)
+        if size >= chunk_bytes:
+            yield "".join(lines)
+            lines, size = [], 0
+    if lines:
+        yield "".join(lines)
+
+
+def decode_lines(lines: Iterable[Union[str, bytes]]) -> Iterator[Dict[str, Any]]:
+    """
+    Parse NDJSON lines into records, skipping blank lines. Raises ValueError
+    naming the line number for invalid JSON or non-object lines.
+    """
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            entry = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON on line {number}: {e}") from None
+        if not isinstance(entry, dict):
+            raise ValueError(f"Line {number} is not a JSON object")
+        yield entry
+
+
+def open_ndjson(path: Union[str, Path], mode: str) -> IO:
+    """Open an NDJSON file as text, gzip-compressed if it ends in .gz."""
+    path = Path(path)
+    if path.suffix == ".gz":
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
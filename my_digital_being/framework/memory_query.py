@@ -0,0 +1,151 @@
+"""
+Field predicates, projection and sorting for Memory.query().
+
+Predicates are [path, op] or [path, op, value] lists so they can be sent as
+JSON over the WebSocket API. Paths are dotted: "activity_type", "duration",
+"data.tweet_id", "metadata.image.url". Operators:
+
+    exists, missing, ==, !=, <, <=, >, >=, in, not_in, contains, startswith
+
+A comparison between incompatible types (e.g. a string and a number) is
+false rather than an error, and so is any operator other than `missing` on a
+path that does not exist.
+"""
+
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .memory_blobs import is_blob_ref
+
+_MISSING = object()
+
+OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    "exists": lambda value, _: True,
+    "==": lambda value, arg: value == arg,
+    "!=": lambda value, arg: value != arg,
+    "<": lambda value, arg: value < arg,
+    "<=": lambda value, arg: value <= arg,
+    ">": lambda value, arg: value > arg,
+    ">=": lambda value, arg: value >= arg,
+    "in": lambda value, arg: value in arg,
+    "not_in": lambda value, arg: value not in arg,
+    "contains": lambda value, arg: arg in value,
+    "startswith": lambda value, arg: value.startswith(arg),
+}
+
+Resolver = Optional[Callable[[Any], Any]]
+
+
+def get_path(entry: Any, path: str, resolve: Resolver = None) -> Any:
+    """
+    Value at a dotted path, or _MISSING. Blob references are resolved where
+    records hold them: a payload (data) or a field of a dict payload (data.image).
+    """
+    parts = path.split(".")
+    value, parent = entry, None
+    for depth, part in enumerate(parts):
+        value = _resolve_at(value, depth, parent, resolve)
+        parent = value
+        if isinstance(value, dict) or (
+            hasattr(value, "keys") and hasattr(value, "__getitem__")
+        ):
+            if part not in value:
+                return _MISSING
+            value = value[part]
+        elif isinstance(value, list) and part.isdigit() and int(part) < len(value):
+            value = value[int(part)]
+        else:
+            return _MISSING
+    return _resolve_at(value, len(parts), parent, resolve)
+
+
+def _resolve_at(value: Any, depth: int, parent: Any, resolve: Resolver) -> Any:
+    if (
+        resolve
+        and (depth == 1 or (depth == 2 and isinstance(parent, dict)))
+        and is_blob_ref(value)
+    ):
+        return resolve(value)
+    return value
+
+
+def parse_where(where: Iterable[Any]) -> List[Tuple[str, str, Any]]:
+    """Validate predicates; raises ValueError with a readable message."""
+    conditions = []
+    for condition in where or []:
+        if not isinstance(condition, (list, tuple)) or len(condition) not in (2, 3):
+            raise ValueError(f"Invalid condition {condition!r}: use [path, op, value]")
+        path, op = condition[0], condition[1]
+        if not isinstance(path, str) or not path:
+            raise ValueError(f"Invalid path in condition {condition!r}")
+        if op != "missing" and op not in OPERATORS:
+            raise ValueError(f"Unknown operator {op!r} in condition {condition!r}")
+        if len(condition) == 2 and op not in ("exists", "missing"):
+            raise ValueError(f"Operator {op!r} needs a value")
+        conditions.append((path, op, condition[2] if len(condition) == 3 else None))
+    return conditions
+
+
+def compile_where(
+    conditions: List[Tuple[str, str, Any]], resolve: Resolver = None
+) -> Callable[[Any], bool]:
+    """Build a predicate that is true when an entry satisfies every condition."""
+
+    def matches(entry: Any) -> bool:
+        for path, op, arg in conditions:
+            value = get_path(entry, path, resolve)
+            if op == "missing":
+                if value is not _MISSING:
+                    return False
+                continue
+            if value is _MISSING:
+                return False
+            try:
+                if not OPERATORS[op](value, arg):
+                    return False
+            except (TypeError, AttributeError):
+                return False
+        return True
+
+    return matches
+
+
+def project(entry: Dict[str, Any], fields: Optional[List[str]]) -> Dict[str, Any]:
+    """Keep only the given dotted paths, nested as in the entry."""
+    if not fields:
+        return entry
+    projected: Dict[str, Any] = {}
+    for path in fields:
+        value = get_path(entry, path)
+        if value is _MISSING:
+            continue
+        target = projected
+        parts = path.split(".")
+        for part in parts[:-1]:
+            target = target.setdefault(part, {})
+        target[parts[-1]] = value
+    return projected
+
+
+def parse_sort(sort: Optional[str]) -> Tuple[str, bool]:
+    """'-timestamp' -> ('timestamp', True); the default is newest first."""
+    sort = sort or "-timestamp"
+    if sort.startswith("-"):
+        return sort[1:], True
+    return sort.lstrip("+"), False
+
+
+def sort_key(path: str, resolve: Resolver = None) -> Callable[[Any], Tuple]:
+    """
+    Key ordering entries by a field: missing values and None last, then
+    numbers, then everything else by its string form.
+    """
+
+    def key(entry: Any) -> Tuple:
+        value = get_path(entry, path, resolve)
+        if value is _MISSING or value is None:
+            return (2, 0, "")
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return (0, value, "")
+        return (1, 0, str(value))
+
+    return key
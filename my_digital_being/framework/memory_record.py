@@ -0,0 +1,185 @@
+"""
+Compact resident representation of memory entries.
+
+Long-term memory on the json backend can hold hundreds of thousands of
+entries. As plain dicts each one carries its own hash table and a 32-character
+ISO timestamp string; MemoryRecord keeps the same fields in slots, stores the
+timestamp as integer microseconds since the epoch and interns the activity
+type, so identical types share one string object.
+
+Records implement the read-only Mapping protocol (record["timestamp"],
+record.get("data"), dict(record), {**record}), so code written against dict
+entries keeps working. They are converted to dicts when serialized and at the
+public API boundary (Memory._format_entry).
+
+A record standing for a run of identical results also has the keys in
+REPEAT_FIELDS: "count" (results in the run) and "last_seen" (timestamp of the
+latest one); its own timestamp is when the run started and its duration is
+the mean over the run's results. Other records do not
+have these keys, so they cost nothing when serialized.
+"""
+
+import sys
+from bisect import bisect_left
+from collections.abc import Mapping, Sequence
+from datetime import datetime, timedelta, timezone
+from operator import attrgetter, itemgetter
+from typing import Any, Dict, Iterator, Optional, Union
+
+FIELDS = (
+    "timestamp",
+    "activity_type",
+    "success",
+    "error",
+    "data",
+    "metadata",
+    "duration",
+)
+REPEAT_FIELDS = ("count", "last_seen")
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+_epoch_key = attrgetter("ts")
+_epoch_type_key = attrgetter("ts", "activity_type")
+_timestamp_key = itemgetter("timestamp")
+_timestamp_type_key = itemgetter("timestamp", "activity_type")
+
+
+def encode_timestamp(timestamp: str) -> Union[int, str]:
+    """
+    UTC ISO timestamp to epoch microseconds. Strings that would not format
+    back identically (other offsets, naive or 'Z' suffixed) are kept as-is so
+    ordering and exact lookups by timestamp are unaffected.
+    """
+    try:
+        dt = datetime.fromisoformat(timestamp)
+    except (TypeError, ValueError):
+        return timestamp
+    if dt.tzinfo is None or dt.utcoffset():
+        return timestamp
+    epoch_us = (dt - _EPOCH) // _MICROSECOND
+    return epoch_us if decode_timestamp(epoch_us) == timestamp else timestamp
+
+
+def decode_timestamp(epoch_us: Union[int, str]) -> str:
+    """Inverse of encode_timestamp()."""
+    if isinstance(epoch_us, str):
+        return epoch_us
+    return (_EPOCH + timedelta(microseconds=epoch_us)).isoformat()
+
+
+class MemoryRecord(Mapping):
+    """A stored activity result, read-only, with the keys listed in FIELDS."""
+
+    __slots__ = (
+        "ts",
+        "activity_type",
+        "success",
+        "error",
+        "data",
+        "metadata",
+        "duration",
+        "count",
+        "last_seen",
+    )
+
+    def __init__(
+        self,
+        timestamp: str,
+        activity_type: str,
+        success: bool,
+        error: Any = None,
+        data: Any = None,
+        metadata: Any = None,
+        duration: Any = None,
+        count: int = 1,
+        last_seen: Optional[str] = None,
+    ):
+        # Epoch microseconds, or the original string (see encode_timestamp)
+        self.ts = encode_timestamp(timestamp)
+        self.activity_type = (
+            sys.intern(activity_type)
+            if isinstance(activity_type, str)
+            else activity_type
+        )
+        self.success = success
+        self.error = error
+        self.data = data
+        self.metadata = {} if metadata is None else metadata
+        self.duration = duration
+        self.count = count
+        self.last_seen = last_seen
+
+    @classmethod
+    def from_dict(cls, entry: Mapping) -> "MemoryRecord":
+        if isinstance(entry, MemoryRecord):
+            return entry
+        return cls(
+            entry["timestamp"],
+            entry.get("activity_type", "Unknown"),
+            entry.get("success", False),
+            entry.get("error"),
+            entry.get("data"),
+            entry.get("metadata"),
+            entry.get("duration"),
+            entry.get("count", 1),
+            entry.get("last_seen"),
+        )
+
+    @property
+    def timestamp(self) -> str:
+        return decode_timestamp(self.ts)
+
+    def to_dict(self) -> Dict[str, Any]:
+        entry = {
+            "timestamp": self.timestamp,
+            "activity_type": self.activity_type,
+            "success": self.success,
+            "error": self.error,
+            "data": self.data,
+            "metadata": self.metadata,
+            "duration": self.duration,
+        }
+        if self.count > 1:
+            entry["count"] = self.count
+            entry["last_seen"] = self.last_seen
+        return entry
+
+    def __getitem__(self, key: str) -> Any:
+        if key == "timestamp":
+            return self.timestamp
+        if key in FIELDS or (key in REPEAT_FIELDS and self.count > 1):
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(FIELDS + REPEAT_FIELDS if self.count > 1 else FIELDS)
+
+    def __len__(self) -> int:
+        return len(FIELDS) + (len(REPEAT_FIELDS) if self.count > 1 else 0)
+
+    def __repr__(self) -> str:
+        return f"MemoryRecord({self.to_dict()!r})"
+
+
+def bisect_records(
+    records: Sequence, timestamp: str, activity_type: Optional[str] = None
+) -> int:
+    """
+    bisect_left over time-ordered records by ISO timestamp, or by
+    (timestamp, activity_type) when a type is given. Compares the encoded
+    integers directly instead of formatting every probed record's timestamp;
+    falls back to string comparison if a probe meets a legacy string
+    timestamp, which gives the same result since canonical timestamps order
+    identically in both forms.
+    """
+    target = encode_timestamp(timestamp)
+    if isinstance(target, int):
+        try:
+            if activity_type is None:
+                return bisect_left(records, target, key=_epoch_key)
+            return bisect_left(records, (target, activity_type), key=_epoch_type_key)
+        except (AttributeError, TypeError):
+            pass
+    if activity_type is None:
+        return bisect_left(records, timestamp, key=_timestamp_key)
+    return bisect_left(records, (timestamp, activity_type), key=_timestamp_type_key)
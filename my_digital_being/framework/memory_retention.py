@@ -0,0 +1,419 @@
+"""
+Retention for Memory: bounds how many long-term records are kept per activity
+type and overall, and keeps down-sampled summaries of what was evicted.
+
+Configured under memory_config.retention in activity_constraints.json:
+
+    "retention": {
+      "check_every": 500,
+      "max_total_bytes": 104857600,
+      "default": {"max_age_days": null, "max_count": null, "max_bytes": null},
+      "types": {"NapActivity": {"max_count": 500, "max_age_days": 30}},
+      "failure_weight": 4,
+      "reference_weight": 4,
+      "half_life_days": 30,
+      "summary_days": 90
+    }
+
+Records older than a type's max_age_days are always evicted. When a type is
+over max_count/max_bytes, or all records together are over max_total_bytes,
+the least important records go first. Importance decays with age (halving
+every half_life_days) and is raised for failures, for records whose
+identifiers (URLs, paths, ids, hashes) show up in later records, and for
+rare activity types. Short-term records count towards the limits but are
+never evicted.
+
+RetentionTotals keeps the record count and bytes of every type up to date
+as records are stored and evicted, so a check only reads records when a
+limit can actually be exceeded.
+"""
+
+import json
+import logging
+import math
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from .memory_blobs import BLOB_KEY, is_blob_ref
+from .memory_columns import to_epoch
+
+logger = logging.getLogger(__name__)
+
+DAY_SECONDS = 86400
+
+
+class RetentionPolicy:
+    """Parsed memory_config.retention settings."""
+
+    def __init__(self, config: Dict[str, Any]):
+        self.check_every = int(config.get("check_every", 500))
+        self.max_total_bytes = config.get("max_total_bytes")
+        self.default_limits = config.get("default", {}) or {}
+        self.type_limits = config.get("types", {}) or {}
+        self.failure_weight = float(config.get("failure_weight", 4))
+        self.reference_weight = float(config.get("reference_weight", 4))
+        self.half_life_days = float(config.get("half_life_days", 30))
+        self.summary_days = int(config.get("summary_days", 90))
+
+    def limits(self, activity_type: str) -> Dict[str, Any]:
+        return {**self.default_limits, **self.type_limits.get(activity_type, {})}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(
+            self.max_total_bytes
+            or any(v is not None for v in self.default_limits.values())
+            or any(
+                v is not None
+                for limits in self.type_limits.values()
+                for v in limits.values()
+            )
+        )
+
+
+class RetentionRecord:
+    """What the planner needs to know about one stored record."""
+
+    __slots__ = (
+        "key",
+        "activity_type",
+        "timestamp",
+        "epoch",
+        "success",
+        "error",
+        "count",
+        "size",
+        "preview",
+        "identifiers",
+        "digests",
+        "referenced",
+        "importance",
+    )
+
+    def __init__(self, key: Any, entry: Dict[str, Any]):
+        # Backend-specific handle used to delete the record; None = not evictable
+        self.key = key
+        self.activity_type = entry["activity_type"]
+        self.timestamp = entry["timestamp"]
+        self.epoch = to_epoch(self.timestamp)
+        self.success = bool(entry["success"])
+        self.error = entry.get("error")
+        self.count = entry.get("count", 1)  # Results in a repeat run
+        self.identifiers: Set[str] = set()
+        self.digests: Set[str] = set()
+        blob_bytes = 0
+        for payload in (entry.get("data"), entry.get("metadata")):
+            blob_bytes += self._scan(payload, 0)
+        self.size = blob_bytes + len(
+            json.dumps(dict(entry), separators=(",", ":"), default=str)
+        )
+        self.preview = str(entry.get("data"))[:200]
+        self.referenced = False
+        self.importance = 0.0
+
+    def _scan(self, value: Any, depth: int) -> int:
+        """
+        Collect identifier-like strings and blob digests; return blob bytes.
+        References only stand for a payload or one of its top-level fields.
+        """
+        if depth <= 1 and is_blob_ref(value):
+            self.digests.add(value[BLOB_KEY])
+            return value["bytes"]
+        if isinstance(value, dict):
+            return sum(self._scan(v, depth + 1) for v in value.values())
+        if isinstance(value, list):
+            return sum(self._scan(v, depth + 2) for v in value)  # Items never are
+        if isinstance(value, str):
+            if 8 <= len(value) <= 300 and not any(c.isspace() for c in value):
+                self.identifiers.add(value)
+        elif isinstance(value, int) and not isinstance(value, bool) and value >= 1e9:
+            self.identifiers.add(str(value))  # Tweet ids and the like
+        return 0
+
+
+def plan_evictions(
+    records: List[RetentionRecord],
+    recent: List[RetentionRecord],
+    policy: RetentionPolicy,
+    now: float,
+    type_counts: Optional[Dict[str, int]] = None,
+) -> List[RetentionRecord]:
+    """
+    Choose which long-term `records` to evict. `recent` are short-term records:
+    they count towards limits and can reference older records, but stay.
+    `now` is epoch seconds. `type_counts` (records per type over all of
+    memory, e.g. from RetentionTotals) rates how rare a type is when only
+    some records were read. Returns the evicted records in time order.
+    """
+    everything = sorted(records + recent, key=lambda r: r.epoch)
+    if not everything:
+        return []
+
+    # A record is referenced when a later record repeats one of its identifiers
+    first_seen: Dict[str, RetentionRecord] = {}
+    for record in everything:
+        for identifier in record.identifiers:
+            owner = first_seen.setdefault(identifier, record)
+            if owner is not record:
+                owner.referenced = True
+        record.identifiers = set()  # Only needed for this pass
+
+    if type_counts is None:
+        type_counts = {}
+        for record in everything:
+            type_counts[record.activity_type] = (
+                type_counts.get(record.activity_type, 0) + 1
+            )
+    total = sum(type_counts.values())
+    for record in records:
+        age_days = max(now - record.epoch, 0) / DAY_SECONDS
+        importance = 0.5 ** (age_days / policy.half_life_days)
+        if not record.success:
+            importance *= policy.failure_weight
+        if record.referenced:
+            importance *= policy.reference_weight
+        importance *= math.sqrt(total / type_counts.get(record.activity_type, 1))
+        record.importance = importance
+
+    evicted: Set[int] = set()
+    by_type: Dict[str, List[RetentionRecord]] = {}
+    for record in everything:
+        by_type.setdefault(record.activity_type, []).append(record)
+
+    for activity_type, typed in by_type.items():
+        limits = policy.limits(activity_type)
+        max_age = limits.get("max_age_days")
+        if max_age is not None:
+            cutoff = now - max_age * DAY_SECONDS
+            for record in typed:
+                if record.key is not None and record.epoch < cutoff:
+                    evicted.add(id(record))
+
+        kept = [r for r in typed if id(r) not in evicted]
+        count, size = len(kept), sum(r.size for r in kept)
+        max_count, max_bytes = limits.get("max_count"), limits.get("max_bytes")
+        for record in _least_important(kept):
+            if (max_count is None or count <= max_count) and (
+                max_bytes is None or size <= max_bytes
+            ):
+                break
+            evicted.add(id(record))
+            count, size = count - 1, size - record.size
+
+    if policy.max_total_bytes:
+        kept = [r for r in everything if id(r) not in evicted]
+        size = sum(r.size for r in kept)
+        for record in _least_important(kept):
+            if size <= policy.max_total_bytes:
+                break
+            evicted.add(id(record))
+            size -= record.size
+
+    return [r for r in everything if id(r) in evicted]
+
+
+def _least_important(records: Iterable[RetentionRecord]) -> List[RetentionRecord]:
+    """Evictable records, least important (then oldest) first."""
+    return sorted(
+        (r for r in records if r.key is not None),
+        key=lambda r: (r.importance, r.epoch),
+    )
+
+
+class RetentionTotals:
+    """
+    Record count and bytes (as RetentionRecord sizes them) per activity type,
+    and how many records reference each blob. Has the same lifecycle as the
+    derived memory indexes (load/add/rebuild/save, persisted with the memory
+    sequence number it covers), but is given records as stored, with their
+    blob references, rather than resolved.
+    """
+
+    stored_entries = True
+
+    def __init__(self, totals_file: Path):
+        self.totals_file = Path(totals_file)
+        self.types: Dict[str, List[int]] = {}  # activity type -> [count, bytes]
+        self.blob_refs: Dict[str, int] = {}  # digest -> records referencing it
+        self.indexed_seq = 0  # Memory sequence number covered by the totals
+        self.last_timestamp: Optional[str] = None
+
+    def load(self) -> bool:
+        """Load the persisted totals. Returns False if they are missing or unreadable."""
+        try:
+            if not self.totals_file.exists():
+                return False
+            with open(self.totals_file, "r") as f:
+                state = json.load(f)
+            self.types = state["types"]
+            self.blob_refs = state["blob_refs"]
+            self.indexed_seq = state["indexed_seq"]
+            self.last_timestamp = state["last_timestamp"]
+            return True
+        except Exception as e:
+            logger.error(f"Failed to load retention totals, they will be rebuilt: {e}")
+            self.clear()
+            return False
+
+    def save(self):
+        """Atomically persist the totals."""
+        state = {
+            "types": self.types,
+            "blob_refs": self.blob_refs,
+            "indexed_seq": self.indexed_seq,
+            "last_timestamp": self.last_timestamp,
+        }
+        temp_file = self.totals_file.with_suffix(".tmp")
+        with open(temp_file, "w") as f:
+            json.dump(state, f, separators=(",", ":"))
+        temp_file.replace(self.totals_file)
+
+    def clear(self):
+        self.types = {}
+        self.blob_refs = {}
+        self.indexed_seq = 0
+        self.last_timestamp = None
+
+    def delete(self):
+        """Clear the totals and remove their file."""
+        self.clear()
+        self.totals_file.unlink(missing_ok=True)
+
+    def add(self, entry: Dict[str, Any]):
+        """Count a single stored record."""
+        self.last_timestamp = entry["timestamp"]
+        self._count(RetentionRecord(None, entry), 1)
+
+    def remove(self, records: Iterable[RetentionRecord]) -> Set[str]:
+        """
+        Stop counting removed records. Returns the digests of their blobs that
+        no other record references any more.
+        """
+        unreferenced = set()
+        for record in records:
+            self._count(record, -1)
+            unreferenced.update(d for d in record.digests if d not in self.blob_refs)
+        return unreferenced
+
+    def _count(self, record: RetentionRecord, sign: int):
+        totals = self.types.setdefault(record.activity_type, [0, 0])
+        totals[0] += sign
+        totals[1] += sign * record.size
+        if totals[0] <= 0:
+            del self.types[record.activity_type]
+        for digest in record.digests:
+            refs = self.blob_refs.get(digest, 0) + sign
+            if refs > 0:
+                self.blob_refs[digest] = refs
+            else:
+                self.blob_refs.pop(digest, None)
+
+    def rebuild(self, entries: Iterable[Dict[str, Any]], indexed_seq: int):
+        """Recount every record from scratch."""
+        self.clear()
+        for entry in entries:
+            self.add(entry)
+        self.indexed_seq = indexed_seq
+        count = sum(totals[0] for totals in self.types.values())
+        logger.info(f"Rebuilt memory retention totals over {count} records")
+
+    def counts(self) -> Dict[str, int]:
+        """Records per activity type."""
+        return {
+            activity_type: totals[0] for activity_type, totals in self.types.items()
+        }
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(totals[1] for totals in self.types.values())
+
+
+class EvictionSummaries:
+    """
+    Per-type summaries of evicted records, one per day for recent spans and
+    one per month once a day is older than summary_days, so the file stays
+    small however long the being runs.
+    """
+
+    def __init__(self, summary_file: Path):
+        self.summary_file = Path(summary_file)
+        self.summaries: Dict[str, Dict[str, Any]] = {}
+        try:
+            if self.summary_file.exists():
+                with open(self.summary_file, "r") as f:
+                    self.summaries = json.load(f)
+        except Exception as e:
+            logger.error(f"Failed to load eviction summaries: {e}")
+
+    def add(self, records: Iterable[RetentionRecord], now: float, summary_days: int):
+        for record in records:
+            self._merge(
+                self._period(record.timestamp, record.epoch, now, summary_days),
+                {
+                    "activity_type": record.activity_type,
+                    "first_seen": record.timestamp,
+                    "last_seen": record.timestamp,
+                    "count": record.count,
+                    "successes": record.count if record.success else 0,
+                    "failures": 0 if record.success else record.count,
+                    "bytes": record.size,
+                    "errors": {str(record.error)[:100]: 1} if record.error else {},
+                    "last_data": record.preview,
+                },
+            )
+        self._downsample(now, summary_days)
+
+    @staticmethod
+    def _period(timestamp: str, epoch: float, now: float, summary_days: int) -> str:
+        if now - epoch > summary_days * DAY_SECONDS:
+            return timestamp[:7]
+        return timestamp[:10]
+
+    def _merge(self, period: str, summary: Dict[str, Any]):
+        key = f"{summary['activity_type']}|{period}"
+        existing = self.summaries.get(key)
+        if existing is None:
+            self.summaries[key] = {**summary, "period": period}
+            return
+        existing["first_seen"] = min(existing["first_seen"], summary["first_seen"])
+        if summary["last_seen"] >= existing["last_seen"]:
+            existing["last_seen"] = summary["last_seen"]
+            existing["last_data"] = summary["last_data"]
+        for field in ("count", "successes", "failures", "bytes"):
+            existing[field] += summary[field]
+        errors = dict(existing["errors"])
+        for message, count in summary["errors"].items():
+            errors[message] = errors.get(message, 0) + count
+        top = sorted(errors.items(), key=lambda item: item[1], reverse=True)[:5]
+        existing["errors"] = dict(top)
+
+    def _downsample(self, now: float, summary_days: int):
+        """Fold day summaries that have aged past summary_days into months."""
+        for key, summary in list(self.summaries.items()):
+            period = summary["period"]
+            if len(period) == 10 and (
+                now - to_epoch(f"{period}T00:00:00+00:00") > summary_days * DAY_SECONDS
+            ):
+                del self.summaries[key]
+                self._merge(period[:7], summary)
+
+    def get(self, activity_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Summaries (optionally for one type), oldest first."""
+        return sorted(
+            (
+                dict(summary)
+                for summary in self.summaries.values()
+                if activity_type is None or summary["activity_type"] == activity_type
+            ),
+            key=lambda s: (s["first_seen"], s["activity_type"]),
+        )
+
+    def save(self):
+        temp_file = self.summary_file.with_suffix(".json.tmp")
+        with open(temp_file, "w") as f:
+            json.dump(self.summaries, f, indent=2)
+        temp_file.replace(self.summary_file)
+
+    def clear(self):
+        self.summaries = {}
+        self.summary_file.unlink(missing_ok=True)
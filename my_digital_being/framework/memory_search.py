@@ -0,0 +1,207 @@
+"""Full-text search over memory records: an inverted index with BM25 ranking."""
+
+import heapq
+import json
+import logging
+import math
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have in is it its of on or "
+    "that the this to was were will with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens, minus stopwords and single characters."""
+    return [
+        token
+        for token in TOKEN_PATTERN.findall(text.lower())
+        if len(token) > 1 and token not in STOPWORDS
+    ]
+
+
+def record_text(entry: Dict[str, Any]) -> str:
+    """Flatten the searchable fields of a record (data, error, metadata) to text."""
+    parts: List[str] = []
+
+    def walk(value: Any):
+        if isinstance(value, dict):
+            for item in value.values():
+                walk(item)
+        elif isinstance(value, (list, tuple)):
+            for item in value:
+                walk(item)
+        elif isinstance(value, str):
+            parts.append(value)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            parts.append(str(value))
+
+    walk(entry.get("data"))
+    walk(entry.get("error"))
+    walk(entry.get("metadata"))
+    return " ".join(parts)
+
+
+class MemorySearchIndex:
+    """
+    Incrementally maintained inverted index over memory records.
+
+    Each record becomes a document identified by a dense doc id; postings map
+    a term to {doc_id: term frequency}. Documents remember the record's
+    (timestamp, activity_type) so Memory can fetch the full record for a hit.
+    The index is a rebuildable cache persisted as JSON next to the memory
+    files, together with the memory sequence number it covers. Postings are
+    stored as flat [doc_id, frequency, ...] lists, since JSON object keys
+    cannot be integers.
+    """
+
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self, index_file: Path):
+        self.index_file = Path(index_file)
+        self.postings: Dict[str, Dict[int, int]] = {}
+        # doc_id -> (timestamp, activity_type, document length)
+        self.docs: List[Tuple[str, str, int]] = []
+        self.total_length = 0
+        self.indexed_seq = 0  # Memory sequence number covered by the index
+
+    @property
+    def last_timestamp(self) -> Optional[str]:
+        return self.docs[-1][0] if self.docs else None
+
+    def load(self) -> bool:
+        """Load the persisted index. Returns False if it is missing or unreadable."""
+        try:
+            if not self.index_file.exists():
+                return False
+            with open(self.index_file, "r") as f:
+                state = json.load(f)
+            self.postings = {
+                term: dict(zip(flat[::2], flat[1::2]))
+                for term, flat in state["postings"].items()
+            }
+            self.docs = [tuple(doc) for doc in state["docs"]]
+            self.total_length = state["total_length"]
+            self.indexed_seq = state["indexed_seq"]
+            return True
+        except Exception as e:
+            logger.error(f"Failed to load search index, it will be rebuilt: {e}")
+            self.clear()
+            return False
+
+    def save(self):
+        """Atomically persist the index."""
+        state = {
+            "postings": {
+                term: [n for posting in postings.items() for n in posting]
+                for term, postings in self.postings.items()
+            },
+            "docs": self.docs,
+            "total_length": self.total_length,
+            "indexed_seq": self.indexed_seq,
+        }
+        temp_file = self.index_file.with_suffix(".tmp")
+        with open(temp_file, "w") as f:
+            json.dump(state, f, separators=(",", ":"))
+        temp_file.replace(self.index_file)
+
+    def clear(self):
+        self.postings = {}
+        self.docs = []
+        self.total_length = 0
+        self.indexed_seq = 0
+
+    def delete(self):
+        """Clear the index and remove its file."""
+        self.clear()
+        self.index_file.unlink(missing_ok=True)
+
+    def add(self, entry: Dict[str, Any]):
+        """Index a single record."""
+        tokens = tokenize(record_text(entry))
+        doc_id = len(self.docs)
+        self.docs.append((entry["timestamp"], entry["activity_type"], len(tokens)))
+        self.total_length += len(tokens)
+        for term, frequency in Counter(tokens).items():
+            self.postings.setdefault(term, {})[doc_id] = frequency
+
+    def remove(self, entries: Iterable[Dict[str, Any]]):
+        """Drop the documents of removed records and renumber the rest."""
+        removed = {(entry["timestamp"], entry["activity_type"]) for entry in entries}
+        new_ids: Dict[int, int] = {}
+        docs = []
+        for doc_id, doc in enumerate(self.docs):
+            if (doc[0], doc[1]) in removed:
+                self.total_length -= doc[2]
+                continue
+            new_ids[doc_id] = len(docs)
+            docs.append(doc)
+        if len(docs) == len(self.docs):
+            return
+        self.docs = docs
+        postings = {}
+        for term, by_doc in self.postings.items():
+            kept = {new_ids[d]: f for d, f in by_doc.items() if d in new_ids}
+            if kept:
+                postings[term] = kept
+        self.postings = postings
+
+    def rebuild(self, entries: Iterable[Dict[str, Any]], indexed_seq: int):
+        """Re-index every record from scratch."""
+        self.clear()
+        for entry in entries:
+            self.add(entry)
+        self.indexed_seq = indexed_seq
+        logger.info(f"Rebuilt memory search index over {len(self.docs)} records")
+
+    def search(
+        self,
+        query: str,
+        limit: int = 10,
+        activity_type: Optional[str] = None,
+    ) -> List[Tuple[float, str, str]]:
+        """
+        Rank documents against `query` with BM25.
+        Returns up to `limit` (score, timestamp, activity_type) tuples, best first.
+        """
+        terms = set(tokenize(query))
+        if not terms or not self.docs:
+            return []
+
+        doc_count = len(self.docs)
+        avg_length = self.total_length / doc_count or 1.0
+        scores: Dict[int, float] = {}
+        for term in terms:
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(
+                1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5)
+            )
+            for doc_id, frequency in postings.items():
+                length = self.docs[doc_id][2]
+                norm = frequency + self.k1 * (1 - self.b + self.b * length / avg_length)
+                scores[doc_id] = (
+                    scores.get(doc_id, 0.0) + idf * frequency * (self.k1 + 1) / norm
+                )
+
+        if activity_type is not None:
+            scores = {
+                doc_id: score
+                for doc_id, score in scores.items()
+                if self.docs[doc_id][1] == activity_type
+            }
+
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return [
+            (score, self.docs[doc_id][0], self.docs[doc_id][1])
+            for doc_id, score in best
+        ]
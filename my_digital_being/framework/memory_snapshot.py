@@ -0,0 +1,358 @@
+"""
+Line-oriented memory.json snapshots that can be loaded incrementally.
+
+The snapshot is still one valid JSON object, but it is laid out with one
+top-level section (and one long-term bucket) per line:
+
+    {"layout": "lines", "seq": 123, "counts": {"NapActivity": 40},
+    "results": {"NapActivity": 52},
+    "short_term": [...],
+    "long_term": {
+    "NapActivity": [...]
+    }}
+
+Counts are records per bucket and results the results they hold (a repeat
+run counts every result folded into it). That lets the loader parse the
+header and short_term, record the byte span
+of every long-term bucket without decoding it, and page buckets in on first
+access. Files written by older versions are still loaded with json.load.
+
+Loading and writing also produce a cursor: the file's size and mtime plus
+the span of short_term and of every bucket. Handing it back to
+load_snapshot() (e.g. from a runtime checkpoint) skips the scan entirely as
+long as the file has not changed since.
+"""
+
+import json
+import logging
+import os
+from collections.abc import MutableMapping
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .memory_record import MemoryRecord
+
+logger = logging.getLogger(__name__)
+
+LAYOUT_MARKER = b'{"layout": "lines"'
+_decoder = json.JSONDecoder()
+
+
+class LazyLongTermMemory(MutableMapping):
+    """
+    Mapping of activity_type -> list of entries whose buckets stay on disk
+    until first accessed. Entries appended to an unloaded bucket through
+    add_entry() are buffered, so consolidation never forces a page-in.
+    """
+
+    def __init__(
+        self,
+        loaded: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+        source_file: Optional[Path] = None,
+        spans: Optional[Dict[str, Tuple[int, int, int, int]]] = None,
+    ):
+        self._loaded: Dict[str, List[Dict[str, Any]]] = dict(loaded or {})
+        self._source_file = source_file
+        # activity_type -> (offset, length, count, results) of its line in
+        # source_file
+        self._spans: Dict[str, Tuple[int, int, int, int]] = dict(spans or {})
+        self._pending: Dict[str, List[Dict[str, Any]]] = {}
+
+    def _page_in(self, key: str):
+        offset, length = self._spans.pop(key)[:2]
+        value = _records(_bucket_value(_read_span(self._source_file, offset, length)))
+        value.extend(self._pending.pop(key, []))
+        self._loaded[key] = value
+
+    def __getitem__(self, key: str) -> List[Dict[str, Any]]:
+        if key not in self._loaded and key in self._spans:
+            self._page_in(key)
+        return self._loaded[key]
+
+    def __setitem__(self, key: str, value: List[Dict[str, Any]]):
+        self._spans.pop(key, None)
+        self._pending.pop(key, None)
+        self._loaded[key] = value
+
+    def __delitem__(self, key: str):
+        if key not in self._loaded and key not in self._spans:
+            raise KeyError(key)
+        self._loaded.pop(key, None)
+        self._spans.pop(key, None)
+        self._pending.pop(key, None)
+
+    def __iter__(self) -> Iterator[str]:
+        # Snapshot the keys: reading values while iterating pages buckets in
+        return iter(list(self._loaded) + list(self._spans))
+
+    def __len__(self) -> int:
+        return len(self._loaded) + len(self._spans)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._loaded or key in self._spans
+
+    def add_entry(self, key: str, entry: Dict[str, Any]):
+        """Append an entry to a bucket without paging it in."""
+        if key in self._spans:
+            self._pending.setdefault(key, []).append(entry)
+        else:
+            self._loaded.setdefault(key, []).append(entry)
+
+    def bucket_size(self, key: str) -> int:
+        """Number of entries in a bucket, without paging it in."""
+        if key in self._spans:
+            return self._spans[key][2] + len(self._pending.get(key, []))
+        return len(self._loaded.get(key, []))
+
+    def bucket_results(self, key: str) -> int:
+        """Number of results in a bucket (runs count each), without paging it in."""
+        if key in self._spans:
+            entries, results = self._pending.get(key, []), self._spans[key][3]
+        else:
+            entries, results = self._loaded.get(key, []), 0
+        return results + sum(entry.get("count", 1) for entry in entries)
+
+    def is_loaded(self, key: str) -> bool:
+        return key in self._loaded
+
+    def raw_value(self, key: str) -> bytes:
+        """
+        JSON-encoded bucket. Buckets that were never paged in are copied
+        byte-for-byte from disk (plus buffered entries) instead of being
+        decoded and re-encoded.
+        """
+        if key not in self._spans:
+            return _dumps(self._loaded[key])
+
+        offset, length = self._spans[key][:2]
+        value = _bucket_value(_read_span(self._source_file, offset, length))
+        pending = self._pending.get(key)
+        if not pending:
+            return value
+        extra = b",".join(_dumps(entry) for entry in pending)
+        if value == b"[]":
+            return b"[" + extra + b"]"
+        return value[:-1] + b"," + extra + b"]"
+
+    def rebase(self, source_file: Path, spans: Dict[str, Tuple[int, int, int, int]]):
+        """Point unloaded buckets at their position in a newly written file."""
+        self._source_file = source_file
+        self._spans = spans
+        self._pending = {}
+
+
+def _read_span(path: Path, offset: int, length: int) -> bytes:
+    with open(path, "rb") as f:
+        f.seek(offset)
+        return f.read(length)
+
+
+def _bucket_value(line: bytes) -> bytes:
+    """Strip the `"key": ` prefix and trailing comma from a bucket line."""
+    key_end = _bucket_key(line)[1]
+    return line[key_end:].strip().lstrip(b":").rstrip(b",").strip()
+
+
+def _bucket_key(line: bytes) -> Tuple[str, int]:
+    """Decode the JSON key at the start of a line without decoding the value."""
+    colon = line.find(b'":')
+    if colon != -1:
+        try:
+            key, end = _decoder.raw_decode(line[: colon + 1].decode("utf-8"))
+            return key, colon + 1
+        except ValueError:
+            pass  # Escaped '":' inside the key itself; decode the slow way
+    text = line.decode("utf-8")
+    key, end = _decoder.raw_decode(text)
+    return key, len(text[:end].encode("utf-8"))
+
+
+def _scan_lines(
+    f, offset: int, head_size: int = 4096, chunk_size: int = 1 << 20
+) -> Iterator[Tuple[int, int, bytes]]:
+    """
+    Yield (offset, length, head) for every line from the current position,
+    reading fixed-size chunks so a multi-megabyte bucket line is never held in
+    memory. `head` holds at most the first `head_size` bytes of the line.
+    """
+    line_start, head = offset, b""
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            if line_start < offset:
+                yield line_start, offset - line_start, head
+            return
+        pos = 0
+        while pos < len(chunk):
+            newline = chunk.find(b"\n", pos)
+            end = len(chunk) if newline == -1 else newline + 1
+            if len(head) < head_size:
+                head += chunk[pos : min(end, pos + head_size - len(head))]
+            if newline == -1:
+                break
+            yield line_start, offset + end - line_start, head
+            line_start, head, pos = offset + end, b"", end
+        offset += len(chunk)
+
+
+def _cursor(
+    memory_file: Path,
+    seq: int,
+    short_term_span: Tuple[int, int],
+    spans: Dict[str, Tuple[int, int, int, int]],
+) -> Dict[str, Any]:
+    stat = os.stat(memory_file)
+    return {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "seq": seq,
+        "short_term": list(short_term_span),
+        "spans": {key: list(span) for key, span in spans.items()},
+    }
+
+
+def _load_at_cursor(
+    memory_file: Path, cursor: Dict[str, Any]
+) -> Optional[Tuple[int, List[Dict[str, Any]], LazyLongTermMemory]]:
+    """Load through a cursor, or None if the file changed since it was taken."""
+    try:
+        stat = os.stat(memory_file)
+        if (stat.st_size, stat.st_mtime_ns) != (cursor["size"], cursor["mtime_ns"]):
+            return None
+        offset, length = cursor["short_term"]
+        # Cursors from before results were tracked hold (offset, length, count)
+        spans = {
+            key: tuple(span) if len(span) == 4 else (*span, span[2])
+            for key, span in cursor["spans"].items()
+        }
+        seq = int(cursor["seq"])
+        line = _read_span(memory_file, offset, length)
+        short_term = _records(_bucket_value(line))
+    except (OSError, KeyError, TypeError, ValueError):
+        return None  # Scan the file instead
+    return seq, short_term, LazyLongTermMemory(source_file=memory_file, spans=spans)
+
+
+def load_snapshot(
+    memory_file: Path,
+    cursor: Optional[Dict[str, Any]] = None,
+) -> Optional[Tuple[int, List[Dict[str, Any]], LazyLongTermMemory, Dict[str, Any]]]:
+    """
+    Load (seq, short_term, long_term, cursor) from a line-layout snapshot,
+    leaving long-term buckets on disk. A still-valid `cursor` from an earlier
+    load or write is used instead of scanning the file. Returns None if the
+    file uses the legacy layout.
+    """
+    if cursor:
+        loaded = _load_at_cursor(memory_file, cursor)
+        if loaded:
+            return (*loaded, cursor)
+
+    with open(memory_file, "rb") as f:
+        header = f.readline()
+        if not header.startswith(LAYOUT_MARKER):
+            return None
+        meta = json.loads(header.rstrip().rstrip(b",") + b"}")
+        counts = meta.get("counts", {})
+        results = meta.get("results", counts)
+
+        short_term: List[Dict[str, Any]] = []
+        short_term_span = (0, 0)
+        spans: Dict[str, Tuple[int, int, int, int]] = {}
+        in_long_term = False
+        for offset, length, head in _scan_lines(f, len(header)):
+            if in_long_term and head.startswith(b'"'):
+                try:
+                    key, _ = _bucket_key(head)
+                except ValueError:  # Key longer than the scanned head
+                    key, _ = _bucket_key(_read_span(memory_file, offset, length))
+                count = counts.get(key, 0)
+                spans[key] = (offset, length, count, results.get(key, count))
+            elif head.startswith(b'"short_term":'):
+                line = _read_span(memory_file, offset, length)
+                short_term = _records(_bucket_value(line))
+                short_term_span = (offset, length)
+            elif head.startswith(b'"long_term":'):
+                in_long_term = True
+
+    seq = meta.get("seq", 0)
+    return (
+        seq,
+        short_term,
+        LazyLongTermMemory(source_file=memory_file, spans=spans),
+        _cursor(memory_file, seq, short_term_span, spans),
+    )
+
+
+def write_snapshot(
+    memory_file: Path,
+    seq: int,
+    short_term: List[Dict[str, Any]],
+    long_term: LazyLongTermMemory,
+) -> Dict[str, Any]:
+    """
+    Atomically write a line-layout snapshot and return its cursor. The temp
+    file and its directory are fsynced around the rename, so once this
+    returns the snapshot is durable and the journal may be emptied.
+    """
+    counts = {key: long_term.bucket_size(key) for key in long_term}
+    results = {key: long_term.bucket_results(key) for key in long_term}
+    header = json.dumps(
+        {"layout": "lines", "seq": seq, "counts": counts, "results": results}
+    )
+
+    temp_file = memory_file.with_suffix(".json.tmp")
+    new_spans: Dict[str, Tuple[int, int, int, int]] = {}
+    all_spans: Dict[str, Tuple[int, int, int, int]] = {}
+    with open(temp_file, "wb") as out:
+        out.write(header[:-1].encode("utf-8") + b",\n")
+        line = b'"short_term": ' + _dumps(short_term) + b",\n"
+        short_term_span = (out.tell(), len(line))
+        out.write(line)
+        out.write(b'"long_term": {\n')
+
+        keys = list(long_term)
+        for i, key in enumerate(keys):
+            separator = b",\n" if i < len(keys) - 1 else b"\n"
+            line = _dumps(key) + b": " + long_term.raw_value(key) + separator
+            all_spans[key] = (out.tell(), len(line), counts[key], results[key])
+            if not long_term.is_loaded(key):
+                new_spans[key] = all_spans[key]
+            out.write(line)
+
+        out.write(b"}}\n")
+        out.flush()
+        os.fsync(out.fileno())
+
+    temp_file.replace(memory_file)
+    _fsync_dir(memory_file.parent)
+    long_term.rebase(memory_file, new_spans)
+    return _cursor(memory_file, seq, short_term_span, all_spans)
+
+
+def _fsync_dir(directory: Path):
+    """Make a rename inside `directory` durable (a no-op where unsupported)."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return  # e.g. Windows, where directories cannot be opened
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _records(raw: bytes) -> List[MemoryRecord]:
+    return [MemoryRecord.from_dict(entry) for entry in json.loads(raw)]
+
+
+def _dumps(value: Any) -> bytes:
+    return json.dumps(value, separators=(",", ":"), default=_to_dict).encode("utf-8")
+
+
+def _to_dict(value: Any) -> Dict[str, Any]:
+    if isinstance(value, MemoryRecord):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
@@ -0,0 +1,409 @@
+"""SQLite storage backend for Memory with indexed lookups."""
+
+import json
+import logging
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS memories (
+    seq INTEGER PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    activity_type TEXT NOT NULL,
+    success INTEGER NOT NULL,
+    error TEXT,
+    data TEXT,
+    metadata TEXT,
+    duration REAL,
+    count INTEGER NOT NULL DEFAULT 1,
+    last_seen TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_memories_timestamp ON memories (timestamp);
+CREATE INDEX IF NOT EXISTS idx_memories_type_timestamp
+    ON memories (activity_type, timestamp);
+CREATE INDEX IF NOT EXISTS idx_memories_success_timestamp
+    ON memories (success, timestamp);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class SqliteMemoryStore:
+    """
+    Stores memory records in a WAL-mode SQLite database.
+
+    Records are keyed by their sequence number and indexed on timestamp,
+    activity_type and success, so type/time/outcome lookups stay logarithmic
+    no matter how large the history grows.
+    """
+
+    def __init__(self, db_file: Path):
+        self.db_file = Path(db_file)
+        self._conn = sqlite3.connect(str(self.db_file), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        columns = {
+            row["name"] for row in self._conn.execute("PRAGMA table_info(memories)")
+        }
+        if "duration" not in columns:  # Databases created before durations
+            self._conn.execute("ALTER TABLE memories ADD COLUMN duration REAL")
+        if "count" not in columns:  # ... and before repeat runs
+            self._conn.execute(
+                "ALTER TABLE memories ADD COLUMN count INTEGER NOT NULL DEFAULT 1"
+            )
+            self._conn.execute("ALTER TABLE memories ADD COLUMN last_seen TEXT")
+        self._conn.commit()
+
+    @staticmethod
+    def _to_row(seq: int, entry: Dict[str, Any]) -> Tuple:
+        return (
+            seq,
+            entry["timestamp"],
+            entry.get("activity_type", "Unknown"),
+            1 if entry.get("success") else 0,
+            entry.get("error"),
+            json.dumps(entry.get("data")),
+            json.dumps(entry.get("metadata", {})),
+            entry.get("duration"),
+            entry.get("count", 1),
+            entry.get("last_seen"),
+        )
+
+    @staticmethod
+    def _from_row(row: sqlite3.Row) -> Dict[str, Any]:
+        entry = {
+            "timestamp": row["timestamp"],
+            "activity_type": row["activity_type"],
+            "success": bool(row["success"]),
+            "error": row["error"],
+            "data": json.loads(row["data"]) if row["data"] is not None else None,
+            "metadata": json.loads(row["metadata"]) if row["metadata"] else {},
+            "duration": row["duration"],
+        }
+        if row["count"] > 1:
+            entry["count"] = row["count"]
+            entry["last_seen"] = row["last_seen"]
+        return entry
+
+    def append(self, seq: int, entry: Dict[str, Any]):
+        """Insert a single record."""
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO memories VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                self._to_row(seq, entry),
+            )
+
+    def update_repeat(
+        self,
+        activity_type: str,
+        timestamp: str,
+        count: int,
+        last_seen: str,
+        duration: Optional[float],
+    ):
+        """
+        Set the run length and mean duration of the record stored for
+        (activity_type, timestamp).
+        """
+        with self._conn:
+            self._conn.execute(
+                "UPDATE memories SET count = ?, last_seen = ?, duration = ? "
+                "WHERE activity_type = ? AND timestamp = ?",
+                (count, last_seen, duration, activity_type, timestamp),
+            )
+
+    def append_many(
+        self, records: Iterable[Tuple[int, Dict[str, Any]]], batch_size: int = 1000
+    ) -> int:
+        """Bulk insert (seq, entry) pairs in batched transactions."""
+        inserted = 0
+        batch = []
+        for seq, entry in records:
+            batch.append(self._to_row(seq, entry))
+            if len(batch) >= batch_size:
+                inserted += self._insert_batch(batch)
+                batch = []
+        if batch:
+            inserted += self._insert_batch(batch)
+        return inserted
+
+    def _insert_batch(self, rows: List[Tuple]) -> int:
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO memories VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        return len(rows)
+
+    def _where(
+        self,
+        activity_type: Union[str, Iterable[str], None] = None,
+        success: Optional[bool] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        min_seq: Optional[int] = None,
+        max_seq: Optional[int] = None,
+    ) -> Tuple[str, List[Any]]:
+        clauses, params = [], []
+        if activity_type is not None:
+            types = (
+                [activity_type]
+                if isinstance(activity_type, str)
+                else list(activity_type)
+            )
+            clauses.append(f"activity_type IN ({', '.join('?' * len(types))})")
+            params.extend(types)
+        if success is not None:
+            clauses.append("success = ?")
+            params.append(1 if success else 0)
+        if since is not None:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("timestamp < ?")
+            params.append(until)
+        if min_seq is not None:
+            clauses.append("seq >= ?")
+            params.append(min_seq)
+        if max_seq is not None:
+            clauses.append("seq <= ?")
+            params.append(max_seq)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return where, params
+
+    def query(
+        self,
+        activity_type: Union[str, Iterable[str], None] = None,
+        success: Optional[bool] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        min_seq: Optional[int] = None,
+        max_seq: Optional[int] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        newest_first: bool = True,
+    ) -> List[Dict[str, Any]]:
+        """
+        Fetch records filtered by type(s), success and a [since, until) ISO
+        timestamp range, ordered by time.
+        """
+        where, params = self._where(
+            activity_type, success, since, until, min_seq, max_seq
+        )
+        order = "DESC" if newest_first else "ASC"
+        sql = f"SELECT * FROM memories{where} ORDER BY timestamp {order}, seq {order}"
+        if limit is not None or offset:
+            sql += " LIMIT ? OFFSET ?"
+            params.extend([-1 if limit is None else limit, offset])
+        return [self._from_row(row) for row in self._conn.execute(sql, params)]
+
+    def iter_query(
+        self,
+        activity_type: Union[str, Iterable[str], None] = None,
+        success: Optional[bool] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        newest_first: bool = True,
+        batch_size: int = 1000,
+    ) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Stream (seq, entry) pairs matching the query() filters in time order,
+        so callers that filter further can stop reading early.
+        """
+        where, params = self._where(activity_type, success, since, until)
+        order = "DESC" if newest_first else "ASC"
+        cursor = self._conn.execute(
+            f"SELECT * FROM memories{where} ORDER BY timestamp {order}, seq {order}",
+            params,
+        )
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield row["seq"], self._from_row(row)
+
+    def page(
+        self,
+        before: Optional[Tuple[str, int]] = None,
+        activity_type: Union[str, Iterable[str], None] = None,
+        limit: int = 50,
+    ) -> List[Tuple[int, Dict[str, Any]]]:
+        """
+        Keyset pagination, newest first: up to `limit` (seq, entry) pairs
+        ordered before the (timestamp, seq) key `before`. Uses the timestamp
+        index, so every page costs the same however deep it is.
+        """
+        where, params = self._where(activity_type)
+        if before is not None:
+            clause = "(timestamp < ? OR (timestamp = ? AND seq < ?))"
+            where = f"{where} AND {clause}" if where else f" WHERE {clause}"
+            params.extend([before[0], before[0], before[1]])
+        sql = f"SELECT * FROM memories{where} ORDER BY timestamp DESC, seq DESC LIMIT ?"
+        params.append(limit)
+        return [
+            (row["seq"], self._from_row(row)) for row in self._conn.execute(sql, params)
+        ]
+
+    def iter_records(
+        self,
+        activity_type: Union[str, Iterable[str], None] = None,
+        success: Optional[bool] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        min_seq: Optional[int] = None,
+        max_seq: Optional[int] = None,
+        batch_size: int = 1000,
+    ) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Stream (seq, entry) pairs in sequence order without loading them all."""
+        where, params = self._where(
+            activity_type, success, since, until, min_seq, max_seq
+        )
+        cursor = self._conn.execute(
+            f"SELECT * FROM memories{where} ORDER BY seq ASC", params
+        )
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield row["seq"], self._from_row(row)
+
+    def delete(
+        self,
+        activity_type: Union[str, Iterable[str], None] = None,
+        success: Optional[bool] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        min_seq: Optional[int] = None,
+        max_seq: Optional[int] = None,
+    ) -> int:
+        """Delete records matching the same filters as query()."""
+        where, params = self._where(
+            activity_type, success, since, until, min_seq, max_seq
+        )
+        with self._conn:
+            return self._conn.execute(f"DELETE FROM memories{where}", params).rowcount
+
+    def delete_seqs(self, seqs: Iterable[int], batch_size: int = 500) -> int:
+        """Delete records by sequence number."""
+        seqs = list(seqs)
+        deleted = 0
+        with self._conn:
+            for i in range(0, len(seqs), batch_size):
+                batch = seqs[i : i + batch_size]
+                deleted += self._conn.execute(
+                    f"DELETE FROM memories WHERE seq IN ({', '.join('?' * len(batch))})",
+                    batch,
+                ).rowcount
+        return deleted
+
+    def resequence(self, first_seq: int = 1) -> int:
+        """
+        Renumber every record in (timestamp, seq) order starting at
+        `first_seq`, so sequence order is time order again after records were
+        inserted out of order. Returns the new maximum sequence number.
+        """
+        with self._conn:
+            self._conn.execute(
+                "CREATE TEMP TABLE resequence "
+                "(old_seq INTEGER PRIMARY KEY, new_seq INTEGER NOT NULL)"
+            )
+            self._conn.execute(
+                "INSERT INTO resequence SELECT seq, ? - 1 + ROW_NUMBER() "
+                "OVER (ORDER BY timestamp, seq) FROM memories",
+                (first_seq,),
+            )
+            # Through negative numbers so no two rows share a seq in between
+            self._conn.execute("UPDATE memories SET seq = -seq")
+            self._conn.execute(
+                "UPDATE memories SET seq = "
+                "(SELECT new_seq FROM resequence WHERE old_seq = -memories.seq)"
+            )
+            self._conn.execute("DROP TABLE resequence")
+        return self.max_seq()
+
+    def count(
+        self,
+        activity_type: Union[str, Iterable[str], None] = None,
+        success: Optional[bool] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        min_seq: Optional[int] = None,
+        max_seq: Optional[int] = None,
+    ) -> int:
+        """Count records matching the same filters as query()."""
+        where, params = self._where(
+            activity_type, success, since, until, min_seq, max_seq
+        )
+        return self._conn.execute(
+            f"SELECT COUNT(*) FROM memories{where}", params
+        ).fetchone()[0]
+
+    def count_results(self) -> int:
+        """Number of stored results, counting every result of a repeat run."""
+        return self._conn.execute(
+            "SELECT COALESCE(SUM(count), 0) FROM memories"
+        ).fetchone()[0]
+
+    def max_seq(self) -> int:
+        """Sequence number of the newest record, or 0 if empty."""
+        return self._conn.execute(
+            "SELECT COALESCE(MAX(seq), 0) FROM memories"
+        ).fetchone()[0]
+
+    def get_meta(self, key: str, default: Any = None) -> Any:
+        row = self._conn.execute(
+            "SELECT value FROM meta WHERE key = ?", (key,)
+        ).fetchone()
+        return json.loads(row["value"]) if row else default
+
+    def set_meta(self, key: str, value: Any):
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, json.dumps(value))
+            )
+
+    def checkpoint(self):
+        """Fold the WAL back into the main database file."""
+        self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def clear(self):
+        with self._conn:
+            self._conn.execute("DELETE FROM memories")
+            self._conn.execute("DELETE FROM meta")
+
+    def close(self):
+        self.checkpoint()
+        self._conn.close()
+
+
+def migrate_json_memory(
+    short_term: List[Dict[str, Any]],
+    long_term: Dict[str, List[Dict[str, Any]]],
+    store: SqliteMemoryStore,
+) -> int:
+    """
+    Copy memory.json contents into a SQLite store.
+    Long-term buckets are merged back into a single time-ordered sequence ahead
+    of the short-term entries. Returns the sequence number of the first
+    short-term record so the caller can restore the short/long split.
+    """
+    long_term_entries = sorted(
+        (entry for entries in long_term.values() for entry in entries),
+        key=lambda x: x["timestamp"],
+    )
+    ordered = long_term_entries + list(short_term)
+    store.append_many(enumerate(ordered, start=1))
+    logger.info(
+        f"Migrated {len(ordered)} memory records "
+        f"({len(long_term_entries)} long-term) into {store.db_file}"
+    )
+    return len(long_term_entries) + 1
@@ -0,0 +1,327 @@
+"""
+Rolling hour/day/week summaries of memory.
+
+Every closed UTC window (an hour, a day, or a week starting on Monday) is
+summarized once and cached in memory.summaries.json. Hours are summarized
+from raw records; days from their hours and weeks from their days
+(map-reduce), so a coarse summary never re-reads raw logs. A summary of an
+arbitrary range covers it with the largest cached windows that fit and
+reduces those.
+
+Windows are always built with the offline ExtractiveSummarizer; the
+summarizer passed by the caller only writes the final reduce. A cold summary
+of a week therefore costs one model call with LLMSummarizer, not one per
+hour and day.
+
+Summarizers are objects with a `name` and an async
+`summarize(level, items, counts) -> str`, where `items` are record lines (hour
+level) or child summaries, and `counts` maps activity type to
+[successes, failures]. ExtractiveSummarizer works offline; LLMSummarizer wraps
+a chat completion function such as chat_skill.get_chat_completion.
+"""
+
+import json
+import logging
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .memory_columns import BUCKET_SECONDS, bucket_starts, to_epoch
+
+logger = logging.getLogger(__name__)
+
+LEVELS = ("hour", "day", "week")
+CHILD_LEVEL = {"day": "hour", "week": "day"}
+HIGHLIGHTS = {"hour": 3, "day": 5, "week": 7, "range": 7}
+# Hour summaries are only read while their day is being built, and for
+# ranges that start or end mid-day
+HOUR_CACHE_SECONDS = 14 * 86400
+
+Counts = Dict[str, List[int]]
+
+
+def _iso(epoch: int) -> str:
+    return datetime.fromtimestamp(epoch, timezone.utc).isoformat()
+
+
+def _window_start(epoch: int, level: str) -> int:
+    return bucket_starts(epoch, epoch + 1, level)[0]
+
+
+def _merge_counts(target: Counts, counts: Counts):
+    for activity_type, (successes, failures) in counts.items():
+        current = target.setdefault(activity_type, [0, 0])
+        current[0] += successes
+        current[1] += failures
+
+
+def describe_counts(counts: Counts) -> str:
+    """'12 activities: NapActivity x5, DrawActivity x4 (1 failed), ...'"""
+    total = sum(s + f for s, f in counts.values())
+    if not total:
+        return "No activities."
+    parts = []
+    for activity_type, (successes, failures) in sorted(
+        counts.items(), key=lambda item: -sum(item[1])
+    ):
+        part = f"{activity_type} x{successes + failures}"
+        if failures:
+            part += f" ({failures} failed)"
+        parts.append(part)
+    return f"{total} activities: {', '.join(parts)}"
+
+
+def record_line(entry: Dict[str, Any]) -> str:
+    """One-line rendering of a record used as summarizer input."""
+    outcome = "ok" if entry["success"] else f"failed: {entry.get('error')}"
+    data = json.dumps(entry.get("data"), default=str, separators=(",", ":"))
+    when = entry["timestamp"][:16].replace("T", " ")
+    count = entry.get("count", 1)
+    if count > 1:
+        outcome += f" x{count} until {entry['last_seen'][11:16]}"
+    return f"{when} {entry['activity_type']} {outcome} {data[:160]}"
+
+
+class ExtractiveSummarizer:
+    """Counts per type plus a few representative lines; no model calls."""
+
+    name = "extractive"
+
+    async def summarize(self, level: str, items: List[str], counts: Counts) -> str:
+        candidates = []
+        for item in items:
+            bullets = [line[2:] for line in item.splitlines() if line.startswith("- ")]
+            candidates.extend(bullets or [item.strip()])
+        # Failures first, then in order; no repeats
+        ordered = [c for c in candidates if "failed" in c] + [
+            c for c in candidates if "failed" not in c
+        ]
+        highlights = []
+        for candidate in ordered:
+            candidate = candidate[:200]
+            if candidate and candidate not in highlights:
+                highlights.append(candidate)
+            if len(highlights) >= HIGHLIGHTS.get(level, 5):
+                break
+        lines = [describe_counts(counts)] + [f"- {h}" for h in highlights]
+        return "\n".join(lines)
+
+
+class LLMSummarizer:
+    """
+    Summarizes through a chat completion function returning the chat skill's
+    {"success", "data": {"content"}} shape. Inputs too short to be worth a
+    model call, and failed completions, go through the extractive summarizer.
+    """
+
+    name = "llm"
+
+    def __init__(
+        self,
+        complete: Callable[..., Awaitable[Dict[str, Any]]],
+        max_tokens: int = 200,
+        min_chars: int = 1200,
+        max_input_chars: int = 8000,
+    ):
+        self.complete = complete
+        self.max_tokens = max_tokens
+        self.min_chars = min_chars
+        self.max_input_chars = max_input_chars
+        self.fallback = ExtractiveSummarizer()
+
+    async def summarize(self, level: str, items: List[str], counts: Counts) -> str:
+        text = "\n".join(items)
+        if len(text) < self.min_chars:
+            return await self.fallback.summarize(level, items, counts)
+        prompt = (
+            f"Summarize these notes on one {level} of a digital being's "
+            f"activities in a short paragraph. Keep concrete outcomes, failures "
+            f"and anything created or posted.\n"
+            f"Totals: {describe_counts(counts)}\n\n{text[: self.max_input_chars]}"
+        )
+        try:
+            response = await self.complete(
+                prompt=prompt,
+                system_prompt="You write concise activity summaries.",
+                max_tokens=self.max_tokens,
+            )
+            if response.get("success"):
+                return response["data"]["content"].strip()
+            logger.warning(f"Summary completion failed: {response.get('error')}")
+        except Exception as e:
+            logger.error(f"Summary completion failed: {e}")
+        return await self.fallback.summarize(level, items, counts)
+
+
+class MemorySummaries:
+    """Cache of window summaries plus the map-reduce that fills it."""
+
+    def __init__(
+        self,
+        cache_file: Path,
+        fetch: Callable[[str, str], Iterable[Dict[str, Any]]],
+    ):
+        """
+        :param cache_file: JSON file holding the cached window summaries.
+        :param fetch: Returns the records in an ISO [since, until) range.
+        """
+        self.cache_file = Path(cache_file)
+        self.fetch = fetch
+        # Builds every cached window; only the final reduce uses the caller's
+        self.window_summarizer = ExtractiveSummarizer()
+        self._cache: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+        try:
+            if self.cache_file.exists():
+                with open(self.cache_file, "r") as f:
+                    self._cache = json.load(f)
+        except Exception as e:
+            logger.error(f"Failed to load memory summaries: {e}")
+
+    async def summarize(
+        self, since: int, until: int, now: int, summarizer
+    ) -> Dict[str, Any]:
+        """
+        Summary of [since, until) in epoch seconds; windows closed by `now`.
+        `summarizer` is called once, to reduce the covering windows.
+        """
+        pieces = []
+        # Nothing is stored past the current second
+        for level, start, end in self._cover(since, min(until, now + 1), now):
+            if level is None:
+                pieces.append(
+                    await self._summarize_raw(
+                        start, end, "hour", self.window_summarizer
+                    )
+                )
+            else:
+                pieces.append(await self._window(level, start))
+        summary = await self._reduce("range", since, until, pieces, summarizer)
+        self._prune(now)
+        self.save()
+        return summary
+
+    @staticmethod
+    def _cover(
+        since: int, until: int, now: int
+    ) -> List[Tuple[Optional[str], int, int]]:
+        """
+        Split [since, until) into the largest aligned windows that fit and are
+        closed by `now`, as (level, start, end); level None marks a partial or
+        still open hour read raw.
+        """
+        pieces = []
+        position = since
+        while position < until:
+            for level in reversed(LEVELS):
+                width = BUCKET_SECONDS[level]
+                if _window_start(
+                    position, level
+                ) == position and position + width <= min(until, now):
+                    pieces.append((level, position, position + width))
+                    position += width
+                    break
+            else:
+                end = min(_window_start(position, "hour") + 3600, until)
+                pieces.append((None, position, end))
+                position = end
+        return pieces
+
+    def _key(self, level: str, start: int) -> str:
+        return f"{self.window_summarizer.name}|{level}|{start}"
+
+    async def _window(self, level: str, start: int) -> Dict[str, Any]:
+        """Summary of a closed window, from the cache or built from its children."""
+        key = self._key(level, start)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+        end = start + BUCKET_SECONDS[level]
+        summarizer = self.window_summarizer
+        if level == "hour":
+            summary = await self._summarize_raw(start, end, level, summarizer)
+        else:
+            child = CHILD_LEVEL[level]
+            children = [
+                await self._window(child, child_start)
+                for child_start in range(start, end, BUCKET_SECONDS[child])
+            ]
+            summary = await self._reduce(level, start, end, children, summarizer)
+        self._cache[key] = summary
+        self._dirty = True
+        return summary
+
+    async def _summarize_raw(
+        self, start: int, end: int, level: str, summarizer
+    ) -> Dict[str, Any]:
+        counts: Counts = {}
+        lines = []
+        for entry in self.fetch(_iso(start), _iso(end)):
+            current = counts.setdefault(entry["activity_type"], [0, 0])
+            current[0 if entry["success"] else 1] += entry.get("count", 1)
+            lines.append(record_line(entry))
+        text = await summarizer.summarize(level, lines, counts) if lines else ""
+        return self._summary(level, start, end, counts, text)
+
+    async def _reduce(
+        self, level: str, start: int, end: int, children: List[Dict], summarizer
+    ) -> Dict[str, Any]:
+        counts: Counts = {}
+        for child in children:
+            _merge_counts(counts, child["counts"])
+        texts = [child["text"] for child in children if child["text"]]
+        if len(texts) == 1 and level == "range":
+            text = texts[0]  # Nothing to combine
+        else:
+            text = await summarizer.summarize(level, texts, counts) if texts else ""
+        return self._summary(level, start, end, counts, text)
+
+    @staticmethod
+    def _summary(
+        level: str, start: int, end: int, counts: Counts, text: str
+    ) -> Dict[str, Any]:
+        return {
+            "level": level,
+            "since": _iso(start),
+            "until": _iso(end),
+            "count": sum(s + f for s, f in counts.values()),
+            "counts": counts,
+            "text": text,
+        }
+
+    def _prune(self, now: int):
+        """
+        Drop old hour summaries whose day is cached (a day is never rebuilt
+        once cached), and windows cached by other summarizers, which earlier
+        versions built per summarizer.
+        """
+        prefix = f"{self.window_summarizer.name}|"
+        for key, summary in list(self._cache.items()):
+            if not key.startswith(prefix):
+                del self._cache[key]
+                self._dirty = True
+            elif (
+                summary["level"] == "hour"
+                and now - to_epoch(summary["since"]) > HOUR_CACHE_SECONDS
+            ):
+                day = _window_start(to_epoch(summary["since"]), "day")
+                if self._key("day", day) in self._cache:
+                    del self._cache[key]
+                    self._dirty = True
+
+    def save(self):
+        if not self._dirty:
+            return
+        try:
+            temp_file = self.cache_file.with_suffix(".json.tmp")
+            with open(temp_file, "w") as f:
+                json.dump(self._cache, f)
+            temp_file.replace(self.cache_file)
+            self._dirty = False
+        except Exception as e:
+            logger.error(f"Failed to save memory summaries: {e}")
+
+    def clear(self):
+        self._cache = {}
+        self._dirty = False
+        self.cache_file.unlink(missing_ok=True)
@@ -0,0 +1,382 @@
+"""
+Offline semantic recall for Memory: hashed embeddings in a memory-mapped matrix.
+
+Records are embedded with a hashing vectorizer (words, word bigrams and word
+prefixes hashed into a fixed number of signed dimensions), so no model or
+network access is needed. Vectors are L2-normalized float32 rows appended to
+memory.vectors.f32; cosine similarity is then a plain dot product.
+
+The matrix is memory-mapped with NumPy and scored in batched dot products,
+so only rows not yet saved are resident; large histories get an IVF
+(inverted file) partitioning that only scores the rows in the clusters
+closest to the query.
+"""
+
+import json
+import logging
+import math
+import re
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from .memory_search import record_text, tokenize
+
+logger = logging.getLogger(__name__)
+
+DIMENSIONS = 512
+_CAMEL_CASE = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+
+
+def embed(text: str) -> Dict[int, float]:
+    """
+    Hash `text` into a sparse, L2-normalized vector {dimension: weight}.
+    Prefix features let inflections ("drawing", "drawings") share a dimension.
+    """
+    tokens = tokenize(text)
+    features = [(token, 1.0) for token in tokens]
+    features += [(f"{a} {b}", 1.0) for a, b in zip(tokens, tokens[1:])]
+    features += [(f"{token[:4]}~", 0.5) for token in tokens if len(token) > 4]
+
+    vector: Dict[int, float] = {}
+    for feature, weight in features:
+        h = zlib.crc32(feature.encode("utf-8"))
+        dimension = h % DIMENSIONS
+        vector[dimension] = vector.get(dimension, 0.0) + (
+            weight if h & 0x80000000 else -weight
+        )
+
+    norm = math.sqrt(sum(value * value for value in vector.values()))
+    if not norm:
+        return {}
+    return {dimension: value / norm for dimension, value in vector.items() if value}
+
+
+def embed_record(entry: Dict[str, Any]) -> Dict[int, float]:
+    """Embed a record's activity type (e.g. "Draw" from DrawActivity) plus its content."""
+    activity_type = entry.get("activity_type") or ""
+    type_words = _CAMEL_CASE.sub(" ", activity_type.replace("Activity", "")).replace(
+        "_", " "
+    )
+    return embed(f"{type_words} {record_text(entry)}")
+
+
+class MemoryVectorIndex:
+    """
+    Append-only matrix of record embeddings, one row per record.
+
+    Rows are written to `<base>.f32` when the index is saved; the sidecar
+    `<base>.meta` (JSON) holds the row count, the (timestamp, activity_type) of each
+    row and the memory sequence number the index covers. A torn append is
+    ignored because only the recorded row count is mapped. Rows of removed
+    records are marked deleted and skipped by searches; the matrix is
+    rewritten without them once they make up half of its rows.
+    """
+
+    def __init__(
+        self,
+        base_path: Path,
+        ivf_threshold: int = 200_000,
+        nprobe: int = 8,
+        flush_rows: int = 1000,
+    ):
+        """
+        :param base_path: Path prefix for the .f32 matrix, .meta and .ivf files.
+        :param flush_rows: Unsaved rows after which add() appends them to disk.
+        :param ivf_threshold: Row count from which searches use IVF
+            partitioning; below it every row is scored.
+        :param nprobe: Number of IVF clusters scored per query.
+        """
+        base_path = Path(base_path)
+        self.matrix_file = base_path.parent / f"{base_path.name}.f32"
+        self.meta_file = base_path.parent / f"{base_path.name}.meta"
+        self.ivf_file = base_path.parent / f"{base_path.name}.ivf.npz"
+        self.ivf_threshold = ivf_threshold
+        self.nprobe = nprobe
+        self.flush_rows = flush_rows
+
+        self.docs: List[Tuple[str, str]] = []  # row -> (timestamp, activity_type)
+        self.deleted: Set[int] = set()  # Rows of removed records
+        self.indexed_seq = 0  # Memory sequence number covered by the index
+        self._saved_rows = 0  # Rows already written to matrix_file
+        self._mapped = None  # np.memmap over the saved rows
+        self._pending: List[Dict[int, float]] = []  # Sparse rows not yet written
+        self._centroids = None  # IVF state
+        self._assignments = None
+
+    @property
+    def last_timestamp(self) -> Optional[str]:
+        return self.docs[-1][0] if self.docs else None
+
+    def load(self) -> bool:
+        """Load the persisted index. Returns False if it is missing or unreadable."""
+        try:
+            if not self.meta_file.exists():
+                return False
+            with open(self.meta_file, "r") as f:
+                meta = json.load(f)
+            if meta["dimensions"] != DIMENSIONS:
+                return False
+            self.docs = [tuple(doc) for doc in meta["docs"]]
+            self.deleted = set(meta.get("deleted", []))
+            self.indexed_seq = meta["indexed_seq"]
+            self._saved_rows = meta["rows"]
+            self._map_matrix()
+            self._load_ivf()
+            return True
+        except Exception as e:
+            logger.error(f"Failed to load vector index, it will be rebuilt: {e}")
+            self.clear()
+            return False
+
+    def _map_matrix(self):
+        """Map the first _saved_rows rows of the matrix file."""
+        self._mapped = None
+        if not self._saved_rows:
+            return
+        self._mapped = np.memmap(
+            self.matrix_file,
+            dtype=np.float32,
+            mode="r",
+            shape=(self._saved_rows, DIMENSIONS),
+        )
+
+    def save(self):
+        """Append pending rows to the matrix file and rewrite the sidecar."""
+        if self._pending:
+            with open(
+                self.matrix_file, "r+b" if self.matrix_file.exists() else "wb"
+            ) as f:
+                f.seek(self._saved_rows * DIMENSIONS * 4)
+                for vector in self._pending:
+                    f.write(self._dense(vector).tobytes())
+                f.truncate()
+            self._saved_rows += len(self._pending)
+            self._pending = []
+            self._map_matrix()
+
+        meta = {
+            "dimensions": DIMENSIONS,
+            "rows": self._saved_rows,
+            "docs": self.docs,
+            "deleted": sorted(self.deleted),
+            "indexed_seq": self.indexed_seq,
+        }
+        temp_file = self.meta_file.with_suffix(".tmp")
+        with open(temp_file, "w") as f:
+            json.dump(meta, f, separators=(",", ":"))
+        temp_file.replace(self.meta_file)
+        if self._centroids is not None:
+            np.savez(
+                self.ivf_file,
+                centroids=self._centroids,
+                assignments=self._assignments,
+            )
+
+    def clear(self):
+        self.docs = []
+        self.deleted = set()
+        self.indexed_seq = 0
+        self._saved_rows = 0
+        self._mapped = None
+        self._pending = []
+        self._centroids = None
+        self._assignments = None
+
+    def delete(self):
+        """Clear the index and remove its files."""
+        self.clear()
+        for path in (self.matrix_file, self.meta_file, self.ivf_file):
+            path.unlink(missing_ok=True)
+
+    @staticmethod
+    def _dense(vector: Dict[int, float]):
+        dense = np.zeros(DIMENSIONS, dtype=np.float32)
+        for dimension, value in vector.items():
+            dense[dimension] = value
+        return dense
+
+    def add(self, entry: Dict[str, Any]):
+        """Embed and append a single record."""
+        vector = embed_record(entry)
+        self.docs.append((entry["timestamp"], entry["activity_type"]))
+        self._pending.append(vector)
+        if self._centroids is not None:
+            self._assignments = np.append(
+                self._assignments, self._nearest_centroid(self._dense(vector))
+            )
+        if len(self._pending) >= self.flush_rows:
+            self.save()  # Keep the unsaved (unmapped) tail small
+
+    def remove(self, entries: Iterable[Dict[str, Any]]):
+        """Mark the rows of removed records deleted."""
+        removed = {(entry["timestamp"], entry["activity_type"]) for entry in entries}
+        self.deleted.update(
+            row
+            for row, doc in enumerate(self.docs)
+            if doc in removed and row not in self.deleted
+        )
+        if self.deleted and len(self.deleted) * 2 >= len(self.docs):
+            self._compact()
+
+    def _compact(self):
+        """Rewrite the matrix without its deleted rows."""
+        self.save()  # Every row is in the matrix file from here on
+        keep = np.array(
+            [row for row in range(len(self.docs)) if row not in self.deleted],
+            dtype=np.int64,
+        )
+        temp_file = self.matrix_file.with_name(self.matrix_file.name + ".tmp")
+        with open(temp_file, "wb") as f:
+            for start in range(0, len(keep), 65_536):
+                f.write(
+                    np.asarray(self._mapped[keep[start : start + 65_536]]).tobytes()
+                )
+        self._mapped = None
+        temp_file.replace(self.matrix_file)
+        if self._assignments is not None:
+            self._assignments = self._assignments[keep]
+        self.docs = [self.docs[row] for row in keep]
+        self.deleted = set()
+        self._saved_rows = len(keep)
+        self._map_matrix()
+
+    def rebuild(self, entries, indexed_seq: int):
+        """Re-embed every record from scratch."""
+        self.delete()
+        for entry in entries:
+            self.add(entry)
+        self.indexed_seq = indexed_seq
+        logger.info(f"Rebuilt memory vector index over {len(self.docs)} records")
+
+    def search(
+        self, query: str, k: int = 5, activity_type: Optional[str] = None
+    ) -> List[Tuple[float, str, str]]:
+        """
+        Rank records by cosine similarity to `query`.
+        Returns up to `k` (similarity, timestamp, activity_type) tuples, best first.
+        """
+        vector = embed(query)
+        if not vector or not self.docs:
+            return []
+        scored = self._search(vector, k, activity_type)
+        return [(score, *self.docs[row]) for row, score in scored if score > 0]
+
+    def _search(
+        self, vector: Dict[int, float], k: int, activity_type: Optional[str]
+    ) -> List[Tuple[int, float]]:
+        query = self._dense(vector)
+        if (
+            self._centroids is None
+            and self._saved_rows >= self.ivf_threshold
+            and activity_type is None
+        ):
+            self._train_ivf()
+
+        if self._centroids is not None and activity_type is None:
+            closest = np.argsort(self._centroids @ query)[-self.nprobe :]
+            candidates = np.flatnonzero(np.isin(self._assignments, closest))
+        else:
+            candidates = None
+            if activity_type is not None:
+                candidates = np.array(
+                    [
+                        row
+                        for row, (_, row_type) in enumerate(self.docs)
+                        if row_type == activity_type and row not in self.deleted
+                    ],
+                    dtype=np.int64,
+                )
+        if candidates is not None and self.deleted:
+            candidates = candidates[~np.isin(candidates, list(self.deleted))]
+
+        scores = self._scores(query, candidates)
+        if candidates is None and self.deleted:
+            scores[list(self.deleted)] = -np.inf
+        rows = np.arange(len(scores)) if candidates is None else candidates
+        if len(scores) > k:
+            top = np.argpartition(scores, -k)[-k:]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(scores[top])[::-1]]
+        return [(int(rows[i]), float(scores[i])) for i in top]
+
+    def _scores(self, query, candidates=None, batch_rows: int = 65_536):
+        """Dot products of `query` with all (or the candidate) rows, in batches."""
+        pending = (
+            np.stack([self._dense(v) for v in self._pending])
+            if self._pending
+            else np.empty((0, DIMENSIONS), dtype=np.float32)
+        )
+        if candidates is None:
+            parts = [
+                self._mapped[start : start + batch_rows] @ query
+                for start in range(0, self._saved_rows, batch_rows)
+            ]
+            parts.append(pending @ query)
+            return np.concatenate(parts) if parts else np.empty(0, dtype=np.float32)
+
+        saved = candidates[candidates < self._saved_rows]
+        unsaved = candidates[candidates >= self._saved_rows] - self._saved_rows
+        parts = [
+            self._mapped[saved[start : start + batch_rows]] @ query
+            for start in range(0, len(saved), batch_rows)
+        ]
+        parts.append(pending[unsaved] @ query)
+        return np.concatenate(parts)
+
+    def _nearest_centroid(self, dense) -> int:
+        return int(np.argmax(self._centroids @ dense))
+
+    def _train_ivf(self, iterations: int = 5, sample_size: int = 50_000):
+        """Spherical k-means over a sample of the saved rows, then assign every row."""
+        rows = self._saved_rows
+        nlist = max(1, int(math.sqrt(rows)))
+        rng = np.random.default_rng(0)
+        sample = np.asarray(
+            self._mapped[
+                np.sort(rng.choice(rows, min(rows, sample_size), replace=False))
+            ]
+        )
+        centroids = sample[rng.choice(len(sample), nlist, replace=False)]
+        for _ in range(iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            for cluster in range(nlist):
+                members = sample[labels == cluster]
+                if len(members):
+                    centroid = members.sum(axis=0)
+                    centroids[cluster] = centroid / (np.linalg.norm(centroid) or 1.0)
+
+        self._centroids = centroids
+        self._assignments = np.concatenate(
+            [
+                np.argmax(self._mapped[start : start + 65_536] @ centroids.T, axis=1)
+                for start in range(0, rows, 65_536)
+            ]
+            + [
+                np.array(
+                    [self._nearest_centroid(self._dense(v)) for v in self._pending],
+                    dtype=np.int64,
+                )
+            ]
+        )
+        logger.info(f"Trained IVF partitioning with {nlist} clusters over {rows} rows")
+
+    def _load_ivf(self):
+        self._centroids = self._assignments = None
+        if not self.ivf_file.exists():
+            return
+        with np.load(self.ivf_file) as ivf:
+            centroids, assignments = ivf["centroids"], ivf["assignments"]
+        if len(assignments) > self._saved_rows:
+            return  # Stale partitioning, retrained on demand
+        tail = [
+            int(np.argmax(centroids @ np.asarray(self._mapped[row])))
+            for row in range(len(assignments), self._saved_rows)
+        ]
+        self._centroids = centroids
+        self._assignments = np.concatenate(
+            [assignments, np.array(tail, dtype=np.int64)]
+        )
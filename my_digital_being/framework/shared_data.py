@@ -1,89 +1,376 @@
+import asyncio
+import json
 import logging
-from typing import Dict, Any
-from threading import Lock
+import threading
+import time
+from concurrent.futures import Future
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Iterable, Mapping, Optional
+
+from .shared_data_eviction import (
+    MISSING,
+    CategoryUsage,
+    SharedDataPolicies,
+    SpillStore,
+)
 
 logger = logging.getLogger(__name__)
 
+_EMPTY: Mapping[str, Any] = MappingProxyType({})
+
 
 class SharedData:
-    """Thread-safe shared data storage for activities and skills."""
+    """
+    Shared data storage for activities and skills, owned by the event loop.
+
+    Every category is published as an immutable version: a write copies the
+    category, changes the copy and swaps it in. Readers therefore never lock
+    and never copy; get_category_data() hands out the current version as a
+    read-only mapping that stays valid (and unchanged) however the category
+    is written afterwards.
+
+    Writes are meant to run on the event loop thread. Code running in an
+    executor thread uses threadsafe(), whose writes are handed to the loop.
+    Every write also holds one lock around its copy and publish, so writers
+    on several threads (without a loop) never drop each other's changes.
+
+    Categories can be bounded by TTL, entry count and size (see
+    shared_data_eviction). Limits are enforced on every write to the
+    category; expired keys read as missing until expire() removes them.
+    """
 
-    def __init__(self):
-        self._data: Dict[str, Any] = {}
-        self._locks: Dict[str, Lock] = {}
-        self._global_lock = Lock()
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        """
+        :param config: shared_data_config settings; None leaves every
+            category unbounded.
+        """
+        # category -> current (read-only) version
+        self._data: Dict[str, Mapping[str, Any]] = {}
+        self._versions: Dict[str, int] = {}
+        self._policies = SharedDataPolicies(config or {})
+        self._spill = SpillStore(self._policies.spill_dir)
+        # Bookkeeping of the categories that have limits
+        self._usage: Dict[str, CategoryUsage] = {}
+        # Reentrant: restore() and expire() write through the other writers
+        self._write_lock = threading.RLock()
 
     def initialize(self):
         """Initialize shared data storage."""
-        with self._global_lock:
-            self._data = {"system": {}, "memory": {}, "state": {}, "temp": {}}
-            for category in self._data:
-                self._locks[category] = Lock()
+        self._data = {
+            category: _EMPTY for category in ("system", "memory", "state", "temp")
+        }
+        self._versions = {category: 0 for category in self._data}
+        self._usage = {}
+        for category in self._data:
+            policy = self._policies.for_category(category)
+            if policy:
+                self._usage[category] = CategoryUsage(policy)
+
+    def _publish(
+        self, category: str, values: Dict[str, Any], written: Iterable[str] = ()
+    ):
+        usage = self._usage.get(category)
+        if usage is not None:
+            self._enforce(category, usage, values, written)
+        self._data[category] = MappingProxyType(values)
+        self._versions[category] += 1
+
+    def _enforce(
+        self,
+        category: str,
+        usage: CategoryUsage,
+        values: Dict[str, Any],
+        written: Iterable[str],
+    ):
+        """Record the written keys, then drop expired and over-budget ones."""
+        now = time.monotonic()
+        written = set(written)
+        for key in written:
+            usage.wrote(key, values[key], now)
+
+        for key in usage.expired(now):
+            values.pop(key, None)
+            usage.forget(key)
+            usage.stats["expired"] += 1
+            if usage.policy.spill:
+                self._spill.discard(category, key)
+
+        # The keys just written are the most recent, so they go last
+        for key in usage.over_budget():
+            if key in written:
+                break
+            value = values.pop(key, None)
+            expires_at = usage.expires_at(key, now)
+            usage.forget(key)
+            usage.stats["evicted"] += 1
+            if usage.policy.spill and self._spill.put(
+                category, key, value, expires_at, usage.policy.spill_max_entries
+            ):
+                usage.stats["spilled"] += 1
 
     def get(self, category: str, key: str, default: Any = None) -> Any:
         """Get a value from shared data."""
-        if category not in self._data:
+        values = self._data.get(category)
+        if values is None:
             logger.warning(f"Attempting to access invalid category: {category}")
             return default
+        usage = self._usage.get(category)
+        if usage is None:
+            return values.get(key, default)
 
-        with self._locks[category]:
-            return self._data[category].get(key, default)
+        value = values.get(key, MISSING)
+        if value is MISSING:
+            if usage.policy.spill:
+                value = self._spill.get(category, key)
+                if value is not MISSING:
+                    usage.stats["spill_hits"] += 1
+                    return value
+            return default
+        if usage.is_expired(key, time.monotonic()):
+            return default
+        usage.touch(key)
+        return value
 
     def set(self, category: str, key: str, value: Any) -> bool:
         """Set a value in shared data."""
-        if category not in self._data:
-            logger.warning(f"Attempting to write to invalid category: {category}")
-            return False
+        with self._write_lock:
+            if category not in self._data:
+                logger.warning(f"Attempting to write to invalid category: {category}")
+                return False
 
-        with self._locks[category]:
-            self._data[category][key] = value
-        return True
+            values = dict(self._data[category])
+            values[key] = value
+            self._publish(category, values, written=(key,))
+            return True
 
     def update(self, category: str, updates: Dict[str, Any]) -> bool:
         """Update multiple values in a category."""
-        if category not in self._data:
-            logger.warning(f"Attempting to update invalid category: {category}")
-            return False
+        with self._write_lock:
+            if category not in self._data:
+                logger.warning(f"Attempting to update invalid category: {category}")
+                return False
 
-        with self._locks[category]:
-            self._data[category].update(updates)
-        return True
+            values = dict(self._data[category])
+            values.update(updates)
+            self._publish(category, values, written=updates)
+            return True
 
     def delete(self, category: str, key: str) -> bool:
         """Delete a value from shared data."""
-        if category not in self._data:
-            logger.warning(f"Attempting to delete from invalid category: {category}")
-            return False
+        with self._write_lock:
+            if category not in self._data:
+                logger.warning(
+                    f"Attempting to delete from invalid category: {category}"
+                )
+                return False
 
-        with self._locks[category]:
-            if key in self._data[category]:
-                del self._data[category][key]
-                return True
-        return False
+            usage = self._usage.get(category)
+            if usage is not None:
+                usage.forget(key)
+                if usage.policy.spill:
+                    self._spill.discard(category, key)
+            if key not in self._data[category]:
+                return False
+            values = dict(self._data[category])
+            del values[key]
+            self._publish(category, values)
+            return True
 
     def clear_category(self, category: str) -> bool:
         """Clear all data in a category."""
-        if category not in self._data:
-            logger.warning(f"Attempting to clear invalid category: {category}")
-            return False
+        with self._write_lock:
+            if category not in self._data:
+                logger.warning(f"Attempting to clear invalid category: {category}")
+                return False
+
+            self._data[category] = _EMPTY
+            self._versions[category] += 1
+            usage = self._usage.get(category)
+            if usage is not None:
+                for key in list(usage.recency):
+                    usage.forget(key)
+            return True
+
+    def expire(self) -> int:
+        """
+        Remove expired keys (and expired spilled values) from every category;
+        returns how many.
+        """
+        with self._write_lock:
+            removed = 0
+            now = time.monotonic()
+            for category, usage in self._usage.items():
+                if usage.expired(now):
+                    before = usage.stats["expired"]
+                    self._publish(category, dict(self._data[category]))
+                    removed += usage.stats["expired"] - before
+                if usage.policy.spill:
+                    spilled = self._spill.prune(category)
+                    usage.stats["expired"] += spilled
+                    removed += spilled
+            return removed
 
-        with self._locks[category]:
-            self._data[category].clear()
-        return True
+    def eviction_stats(self) -> Dict[str, Dict[str, int]]:
+        """Per limited category: keys held, estimated bytes and eviction counts."""
+        return {
+            category: {
+                "entries": len(self._data[category]),
+                "bytes": usage.total_bytes,
+                **usage.stats,
+            }
+            for category, usage in self._usage.items()
+        }
 
-    def get_category_data(self, category: str) -> Dict[str, Any]:
-        """Get all data in a category."""
-        if category not in self._data:
+    def get_category_data(self, category: str) -> Mapping[str, Any]:
+        """
+        Get all data in a category, as a read-only snapshot of its current
+        version (no copy is made).
+        """
+        values = self._data.get(category)
+        if values is None:
             logger.warning(f"Attempting to access invalid category: {category}")
-            return {}
+            return _EMPTY
+        return values
+
+    def version(self, category: str) -> int:
+        """How many times `category` has been written; 0 if it is unknown."""
+        return self._versions.get(category, 0)
+
+    def export_serializable(self) -> Dict[str, Dict[str, Any]]:
+        """
+        All categories, leaving out values that are not JSON-serializable
+        (live objects such as system.memory_ref), for runtime checkpoints.
+        """
+        exported: Dict[str, Dict[str, Any]] = {}
+        for category, values in list(self._data.items()):
+            kept = {}
+            for key, value in values.items():
+                try:
+                    json.dumps(value)
+                except (TypeError, ValueError):
+                    continue
+                kept[key] = value
+            exported[category] = kept
+        return exported
 
-        with self._locks[category]:
-            return self._data[category].copy()
+    def export_write_times(self) -> Dict[str, Dict[str, float]]:
+        """
+        When each key of a category with a TTL was last written (epoch
+        seconds), so restore() can keep what is left of its TTL.
+        """
+        now, wall = time.monotonic(), time.time()
+        return {
+            category: {
+                key: wall - (now - written) for key, written in usage.written_at.items()
+            }
+            for category, usage in self._usage.items()
+            if usage.policy.ttl_seconds is not None
+        }
+
+    def restore(
+        self,
+        exported: Dict[str, Dict[str, Any]],
+        write_times: Optional[Dict[str, Dict[str, float]]] = None,
+    ):
+        """
+        Merge export_serializable() output back into the known categories.
+        With export_write_times() output, restored keys keep their remaining
+        TTL (and those that ran out meanwhile are dropped) instead of
+        starting a new one.
+        """
+        with self._write_lock:
+            write_times = write_times or {}
+            for category, values in exported.items():
+                if category not in self._data or not isinstance(values, dict):
+                    continue
+                self.update(category, values)
+                usage = self._usage.get(category)
+                written = write_times.get(category)
+                if usage is None or not isinstance(written, dict):
+                    continue
+                now, wall = time.monotonic(), time.time()
+                for key, at in written.items():
+                    if key in usage.written_at and isinstance(at, (int, float)):
+                        usage.written_at[key] = now - max(0.0, wall - at)
+                if usage.expired(now):
+                    self._publish(category, dict(self._data[category]))
 
     def exists(self, category: str, key: str) -> bool:
         """Check if a key exists in a category."""
-        if category not in self._data:
-            return False
+        return key in self._data.get(category, _EMPTY)
+
+    def threadsafe(
+        self, loop: Optional[asyncio.AbstractEventLoop] = None
+    ) -> "ThreadSafeSharedData":
+        """
+        A facade for code running outside the event loop thread (e.g. skills
+        in an executor). `loop` defaults to the running loop.
+        """
+        if loop is None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                loop = None
+        return ThreadSafeSharedData(self, loop)
+
+
+class ThreadSafeSharedData:
+    """
+    SharedData as seen from another thread. Reads go straight to the current
+    versions; writes run on the owning loop and wait for it to apply them.
+    Without a loop, they run in the calling thread under SharedData's lock.
+    """
+
+    def __init__(
+        self, shared_data: SharedData, loop: Optional[asyncio.AbstractEventLoop]
+    ):
+        self._shared = shared_data
+        self._loop = loop
+
+    def get(self, category: str, key: str, default: Any = None) -> Any:
+        return self._shared.get(category, key, default)
+
+    def get_category_data(self, category: str) -> Mapping[str, Any]:
+        return self._shared.get_category_data(category)
+
+    def exists(self, category: str, key: str) -> bool:
+        return self._shared.exists(category, key)
+
+    def version(self, category: str) -> int:
+        return self._shared.version(category)
+
+    def eviction_stats(self) -> Dict[str, Dict[str, int]]:
+        return self._shared.eviction_stats()
+
+    def set(self, category: str, key: str, value: Any) -> bool:
+        return self._write(self._shared.set, category, key, value)
+
+    def update(self, category: str, updates: Dict[str, Any]) -> bool:
+        return self._write(self._shared.update, category, updates)
+
+    def delete(self, category: str, key: str) -> bool:
+        return self._write(self._shared.delete, category, key)
+
+    def clear_category(self, category: str) -> bool:
+        return self._write(self._shared.clear_category, category)
+
+    def _write(self, method: Callable[..., bool], *args) -> bool:
+        loop = self._loop
+        if loop is None or not loop.is_running():
+            return method(*args)
+        try:
+            if asyncio.get_running_loop() is loop:
+                return method(*args)  # Already on the loop thread
+        except RuntimeError:
+            pass
+
+        done: Future = Future()
+
+        def apply():
+            try:
+                done.set_result(method(*args))
+            except Exception as e:
+                done.set_exception(e)
 
-        with self._locks[category]:
-            return key in self._data[category]
+        loop.call_soon_threadsafe(apply)
+        return done.result()
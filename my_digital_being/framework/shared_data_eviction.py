@@ -0,0 +1,261 @@
+"""
+Eviction for SharedData: bounds how long and how much each category keeps.
+
+Configured under shared_data_config in activity_constraints.json:
+
+    "shared_data_config": {
+      "spill_dir": "./storage/shared_data",
+      "default": {"ttl_seconds": null, "max_entries": null, "max_bytes": null},
+      "categories": {
+        "memory": {"ttl_seconds": 604800, "max_entries": 200,
+                   "max_bytes": 10485760, "spill": true,
+                   "spill_max_entries": 1000}
+      }
+    }
+
+Keys older than ttl_seconds (since they were last written) expire. When a
+category holds more than max_entries keys or more than max_bytes (estimated
+from the values' JSON encoding), the least recently used keys are evicted.
+With "spill", evicted values are written to spill_dir and read back on the
+next get() of their key until their TTL runs out; expired values are
+dropped. A category keeps at most spill_max_entries (default 1000) spilled
+values, dropping the oldest spills first.
+"""
+
+import hashlib
+import json
+import logging
+import sys
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MISSING = object()
+
+
+class CategoryPolicy:
+    """Limits for one SharedData category."""
+
+    def __init__(self, config: Dict[str, Any]):
+        self.ttl_seconds = config.get("ttl_seconds")
+        self.max_entries = config.get("max_entries")
+        self.max_bytes = config.get("max_bytes")
+        self.spill = bool(config.get("spill", False))
+        self.spill_max_entries = config.get("spill_max_entries", 1000)
+
+    @property
+    def enabled(self) -> bool:
+        return any(
+            limit is not None
+            for limit in (self.ttl_seconds, self.max_entries, self.max_bytes)
+        )
+
+
+class SharedDataPolicies:
+    """Parsed shared_data_config settings."""
+
+    def __init__(self, config: Dict[str, Any]):
+        self.spill_dir = Path(config.get("spill_dir", "./storage/shared_data"))
+        self.default_limits = config.get("default", {}) or {}
+        self.category_limits = config.get("categories", {}) or {}
+
+    def for_category(self, category: str) -> Optional[CategoryPolicy]:
+        """The category's policy, or None if nothing limits it."""
+        policy = CategoryPolicy(
+            {**self.default_limits, **self.category_limits.get(category, {})}
+        )
+        return policy if policy.enabled else None
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate bytes held by a value: its JSON encoding, else sys.getsizeof."""
+    try:
+        return len(json.dumps(value, separators=(",", ":")))
+    except (TypeError, ValueError):
+        return sys.getsizeof(value)
+
+
+class CategoryUsage:
+    """
+    Recency, write time and size of every key in a limited category, plus
+    what has been evicted from it.
+    """
+
+    def __init__(self, policy: CategoryPolicy):
+        self.policy = policy
+        self.recency: "OrderedDict[str, None]" = OrderedDict()  # Oldest first
+        self.written_at: Dict[str, float] = {}
+        self.sizes: Dict[str, int] = {}
+        self.total_bytes = 0
+        self.stats = {"expired": 0, "evicted": 0, "spilled": 0, "spill_hits": 0}
+
+    def touch(self, key: str):
+        try:
+            self.recency.move_to_end(key)
+        except KeyError:
+            pass  # Removed by a write in the meantime
+
+    def wrote(self, key: str, value: Any, now: float):
+        self.forget(key)
+        self.recency[key] = None
+        self.written_at[key] = now
+        if self.policy.max_bytes is not None:
+            self.sizes[key] = estimate_size(value)
+            self.total_bytes += self.sizes[key]
+
+    def forget(self, key: str):
+        self.recency.pop(key, None)
+        self.written_at.pop(key, None)
+        self.total_bytes -= self.sizes.pop(key, 0)
+
+    def is_expired(self, key: str, now: float) -> bool:
+        ttl = self.policy.ttl_seconds
+        written = self.written_at.get(key)
+        return ttl is not None and written is not None and now - written >= ttl
+
+    def expires_at(self, key: str, now: float) -> Optional[float]:
+        """Wall-clock time at which the key's TTL runs out; None without one."""
+        ttl = self.policy.ttl_seconds
+        written = self.written_at.get(key)
+        if ttl is None or written is None:
+            return None
+        return time.time() + ttl - (now - written)
+
+    def expired(self, now: float) -> List[str]:
+        return [key for key in self.written_at if self.is_expired(key, now)]
+
+    def over_budget(self) -> Iterator[str]:
+        """Least recently used keys for as long as the category is over a limit."""
+        for key in list(self.recency):
+            entries_over = (
+                self.policy.max_entries is not None
+                and len(self.recency) > self.policy.max_entries
+            )
+            bytes_over = (
+                self.policy.max_bytes is not None
+                and self.total_bytes > self.policy.max_bytes
+            )
+            if not (entries_over or bytes_over):
+                return
+            yield key
+
+
+class SpillStore:
+    """
+    Evicted values as spill_dir/<category>/<sha1 of key>.json, each with the
+    wall-clock time its TTL runs out. The files of a category are indexed on
+    first use, so bounding and expiring them never lists the directory again.
+    """
+
+    def __init__(self, spill_dir: Path):
+        self.spill_dir = Path(spill_dir)
+        # category -> file name -> expires_at (None: never), oldest spill first
+        self._index: Dict[str, "OrderedDict[str, Optional[float]]"] = {}
+
+    def _path(self, category: str, key: str) -> Path:
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return self.spill_dir / category / f"{digest}.json"
+
+    def _entries(self, category: str) -> "OrderedDict[str, Optional[float]]":
+        index = self._index.get(category)
+        if index is not None:
+            return index
+        index = self._index[category] = OrderedDict()
+        spilled_files = []
+        for path in (self.spill_dir / category).glob("*.json"):
+            try:
+                spilled = json.loads(path.read_text())
+                spilled_files.append((spilled.get("spilled_at", 0), path.name))
+                index[path.name] = spilled.get("expires_at")
+            except (OSError, ValueError, AttributeError):
+                spilled_files.append((0, path.name))  # Dropped first
+                index[path.name] = None
+        for _, name in sorted(spilled_files):
+            index.move_to_end(name)
+        return index
+
+    def put(
+        self,
+        category: str,
+        key: str,
+        value: Any,
+        expires_at: Optional[float] = None,
+        max_entries: Optional[int] = None,
+    ) -> bool:
+        """
+        Write a value out, to be dropped at `expires_at` (wall clock) and once
+        more than `max_entries` newer ones are spilled. False if it is not
+        JSON-serializable.
+        """
+        try:
+            encoded = json.dumps(
+                {
+                    "key": key,
+                    "value": value,
+                    "spilled_at": time.time(),
+                    "expires_at": expires_at,
+                }
+            )
+            path = self._path(category, key)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temp_file = path.with_suffix(".tmp")
+            temp_file.write_text(encoded)
+            temp_file.replace(path)
+        except (TypeError, ValueError, OSError) as e:
+            logger.warning(f"Could not spill shared_data {category}/{key}: {e}")
+            return False
+
+        index = self._entries(category)
+        index[path.name] = expires_at
+        index.move_to_end(path.name)
+        if max_entries is not None:
+            while len(index) > max_entries:
+                self._unlink(category, next(iter(index)))
+        return True
+
+    def get(self, category: str, key: str) -> Any:
+        """A spilled value, or MISSING (also once it has expired)."""
+        path = self._path(category, key)
+        try:
+            spilled = json.loads(path.read_text())
+        except FileNotFoundError:
+            return MISSING
+        except (OSError, ValueError) as e:
+            logger.warning(f"Unreadable spilled shared_data {category}/{key}: {e}")
+            return MISSING
+        if spilled.get("key") != key:
+            return MISSING
+        expires_at = spilled.get("expires_at")
+        if expires_at is not None and time.time() >= expires_at:
+            self._unlink(category, path.name)
+            return MISSING
+        return spilled["value"]
+
+    def discard(self, category: str, key: str):
+        self._unlink(category, self._path(category, key).name)
+
+    def prune(self, category: str) -> int:
+        """Remove the category's expired spills; returns how many."""
+        now = time.time()
+        expired = [
+            name
+            for name, expires_at in self._entries(category).items()
+            if expires_at is not None and now >= expires_at
+        ]
+        for name in expired:
+            self._unlink(category, name)
+        return len(expired)
+
+    def _unlink(self, category: str, name: str):
+        self._entries(category).pop(name, None)
+        try:
+            (self.spill_dir / category / name).unlink()
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(
+                f"Could not remove spilled shared_data {category}/{name}: {e}"
+            )
@@ -1,64 +1,180 @@
+import asyncio
+import copy
 import json
 import logging
+import os
+import threading
+import time
 from pathlib import Path
-from typing import Dict, Any
+from typing import Callable, Dict, Any, List, Optional, Tuple
 from datetime import datetime
 
+from .state_timeseries import StateTimeSeries
+
 logger = logging.getLogger(__name__)
 
+MAX_ENERGY = 1.0
+
+# Resolved state file -> lock shared by every State writing it
+_file_locks: Dict[Path, threading.Lock] = {}
+_file_locks_guard = threading.Lock()
+
+
+def _file_lock(state_file: Path) -> threading.Lock:
+    with _file_locks_guard:
+        return _file_locks.setdefault(state_file.resolve(), threading.Lock())
+
 
 class State:
-    def __init__(self, state_path: str = "./storage"):
+    """
+    The being's mood, energy and tasks, persisted to state.json.
+
+    Mutations only mark the state dirty. With an event loop running, changes
+    are flushed at most `flush_delay` seconds after the first unsaved one,
+    coalescing everything in between into one write on a worker thread;
+    without a loop (scripts, tools) they are written through. Writes go to a
+    temp file that replaces state.json, so a crash never leaves it truncated.
+    Call close() on shutdown to flush what is still pending. state.json also
+    records when its state last changed ("saved_at"), and a write is skipped
+    if another State on the same storage has since saved a newer change.
+
+    Energy is a function of time rather than something a loop has to tick:
+    the stored value and when it was set, plus `energy_regen_per_hour` since,
+    capped at MAX_ENERGY. It is evaluated on read (get_energy), and
+    seconds_until_energy() says when a threshold will be reached.
+
+    Listeners registered with subscribe() are called with the current state
+    after every change, so nothing has to poll for them. While energy
+    regenerates they are also called when its rounded value has moved, at
+    most every `energy_notify_interval` seconds.
+
+    Every change, and a periodic sample from update(), is also recorded in
+    `timeseries` (see StateTimeSeries), so energy and mood can be charted
+    over time.
+    """
+
+    def __init__(
+        self,
+        state_path: str = "./storage",
+        flush_delay: float = 2.0,
+        energy_regen_per_hour: float = 0.1,
+        timeseries: Optional[Dict[str, Any]] = None,
+        energy_notify_interval: float = 60.0,
+    ):
+        """
+        :param energy_notify_interval: Minimum seconds between listener calls
+            for regeneration alone.
+        :param timeseries: Time series settings: "sample_interval_seconds"
+            between periodic samples and rows kept per tier as "capacity".
+        """
         self.state_path = Path(state_path)
         self.state_path.mkdir(exist_ok=True)
         self.state_file = self.state_path / "state.json"
         self.current_state: Dict[str, Any] = {
             "mood": "neutral",
-            "energy": 1.0,
+            "energy": MAX_ENERGY,
+            "energy_updated_at": None,
             "last_activity_timestamp": None,
             "active_tasks": [],
             "personality": {},
         }
+        self.energy_regen_per_hour = energy_regen_per_hour
+        self.flush_delay = flush_delay
+        self._dirty = False
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        # Snapshots are numbered so a slow write never replaces a newer one
+        self._version = 0
+        self._written_version = 0
+        self._write_lock = _file_lock(self.state_file)
+        # When current_state last changed (time.time()), stored as "saved_at"
+        self._changed_at = 0.0
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self.energy_notify_interval = energy_notify_interval
+        self._energy_handle: Optional[asyncio.TimerHandle] = None
+        self._notified_energy: Optional[float] = None
+        timeseries = timeseries or {}
+        self.timeseries = StateTimeSeries.shared(
+            self.state_path / "state_timeseries",
+            capacity=timeseries.get("capacity"),
+            sample_interval=timeseries.get("sample_interval_seconds", 60.0),
+        )
 
-    def initialize(self, character_config: Dict[str, Any]):
-        """Initialize state with character configuration."""
-        self._load_state()
+    def initialize(
+        self,
+        character_config: Dict[str, Any],
+        fallback_state: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        Initialize state with character configuration. `fallback_state` (e.g.
+        from a runtime checkpoint) is used if state.json cannot be loaded.
+        """
+        if not self._load_state() and fallback_state:
+            self.current_state.update(fallback_state)
+        self.timeseries.load()
         self.current_state["personality"] = character_config.get("personality", {})
-        self.save()
+        # Not a change of its own: must not outrank newer saves by other States
+        self._save()
 
-    def _load_state(self):
-        """Load state from persistent storage."""
+    def _load_state(self) -> bool:
+        """Load state from persistent storage. Returns False if there was none."""
         try:
             if self.state_file.exists():
                 with open(self.state_file, "r") as f:
                     self.current_state = json.load(f)
+                self._changed_at = self.current_state.pop("saved_at", 0.0)
+                if not self.current_state.get("energy_updated_at"):
+                    # Older state files were regenerated on every tick
+                    self._set_energy(self.current_state["energy"], datetime.now())
+                return True
         except Exception as e:
             logger.error(f"Failed to load state: {e}")
+        return False
 
     def update(self):
         """Update state based on current conditions."""
-        current_time = datetime.now()
-
-        # Update energy levels
-        if self.current_state["last_activity_timestamp"]:
-            last_activity = datetime.fromisoformat(
-                self.current_state["last_activity_timestamp"]
-            )
-            time_diff = (current_time - last_activity).total_seconds()
-            self.current_state["energy"] = min(
-                1.0, self.current_state["energy"] + (time_diff / 3600) * 0.1
-            )
-
         # Only update timestamp if there was a successful activity completion
         if hasattr(self, "_last_completed_activity"):
-            self.current_state["last_activity_timestamp"] = current_time.isoformat()
+            self.current_state["last_activity_timestamp"] = datetime.now().isoformat()
             delattr(self, "_last_completed_activity")
-
-        self.save()
+            self.save()
+        elif self.timeseries.due():
+            # Nothing changed, but energy may have regenerated since
+            self.timeseries.record(self.get_current_state())
 
     def get_current_state(self) -> Dict[str, Any]:
-        """Get current state."""
-        return self.current_state.copy()
+        """Get current state, with energy evaluated now."""
+        # Deep, so listeners can compare it with later states
+        current = copy.deepcopy(self.current_state)
+        # Rounded so a slowly regenerating value doesn't look changed every read
+        current["energy"] = round(self.get_energy(), 3)
+        return current
+
+    def get_energy(self, at: Optional[datetime] = None) -> float:
+        """Energy at `at` (default now): the stored value plus regeneration."""
+        stored = self.current_state["energy"]
+        updated_at = self.current_state.get("energy_updated_at")
+        if not updated_at:
+            return stored
+        elapsed = (
+            (at or datetime.now()) - datetime.fromisoformat(updated_at)
+        ).total_seconds()
+        return min(
+            MAX_ENERGY, stored + max(0.0, elapsed) / 3600 * self.energy_regen_per_hour
+        )
+
+    def seconds_until_energy(
+        self, threshold: float, at: Optional[datetime] = None
+    ) -> Optional[float]:
+        """
+        Seconds from `at` (default now) until energy reaches `threshold`; 0 if
+        it already has, None if it never will (above the maximum, no regen).
+        """
+        energy = self.get_energy(at)
+        if energy >= threshold:
+            return 0.0
+        if threshold > MAX_ENERGY or self.energy_regen_per_hour <= 0:
+            return None
+        return (threshold - energy) / self.energy_regen_per_hour * 3600
 
     def update_mood(self, new_mood: str):
         """Update the current mood."""
@@ -67,13 +183,18 @@ class State:
 
     def consume_energy(self, amount: float):
         """Consume energy for an activity."""
-        self.current_state["energy"] = max(0.0, self.current_state["energy"] - amount)
+        now = datetime.now()
+        self._set_energy(max(0.0, self.get_energy(now) - amount), now)
         self.save()
 
+    def _set_energy(self, energy: float, at: datetime):
+        # Energy is stored as (value, when); reads add the regeneration since
+        self.current_state["energy"] = energy
+        self.current_state["energy_updated_at"] = at.isoformat()
+
     def record_activity_completion(self):
         """Mark that an activity was completed successfully."""
         self._last_completed_activity = True
-        self.save()
 
     def add_active_task(self, task_id: str):
         """Add an active task."""
@@ -87,10 +208,130 @@ class State:
             self.current_state["active_tasks"].remove(task_id)
             self.save()
 
+    def subscribe(self, listener: Callable[[Dict[str, Any]], None]):
+        """Call `listener(current_state)` after every change."""
+        self._listeners.append(listener)
+        self._schedule_energy_notify()
+
+    def unsubscribe(self, listener: Callable[[Dict[str, Any]], None]):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self, current: Dict[str, Any]):
+        self._notified_energy = current["energy"]
+        for listener in list(self._listeners):
+            try:
+                listener(current)
+            except Exception as e:
+                logger.error(f"State listener failed: {e}")
+        self._schedule_energy_notify()
+
+    def _schedule_energy_notify(self):
+        """Wake up when the rounded energy will next have changed, if it will."""
+        if self._energy_handle is not None or not self._listeners:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # No loop: listeners only hear about changes
+        # The next 0.001 step shown by get_current_state()
+        wait = self.seconds_until_energy(round(self.get_energy(), 3) + 0.0005)
+        if wait is None:
+            return  # Full, or not regenerating
+        self._energy_handle = loop.call_later(
+            max(wait, self.energy_notify_interval), self._energy_notify
+        )
+
+    def _energy_notify(self):
+        self._energy_handle = None
+        current = self.get_current_state()
+        if current["energy"] != self._notified_energy:
+            self._notify(current)
+        else:
+            self._schedule_energy_notify()
+
     def save(self):
-        """Save current state to persistent storage."""
+        """
+        Mark the state changed: record it, notify listeners and schedule a
+        flush to persistent storage.
+        """
+        self._changed_at = time.time()
+        self._save()
+
+    def _save(self):
+        current = self.get_current_state()
+        self.timeseries.record(current)
+        self._notify(current)
+        self._dirty = True
+        if self._flush_handle is not None:
+            return  # Coalesced into the pending flush
         try:
-            with open(self.state_file, "w") as f:
-                json.dump(self.current_state, f, indent=2)
-        except Exception as e:
-            logger.error(f"Failed to save state: {e}")
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()  # No event loop: write through
+            return
+        self._flush_handle = loop.call_later(self.flush_delay, self._flush_later)
+
+    def flush(self):
+        """Write unsaved changes now, in the calling thread."""
+        self._cancel_flush()
+        if self._dirty:
+            self._write(self._snapshot())
+
+    def close(self):
+        """Flush pending changes before shutdown."""
+        if self._energy_handle is not None:
+            self._energy_handle.cancel()
+            self._energy_handle = None
+        self.flush()
+        self.timeseries.close()
+
+    def _cancel_flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+    def _flush_later(self):
+        self._flush_handle = None
+        if not self._dirty:
+            return
+        # Serialize on the loop thread, which owns current_state
+        snapshot = self._snapshot()
+        asyncio.get_running_loop().run_in_executor(None, self._write, snapshot)
+
+    def _snapshot(self) -> Tuple[int, str]:
+        self._dirty = False
+        self._version += 1
+        return self._version, json.dumps(
+            {**self.current_state, "saved_at": self._changed_at}, indent=2
+        )
+
+    def _write(self, snapshot: Tuple[int, str]):
+        version, data = snapshot
+        with self._write_lock:
+            if version <= self._written_version:
+                return
+            try:
+                if json.loads(data)["saved_at"] < self._saved_at_on_disk():
+                    logger.warning(
+                        "Not saving state: a newer state was saved by another State"
+                    )
+                    self._written_version = version
+                    return
+                temp_file = self.state_file.with_suffix(".json.tmp")
+                with open(temp_file, "w") as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                temp_file.replace(self.state_file)
+                self._written_version = version
+            except Exception as e:
+                logger.error(f"Failed to save state: {e}")
+                self._dirty = True  # Retry with the next flush
+
+    def _saved_at_on_disk(self) -> float:
+        try:
+            with open(self.state_file, "r") as f:
+                return json.load(f).get("saved_at", 0.0)
+        except (OSError, ValueError):
+            return 0.0
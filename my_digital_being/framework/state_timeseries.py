@@ -0,0 +1,381 @@
+"""
+Time series of the being's State (energy, mood, active tasks).
+
+Samples are kept at three resolutions, each in a fixed-size ring of arrays:
+
+    raw   every recorded sample
+    1m    one row per minute
+    1h    one row per hour
+
+A row is (timestamp, energy, energy_min, energy_max, mood, active_tasks):
+a bucket's start and mean energy, the range energy moved in, the last mood
+and the most active tasks seen. Raw samples are rolled up into the minute
+that is in progress, which is closed into the 1m ring when a sample from a
+later minute arrives; closed minutes roll up into hours the same way.
+
+Every tier is also appended to its own fixed-width file under
+state_timeseries/ (raw.bin, 1m.bin, 1h.bin, moods interned in moods.json),
+so loading only reads the last `capacity` rows of each. A file is cut back
+to its ring once it holds twice as many rows. Only one recorder may append
+to a directory; StateTimeSeries.shared() hands every State on the same
+storage the same one.
+"""
+
+import json
+import logging
+import os
+import struct
+import weakref
+from array import array
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Tier name -> seconds per row (0: as recorded)
+TIERS = {"raw": 0, "1m": 60, "1h": 3600}
+DEFAULT_CAPACITY = {"raw": 1440, "1m": 1440, "1h": 24 * 90}
+_ROW = struct.Struct("<ddddii")
+_FIELDS = ("timestamp", "energy", "energy_min", "energy_max", "mood", "active_tasks")
+_TYPECODES = ("d", "d", "d", "d", "i", "i")
+
+# Resolved series directory -> the recorder appending to it
+_recorders: "weakref.WeakValueDictionary[Path, StateTimeSeries]" = (
+    weakref.WeakValueDictionary()
+)
+
+
+class _Ring:
+    """Fixed-capacity ring of rows, one array per field."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.columns = [array(code, [0] * capacity) for code in _TYPECODES]
+        self.start = 0  # Index of the oldest row
+        self.size = 0
+
+    def append(self, row: tuple):
+        i = (self.start + self.size) % self.capacity
+        for column, value in zip(self.columns, row):
+            column[i] = value
+        if self.size < self.capacity:
+            self.size += 1
+        else:
+            self.start = (self.start + 1) % self.capacity
+
+    def rows(self, since: float = float("-inf"), until: float = float("inf")):
+        """Rows in time order with since <= timestamp < until."""
+        timestamps = self.columns[0]
+        for n in range(self.size):
+            i = (self.start + n) % self.capacity
+            if since <= timestamps[i] < until:
+                yield tuple(column[i] for column in self.columns)
+
+    @property
+    def oldest(self) -> Optional[float]:
+        return self.columns[0][self.start] if self.size else None
+
+    @property
+    def newest(self) -> Optional[float]:
+        if not self.size:
+            return None
+        return self.columns[0][(self.start + self.size - 1) % self.capacity]
+
+
+class _Bucket:
+    """A minute or hour that is still being rolled up."""
+
+    __slots__ = (
+        "start",
+        "weight",
+        "energy_sum",
+        "energy_min",
+        "energy_max",
+        "mood",
+        "active_tasks",
+    )
+
+    def __init__(self, start: float):
+        self.start = start
+        self.weight = 0
+        self.energy_sum = 0.0
+        self.energy_min = float("inf")
+        self.energy_max = float("-inf")
+        self.mood = 0
+        self.active_tasks = 0
+
+    def add(self, row: tuple, weight: int = 1):
+        _, energy, energy_min, energy_max, mood, active_tasks = row
+        self.weight += weight
+        self.energy_sum += energy * weight
+        self.energy_min = min(self.energy_min, energy_min)
+        self.energy_max = max(self.energy_max, energy_max)
+        self.mood = mood
+        self.active_tasks = max(self.active_tasks, active_tasks)
+
+    def row(self) -> tuple:
+        return (
+            self.start,
+            self.energy_sum / self.weight,
+            self.energy_min,
+            self.energy_max,
+            self.mood,
+            self.active_tasks,
+        )
+
+
+class StateTimeSeries:
+    """Downsampling recorder of energy, mood and active task count."""
+
+    def __init__(
+        self,
+        series_dir: Path,
+        capacity: Optional[Dict[str, int]] = None,
+        sample_interval: float = 60.0,
+    ):
+        """
+        :param series_dir: Directory holding one file per tier plus moods.json.
+        :param capacity: Rows kept per tier ("raw", "1m", "1h").
+        :param sample_interval: Minimum seconds between periodic samples;
+            samples of actual state changes are always recorded.
+        """
+        self.series_dir = Path(series_dir)
+        self.sample_interval = sample_interval
+        capacity = {**DEFAULT_CAPACITY, **(capacity or {})}
+        self.rings = {tier: _Ring(max(1, int(capacity[tier]))) for tier in TIERS}
+        self._open: Dict[str, Optional[_Bucket]] = {"1m": None, "1h": None}
+        self._file_rows = {tier: 0 for tier in TIERS}
+        self._handles: Dict[str, Any] = {}
+        self.moods: List[str] = []  # mood id -> mood
+        self._mood_ids: Dict[str, int] = {}
+        self._loaded = False
+
+    @classmethod
+    def shared(
+        cls,
+        series_dir: Path,
+        capacity: Optional[Dict[str, int]] = None,
+        sample_interval: float = 60.0,
+    ) -> "StateTimeSeries":
+        """
+        The recorder for `series_dir` in this process, created on first use.
+        A second recorder would append its own copy of every row and cut the
+        files back to its own rings, dropping the other's.
+        """
+        key = Path(series_dir).resolve()
+        recorder = _recorders.get(key)
+        if recorder is None:
+            recorder = _recorders[key] = cls(series_dir, capacity, sample_interval)
+        return recorder
+
+    def _tier_file(self, tier: str) -> Path:
+        return self.series_dir / f"{tier}.bin"
+
+    def load(self):
+        """Read the tail of every tier file and reopen the buckets in progress."""
+        if self._loaded:
+            return  # Already shared with another State
+        self._loaded = True
+        try:
+            self.series_dir.mkdir(parents=True, exist_ok=True)
+            moods_file = self.series_dir / "moods.json"
+            if moods_file.exists():
+                self.moods = json.loads(moods_file.read_text())
+                self._mood_ids = {mood: i for i, mood in enumerate(self.moods)}
+            for tier, ring in self.rings.items():
+                path = self._tier_file(tier)
+                if not path.exists():
+                    continue
+                size = path.stat().st_size
+                rows = size // _ROW.size
+                if size % _ROW.size:
+                    logger.warning(f"Discarding torn tail of {path.name}")
+                    with open(path, "r+b") as f:
+                        f.truncate(rows * _ROW.size)
+                self._file_rows[tier] = rows
+                keep = min(rows, ring.capacity)
+                with open(path, "rb") as f:
+                    f.seek((rows - keep) * _ROW.size)
+                    data = f.read(keep * _ROW.size)
+                for row in _ROW.iter_unpack(data):
+                    ring.append(row)
+        except Exception as e:
+            logger.error(f"Failed to load state time series: {e}")
+            return
+
+        # Rows newer than the last closed bucket belong to the open one.
+        # Hours first: replaying raw rows may close a minute into them.
+        for row in self.rings["1m"].rows(since=self._bucket_end("1h")):
+            self._roll_up("1h", row, 1, persist=False)
+        for row in self.rings["raw"].rows(since=self._bucket_end("1m")):
+            self._roll_up("1m", row, 1, persist=False)
+
+    def _bucket_end(self, tier: str) -> float:
+        newest = self.rings[tier].newest
+        return float("-inf") if newest is None else newest + TIERS[tier]
+
+    def record(self, state: Dict[str, Any], at: Optional[datetime] = None):
+        """Record a sample of `state` (as returned by State.get_current_state)."""
+        at = at or datetime.now()
+        energy = float(state.get("energy", 0.0))
+        row = (
+            at.timestamp(),
+            energy,
+            energy,
+            energy,
+            self._mood_id(str(state.get("mood", ""))),
+            len(state.get("active_tasks") or []),
+        )
+        newest = self.rings["raw"].newest
+        if newest is not None and row[0] < newest:
+            return  # Clock went backwards; keep the rings in order
+        self._append("raw", row)
+        self._roll_up("1m", row, 1)
+
+    def due(self, at: Optional[datetime] = None) -> bool:
+        """Whether a periodic sample is due (sample_interval since the last)."""
+        newest = self.rings["raw"].newest
+        at = at or datetime.now()
+        return newest is None or at.timestamp() - newest >= self.sample_interval
+
+    def _roll_up(self, tier: str, row: tuple, weight: int, persist: bool = True):
+        seconds = TIERS[tier]
+        start = row[0] // seconds * seconds
+        bucket = self._open[tier]
+        if bucket is not None and start > bucket.start:
+            closed = bucket.row()
+            if persist:
+                self._append(tier, closed)
+            else:
+                self.rings[tier].append(closed)
+            if tier == "1m":
+                self._roll_up("1h", closed, bucket.weight, persist)
+            bucket = None
+        if bucket is None:
+            bucket = self._open[tier] = _Bucket(start)
+        bucket.add(row, weight)
+
+    def _append(self, tier: str, row: tuple):
+        ring = self.rings[tier]
+        ring.append(row)
+        try:
+            handle = self._handles.get(tier)
+            if handle is None:
+                self.series_dir.mkdir(parents=True, exist_ok=True)
+                handle = self._handles[tier] = open(self._tier_file(tier), "ab")
+            handle.write(_ROW.pack(*row))
+            handle.flush()
+            self._file_rows[tier] += 1
+            if self._file_rows[tier] >= 2 * ring.capacity:
+                self._rewrite(tier)
+        except Exception as e:
+            logger.error(f"Failed to append to state time series: {e}")
+
+    def _rewrite(self, tier: str):
+        """Cut a tier file back to the rows its ring still holds."""
+        self._close_handle(tier)
+        path = self._tier_file(tier)
+        temp_file = path.with_suffix(".bin.tmp")
+        with open(temp_file, "wb") as f:
+            for row in self.rings[tier].rows():
+                f.write(_ROW.pack(*row))
+            f.flush()
+            os.fsync(f.fileno())
+        temp_file.replace(path)
+        self._file_rows[tier] = self.rings[tier].size
+
+    def _mood_id(self, mood: str) -> int:
+        mood_id = self._mood_ids.get(mood)
+        if mood_id is None:
+            mood_id = self._mood_ids[mood] = len(self.moods)
+            self.moods.append(mood)
+            try:
+                self.series_dir.mkdir(parents=True, exist_ok=True)
+                (self.series_dir / "moods.json").write_text(json.dumps(self.moods))
+            except Exception as e:
+                logger.error(f"Failed to save state time series moods: {e}")
+        return mood_id
+
+    def query(
+        self,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        resolution: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Columns of the series between `since` and `until` (default: all kept).
+
+        Without a `resolution`, the finest tier that still reaches back to
+        `since` is used. Downsampled tiers end with the bucket in progress.
+        Timestamps are ISO strings in UTC.
+        """
+        since_ts = since.timestamp() if since else float("-inf")
+        until_ts = until.timestamp() if until else float("inf")
+        if resolution is None:
+            resolution = "1h"
+            for tier in TIERS:
+                oldest = self.rings[tier].oldest
+                if oldest is not None and oldest <= since_ts:
+                    resolution = tier
+                    break
+        if resolution not in TIERS:
+            raise ValueError(f"Unknown resolution: {resolution}")
+
+        rows = list(self.rings[resolution].rows(since_ts, until_ts))
+        rows.extend(
+            row
+            for row in self._pending_rows(resolution)
+            if since_ts <= row[0] < until_ts
+        )
+
+        series: Dict[str, Any] = {"resolution": resolution}
+        columns = list(zip(*rows)) or [()] * len(_FIELDS)
+        for field, values in zip(_FIELDS, columns):
+            if field == "timestamp":
+                values = [
+                    datetime.fromtimestamp(ts, timezone.utc).isoformat()
+                    for ts in values
+                ]
+            elif field == "mood":
+                values = [self.moods[i] for i in values]
+            else:
+                values = list(values)
+            series[field] = values
+        return series
+
+    def _pending_rows(self, resolution: str) -> List[tuple]:
+        """Rows of the buckets still in progress at `resolution`."""
+        minute, hour = self._open["1m"], self._open["1h"]
+        if resolution == "raw" or minute is None:
+            return []
+        if resolution == "1m":
+            return [minute.row()]
+        # The open minute may already belong to the next hour
+        rows = []
+        start = minute.start // 3600 * 3600
+        merged = _Bucket(start)
+        if hour is not None:
+            if hour.start == start:
+                merged.add(hour.row(), hour.weight)
+            else:
+                rows.append(hour.row())
+        merged.add(minute.row(), minute.weight)
+        rows.append(merged.row())
+        return rows
+
+    def _close_handle(self, tier: str):
+        handle = self._handles.pop(tier, None)
+        if handle is not None:
+            handle.close()
+
+    def close(self):
+        """fsync and close the tier files."""
+        for tier in list(self._handles):
+            handle = self._handles[tier]
+            try:
+                handle.flush()
+                os.fsync(handle.fileno())
+            except Exception as e:
+                logger.error(f"Failed to sync state time series: {e}")
+            self._close_handle(tier)
@@ -14,8 +14,8 @@ import logging
 import http
 import mimetypes
 from pathlib import Path
-from typing import Dict, Any, Set, Union, Tuple
-from datetime import datetime
+from typing import Dict, Any, Optional, Set, Union, Tuple
+from datetime import datetime, timedelta, timezone
 
 import websockets
 from websockets.server import serve
@@ -26,12 +26,40 @@ from websockets.legacy.server import WebSocketServerProtocol
 logging.basicConfig(level=logging.INFO)
 
 # Import api_manager at top-level (not again inside any function)
+from framework.activity_selector import MAX_IDLE_SECONDS
 from framework.api_management import api_manager
 from framework.main import DigitalBeing
+from framework.memory_columns import bucket_starts
+from framework.memory_ndjson import iter_chunks
 from framework.skill_config import DynamicComposioSkills
 
 logger = logging.getLogger(__name__)
 
+# Activity chart ranges: range name -> (time bucket, window shown)
+TIMESERIES_RANGES = {
+    "hourly": ("hour", timedelta(hours=24)),
+    "daily": ("day", timedelta(days=7)),
+    "weekly": ("week", timedelta(weeks=4)),
+    "monthly": ("month", timedelta(days=360)),
+}
+# State chart resolution per range
+STATE_TIMESERIES_RESOLUTIONS = {
+    "hourly": "1m",
+    "daily": "1h",
+    "weekly": "1h",
+    "monthly": "1h",
+}
+
+# Commands that can make an activity runnable; they wake an idle being loop
+LOOP_WAKE_COMMANDS = {
+    "resume",
+    "start_loop",
+    "update_config",
+    "configure_api_key",
+    "save_activity_code",
+    "save_onboarding_data",
+}
+
 
 class DigitalBeingServer:
     """Server for the Digital Being application."""
@@ -47,31 +75,41 @@ class DigitalBeingServer:
         # Additional flags for running/paused
         self.running = False
         self.paused = False
+        # Set to cut an idle sleep of the being loop short
+        self._loop_wake = asyncio.Event()
+        self._broadcast_scheduled = False
+        self._broadcast_task: Optional[asyncio.Task] = None
 
     async def initialize(self):
-        """Initialize the digital being and start periodic updates."""
+        """Initialize the digital being and start its loop."""
         logger.info("Initializing Digital Being...")
         self.being.initialize()  # load config, etc.
 
         self.running = True  # default "running"
-        asyncio.create_task(self._periodic_state_update())
+        # State pushes its changes; clients get them as state_update messages
+        self.being_state = self.being.state.get_current_state()
+        self.being_state["configured"] = self.being.is_configured()
+        self.being_state["paused"] = self.paused
+        self.being.state.subscribe(self.update_being_state)
         asyncio.create_task(self._run_being_loop())
 
     async def _run_being_loop(self):
         """Main loop that calls the being's activities if running & not paused."""
         while True:
             try:
+                # Stopped, paused or not configured: the commands that change
+                # that wake the loop, so it can sleep until then
                 if not self.running:
-                    await asyncio.sleep(2)
+                    await self._idle_sleep(MAX_IDLE_SECONDS)
                     continue
 
                 if self.paused:
-                    await asyncio.sleep(2)
+                    await self._idle_sleep(MAX_IDLE_SECONDS)
                     continue
 
                 if not self.being.is_configured():
                     # If not configured, do nothing in the main loop
-                    await asyncio.sleep(2)
+                    await self._idle_sleep(MAX_IDLE_SECONDS)
                     continue
 
                 # Single-step approach for selecting an activity
@@ -82,44 +120,67 @@ class DigitalBeingServer:
                     )
                     result = await self.being.execute_activity(current_activity)
                     if result and result.success:
-                        self.being_state["last_activity"] = {
+                        last_activity = {
                             "name": current_activity.__class__.__name__,
                             "timestamp": datetime.now().isoformat(),
                             "success": True,
                         }
                     else:
-                        self.being_state["last_activity"] = {
+                        last_activity = {
                             "name": current_activity.__class__.__name__,
                             "timestamp": datetime.now().isoformat(),
                             "success": False,
                             "error": (result.error if result else "Unknown error"),
                         }
-                    await self.broadcast_state()
+                    self.update_being_state({"last_activity": last_activity})
 
                 self.being.state.update()
                 self.being.memory.persist()
-                await asyncio.sleep(5)
+                self.being.shared_data.expire()
+                self.being.maybe_checkpoint()
+                if current_activity:
+                    await asyncio.sleep(5)
+                else:
+                    # Nothing runnable: sleep until a cooldown ends or energy
+                    # regenerates enough, unless a command changes things first
+                    await self._idle_sleep(
+                        self.being.activity_selector.idle_delay(minimum=5)
+                    )
 
             except Exception as e:
                 logger.error(f"Error in being loop: {e}")
                 await asyncio.sleep(10)
 
-    async def _periodic_state_update(self):
-        """Periodically update and broadcast the being's state every second."""
-        while True:
-            try:
-                current_state = self.being.state.get_current_state()
-                # Provide 'configured' and 'paused' status
-                current_state["configured"] = self.being.is_configured()
-                current_state["paused"] = self.paused
-
-                if current_state != self.being_state:
-                    self.being_state = current_state
-                    await self.broadcast_state()
-                await asyncio.sleep(1)
-            except Exception as e:
-                logger.error(f"Error in periodic state update: {e}")
-                await asyncio.sleep(5)
+    async def _idle_sleep(self, seconds: float):
+        """Sleep up to `seconds`, returning early when the loop is woken."""
+        self._loop_wake.clear()
+        try:
+            await asyncio.wait_for(self._loop_wake.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    def update_being_state(self, changes: Dict[str, Any]):
+        """
+        Merge fields into being_state and, if any actually changed, broadcast
+        once all changes made in the current event loop step are in.
+        """
+        changed = False
+        for key, value in changes.items():
+            if key not in self.being_state or self.being_state[key] != value:
+                self.being_state[key] = value
+                changed = True
+        if not changed or self._broadcast_scheduled:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # No loop, so no clients to tell
+        self._broadcast_scheduled = True
+        loop.call_soon(self._start_broadcast)
+
+    def _start_broadcast(self):
+        self._broadcast_scheduled = False
+        self._broadcast_task = asyncio.create_task(self.broadcast_state())
 
     async def register(self, websocket: WebSocketServerProtocol):
         self.clients.add(websocket)
@@ -272,6 +333,38 @@ class DigitalBeingServer:
             redirect_body,
         )
 
+    @staticmethod
+    def _export_filters(params: Dict[str, Any]) -> Dict[str, Any]:
+        """since/until/activity_type for Memory.export_records from request params."""
+        activity_type = params.get("activity_type") or None
+        if isinstance(activity_type, str) and "," in activity_type:
+            activity_type = activity_type.split(",")
+        return {
+            "since": params.get("since") or None,
+            "until": params.get("until") or None,
+            "activity_type": activity_type,
+        }
+
+    async def stream_memory_export(
+        self, websocket: WebSocketServerProtocol, params: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Send matching records as "memory_export_chunk" messages of NDJSON text,
+        awaiting each send so a slow client throttles the export.
+        """
+        records = self.being.memory.export_records(**self._export_filters(params))
+        chunks = 0
+        size = 0
+        for chunk in iter_chunks(records, params.get("chunk_bytes", 64 * 1024)):
+            await websocket.send(
+                json.dumps(
+                    {"type": "memory_export_chunk", "index": chunks, "data": chunk}
+                )
+            )
+            chunks += 1
+            size += len(chunk)
+        return {"success": True, "chunks": chunks, "bytes": size}
+
     async def handle_websocket(self, websocket: WebSocketServerProtocol, path: str):
         """Handle WebSocket connections at /ws."""
         try:
@@ -313,7 +406,23 @@ class DigitalBeingServer:
             elif message_type == "command":
                 command = data.get("command")
                 if command:
-                    resp = await self.handle_command(command, data.get("params", {}))
+                    if command == "export_memory":
+                        # Streams chunk messages to this client before the response
+                        try:
+                            resp = await self.stream_memory_export(
+                                websocket, data.get("params", {})
+                            )
+                        except ValueError as e:
+                            resp = {"success": False, "message": str(e)}
+                    else:
+                        resp = await self.handle_command(
+                            command, data.get("params", {})
+                        )
+                        if command in LOOP_WAKE_COMMANDS:
+                            self.update_being_state(
+                                {"configured": self.being.is_configured()}
+                            )
+                            self._loop_wake.set()
                     await websocket.send(
                         json.dumps(
                             {
@@ -327,6 +436,77 @@ class DigitalBeingServer:
             logger.error(f"Error in process_message: {e}")
             await websocket.send(json.dumps({"type": "error", "message": str(e)}))
 
+    def _activity_timeseries(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Per-bucket activity counts for the chart, aggregated server-side.
+        Returns zero-filled total/success/failure series per activity type.
+        """
+        range_name = params.get("range", "daily")
+        if range_name not in TIMESERIES_RANGES:
+            return {"success": False, "message": f"Unknown range: {range_name}"}
+        bucket, window = TIMESERIES_RANGES[range_name]
+        utc_offset = int(params.get("utc_offset", 0))
+        activity_types = params.get("activity_types") or None
+        until = datetime.now(timezone.utc)
+        since = until - window
+
+        memory = self.being.memory
+        rows = memory.aggregate(
+            group_by=("activity_type", "time", "success"),
+            bucket=bucket,
+            since=since,
+            activity_type=activity_types,
+            utc_offset=utc_offset,
+        )
+        known_types = memory.aggregate(group_by=("activity_type",), since=since)
+
+        buckets = [
+            datetime.fromtimestamp(start, timezone.utc).isoformat()
+            for start in bucket_starts(
+                int(since.timestamp()), int(until.timestamp()), bucket, utc_offset
+            )
+        ]
+        positions = {start: i for i, start in enumerate(buckets)}
+        series: Dict[str, Dict[str, list]] = {}
+        for row in rows:
+            i = positions.get(row["time"])
+            if i is None:
+                continue
+            counts = series.setdefault(
+                row["activity_type"],
+                {key: [0] * len(buckets) for key in ("total", "success", "failure")},
+            )
+            counts["total"][i] += row["count"]
+            counts["success" if row["success"] else "failure"][i] += row["count"]
+
+        return {
+            "success": True,
+            "range": range_name,
+            "buckets": buckets,
+            "series": series,
+            "activity_types": [row["activity_type"] for row in known_types],
+        }
+
+    def _state_timeseries(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Energy, mood and active task count over one of the activity chart's
+        ranges, from the State's downsampled recorder.
+        """
+        range_name = params.get("range", "daily")
+        if range_name not in TIMESERIES_RANGES:
+            return {"success": False, "message": f"Unknown range: {range_name}"}
+        _, window = TIMESERIES_RANGES[range_name]
+        resolution = (
+            params.get("resolution") or STATE_TIMESERIES_RESOLUTIONS[range_name]
+        )
+        try:
+            series = self.being.state.timeseries.query(
+                since=datetime.now() - window, resolution=resolution
+            )
+        except ValueError as e:
+            return {"success": False, "message": str(e)}
+        return {"success": True, "range": range_name, **series}
+
     async def handle_command(
         self, command: str, params: Dict[str, Any]
     ) -> Dict[str, Any]:
@@ -334,9 +514,11 @@ class DigitalBeingServer:
         try:
             if command == "pause":
                 self.paused = True
+                self.update_being_state({"paused": True})
                 return {"success": True, "message": "Digital Being is paused."}
             elif command == "resume":
                 self.paused = False
+                self.update_being_state({"paused": False})
                 return {"success": True, "message": "Digital Being resumed."}
             elif command == "stop_loop":
                 self.running = False
@@ -393,12 +575,12 @@ class DigitalBeingServer:
                     return {"success": False, "message": str(e)}
 
             elif command == "get_system_status":
+                short_term_count = len(self.being.memory.short_term_memory)
+                total_activities = self.being.memory.get_activity_count()
                 memory_stats = {
-                    "short_term_count": len(self.being.memory.short_term_memory),
-                    "long_term_count": sum(
-                        len(x) for x in self.being.memory.long_term_memory.values()
-                    ),
-                    "total_activities": self.being.memory.get_activity_count(),
+                    "short_term_count": short_term_count,
+                    "long_term_count": total_activities - short_term_count,
+                    "total_activities": total_activities,
                 }
                 current_state = self.being.state.get_current_state()
                 is_config = self.being.is_configured()
@@ -407,6 +589,7 @@ class DigitalBeingServer:
                     "success": True,
                     "memory": memory_stats,
                     "state": current_state,
+                    "shared_data": self.being.shared_data.eviction_stats(),
                     "is_configured": is_config,
                     "config": self.being.configs,
                 }
@@ -522,16 +705,89 @@ class DigitalBeingServer:
 
             elif command == "get_activity_history":
                 limit = params.get("limit", 10)
-                offset = params.get("offset", 0)
-                recents = self.being.memory.get_recent_activities(limit=limit, offset=offset)
                 total = self.being.memory.get_activity_count()
+                cursor = params.get("cursor")
+                activity_type = params.get("activity_type")
+                try:
+                    offset = 0 if cursor else params.get("offset", 0)
+                    if offset:
+                        # Legacy offset paging: the cursor after `offset` records
+                        _, cursor = self.being.memory.page_activities(
+                            limit=offset,
+                            activity_type=activity_type,
+                            resolve_blobs=False,
+                        )
+                    if offset and cursor is None:
+                        recents, next_cursor = [], None  # Past the oldest record
+                    else:
+                        recents, next_cursor = self.being.memory.page_activities(
+                            limit=limit,
+                            cursor=cursor,
+                            activity_type=activity_type,
+                            resolve_blobs=False,
+                        )
+                except ValueError as e:
+                    return {"success": False, "message": str(e)}
                 return {
                     "success": True,
                     "activities": recents,
-                    "has_more": total > (offset + limit),
+                    "next_cursor": next_cursor,
+                    "has_more": next_cursor is not None,
                     "total": total,
                 }
 
+            elif command == "activity_timeseries":
+                return self._activity_timeseries(params)
+
+            elif command == "get_state_timeseries":
+                return self._state_timeseries(params)
+
+            elif command == "search_memory":
+                query = params.get("query", "")
+                if not query.strip():
+                    return {"success": False, "message": "Missing search query"}
+                results = self.being.memory.search(
+                    query,
+                    limit=params.get("limit", 10),
+                    activity_type=params.get("activity_type"),
+                )
+                return {"success": True, "query": query, "results": results}
+
+            elif command == "query_memory":
+                filters = {
+                    key: params.get(key)
+                    for key in ("activity_type", "success", "since", "until", "where")
+                }
+                sort = params.get("sort") or "-timestamp"
+                try:
+                    results = self.being.memory.query(
+                        **filters,
+                        fields=params.get("fields"),
+                        sort=sort,
+                        limit=min(int(params.get("limit", 50)), 1000),
+                        offset=int(params.get("offset", 0)),
+                        resolve_blobs=False,
+                    )
+                    plan = self.being.memory.explain_query(**filters, sort=sort)
+                except ValueError as e:
+                    return {"success": False, "message": str(e)}
+                return {
+                    "success": True,
+                    "results": results,
+                    "count": len(results),
+                    "plan": plan,
+                }
+
+            elif command == "get_blob":
+                # Large payload fields are sent as references in the history
+                # and fetched on demand
+                digest = params.get("hash", "")
+                try:
+                    value = self.being.memory.load_blob(digest)
+                except (ValueError, OSError) as e:
+                    return {"success": False, "message": f"Blob not found: {e}"}
+                return {"success": True, "hash": digest, "value": value}
+
             elif command == "get_composio_app_actions":
                 app_name = params.get("app_name")
                 result = await api_manager.list_actions_for_app(app_name)
@@ -737,6 +993,9 @@ class DigitalBeingServer:
         except Exception as e:
             logger.error(f"Failed to start server: {e}")
             raise
+        finally:
+            # Also runs when the loop is cancelled (Ctrl+C): flush pending state
+            self.being.cleanup()
 
 
 if __name__ == "__main__":
@@ -10,7 +10,7 @@ from typing import Optional, Dict, Any
 
 from litellm import completion
 from framework.api_management import api_manager
-from framework.main import DigitalBeing
+from framework.main import get_being
 
 logger = logging.getLogger(__name__)
 
@@ -39,8 +39,7 @@ class ChatSkill:
         """
         try:
             # Load the config from the being
-            being = DigitalBeing()
-            being.initialize()
+            being = get_being()
             skill_cfg = being.configs.get("skills_config", {}).get("lite_llm", {})
 
             # e.g. "openai/gpt-4", "anthropic/claude-2", etc.
@@ -14,7 +14,7 @@ import aiohttp
 from typing import Optional, Dict, Any, List
 
 from framework.api_management import api_manager
-from framework.main import DigitalBeing
+from framework.main import get_being
 
 logger = logging.getLogger(__name__)
 
@@ -45,8 +45,7 @@ class SoulSkill:
         Initialize connection to the Soul Engine.
         """
         try:
-            being = DigitalBeing()
-            being.initialize()
+            being = get_being()
             skill_cfg = being.configs.get("skills_config", {}).get("opensoul", {})
 
             self.soul_engine_url = skill_cfg.get("soul_engine_url", "http://localhost:3000")
@@ -162,8 +161,7 @@ class SoulSkill:
         This uses Dot's character config to maintain personality consistency.
         """
         try:
-            being = DigitalBeing()
-            being.initialize()
+            being = get_being()
             character = being.configs.get("character_config", {})
 
             personality = character.get("personality", {})
@@ -253,8 +251,7 @@ class SoulSkill:
                     pass
 
             # Return local state
-            being = DigitalBeing()
-            being.initialize()
+            being = get_being()
             character = being.configs.get("character_config", {})
 
             return {
@@ -7,7 +7,7 @@ let ws = null;
 let reconnectAttempts = 0;
 const maxReconnectAttempts = 5;
 const PAGE_SIZE = 50;
-let currentOffset = 0;
+let nextHistoryCursor = null;
 
 // Trackers for config editing, chart data, etc.
 let currentApiKeySetup = null;
@@ -16,6 +16,7 @@ let currentConfig = {};
 // For chart
 let activityChart = null;
 let activityTypes = new Set();
+let uncheckedActivityTypes = new Set();
 let activityData = [];
 let activityColorMap = new Map();
 
@@ -127,6 +128,18 @@ function connect() {
           case 'get_activity_history':
             displayActivityHistory(data.response);
             break;
+          case 'activity_timeseries':
+            // Rendered by updateActivityChart() via sendCommand()
+            break;
+          case 'get_state_timeseries':
+            // Rendered by updateActivityChart() via sendCommand()
+            break;
+          case 'get_blob':
+            // Handled by loadActivityPayload() via sendCommand()
+            break;
+          case 'export_memory':
+            // Handled by exportMemory() via sendCommand()
+            break;
           case 'update_config':
             getConfig();
             break;
@@ -296,21 +309,20 @@ function getConfig() {
 /*******************************************************
  *               Activity History
  *******************************************************/
-function getActivityHistory(offset = 0) {
+function getActivityHistory(cursor = null) {
   if (!ws || ws.readyState !== WebSocket.OPEN) return;
   ws.send(JSON.stringify({
     type: 'command',
     command: 'get_activity_history',
-    params: { offset, limit: PAGE_SIZE }
+    params: { cursor, limit: PAGE_SIZE }
   }));
 }
 function reloadHistory() {
-  currentOffset = 0;
-  getActivityHistory(0);
+  nextHistoryCursor = null;
+  getActivityHistory(null);
 }
 function loadMoreActivities() {
-  currentOffset += PAGE_SIZE;
-  getActivityHistory(currentOffset);
+  getActivityHistory(nextHistoryCursor);
 }
 
 /*******************************************************
@@ -726,10 +738,87 @@ function removeArrayItem(section, idx) {
 /*******************************************************
  *    Display: Activity History
  *******************************************************/
+// Large payload fields arrive as {"$blob": <sha256>, "bytes": <size>}
+// references and are fetched only when the user expands them
+// (only a payload or a field of an object payload can be one)
+function isBlobRef(value) {
+  return value !== null && typeof value === 'object' && !Array.isArray(value)
+    && Object.keys(value).length === 2 && typeof value['$blob'] === 'string'
+    && Number.isInteger(value.bytes);
+}
+function hasBlobRefs(payload) {
+  if (isBlobRef(payload)) return true;
+  return payload !== null && typeof payload === 'object' && !Array.isArray(payload)
+    && Object.values(payload).some(isBlobRef);
+}
+async function resolveBlobRefs(payload) {
+  const load = async (ref) => {
+    const resp = await sendCommand('get_blob', { hash: ref['$blob'] });
+    if (!resp.success) throw new Error(resp.message);
+    return resp.value;
+  };
+  if (isBlobRef(payload)) return load(payload);
+  if (payload === null || typeof payload !== 'object' || Array.isArray(payload)) {
+    return payload;
+  }
+  const resolved = {};
+  // One request at a time: sendCommand() matches responses by command name
+  for (const [key, value] of Object.entries(payload)) {
+    resolved[key] = isBlobRef(value) ? await load(value) : value;
+  }
+  return resolved;
+}
+async function loadActivityPayload(index) {
+  const a = activityData[index];
+  const button = document.getElementById(`loadPayload-${index}`);
+  if (!a) return;
+  try {
+    if (button) button.disabled = true;
+    a.data = await resolveBlobRefs(a.data);
+    a.metadata = await resolveBlobRefs(a.metadata);
+    const dataPre = document.getElementById(`activityData-${index}`);
+    const metadataPre = document.getElementById(`activityMetadata-${index}`);
+    if (dataPre) dataPre.textContent = JSON.stringify(a.data, null, 2);
+    if (metadataPre) metadataPre.textContent = JSON.stringify(a.metadata, null, 2);
+    if (button) button.remove();
+  } catch (err) {
+    console.error('Error loading activity payload:', err);
+    if (button) button.disabled = false;
+  }
+}
+
+async function exportMemory() {
+  // The server streams "memory_export_chunk" messages, then the response
+  const button = document.getElementById('exportMemoryButton');
+  const chunks = [];
+  const listener = (evt) => {
+    const msg = JSON.parse(evt.data);
+    if (msg.type === 'memory_export_chunk') chunks.push(msg.data);
+  };
+  try {
+    if (button) button.disabled = true;
+    ws.addEventListener('message', listener);
+    const resp = await sendCommand('export_memory');
+    if (!resp.success) throw new Error(resp.message);
+    const url = URL.createObjectURL(
+      new Blob(chunks, { type: 'application/x-ndjson' })
+    );
+    const link = document.createElement('a');
+    link.href = url;
+    link.download = 'memory.ndjson';
+    link.click();
+    URL.revokeObjectURL(url);
+  } catch (err) {
+    console.error('Error exporting memory:', err);
+  } finally {
+    if (ws) ws.removeEventListener('message', listener);
+    if (button) button.disabled = false;
+  }
+}
+
 function displayActivityHistory(data) {
   const entriesDiv = document.getElementById('activityEntries');
   const loadMoreBtn = document.getElementById('loadMoreButton');
-  const checkboxesDiv = document.getElementById('activityCheckboxes');
 
   if (data.activities && data.activities.length) {
     // Append to existing activityData
@@ -744,13 +833,18 @@ function displayActivityHistory(data) {
     });
 
     // Generate HTML for new activities
-    const newEntriesHTML = data.activities.map(a => {
+    const firstIndex = activityData.length - data.activities.length;
+    const newEntriesHTML = data.activities.map((a, i) => {
       const col = getActivityColor(a.activity_type);
       return `
         <div class="activity-entry" style="background:var(--section-bg); padding:10px; margin-bottom:10px; border-radius:8px;">
           <div>
             <span style="color:var(--text-secondary)">${new Date(a.timestamp).toLocaleString()}</span>
             <span style="color:${col}; font-weight:bold;">${a.activity_type}</span>
+            ${a.count > 1
+          ? `<span style="color:var(--text-secondary)">×${a.count} until ${new Date(a.last_seen).toLocaleString()}</span>`
+          : ''
+        }
             ${a.success
           ? `<span style="color: var(--success-color)">✓ Success</span>`
           : `<span style="color: var(--error-color)">✗ Failed - ${a.error || ''}</span>`
@@ -758,14 +852,17 @@ function displayActivityHistory(data) {
           </div>
           ${a.data ? `
             <div style="background:var(--card-bg);padding:8px;margin-top:8px;border-radius:4px;">
-              <pre>${JSON.stringify(a.data, null, 2)}</pre>
+              <pre id="activityData-${firstIndex + i}">${JSON.stringify(a.data, null, 2)}</pre>
             </div>
           ` : ''}
           ${a.metadata ? `
             <div style="background:var(--card-bg);padding:8px;margin-top:8px;border-radius:4px;">
-              <pre>${JSON.stringify(a.metadata, null, 2)}</pre>
+              <pre id="activityMetadata-${firstIndex + i}">${JSON.stringify(a.metadata, null, 2)}</pre>
             </div>
           ` : ''}
+          ${hasBlobRefs(a.data) || hasBlobRefs(a.metadata) ? `
+            <button id="loadPayload-${firstIndex + i}" onclick="loadActivityPayload(${firstIndex + i})">Load full payload</button>
+          ` : ''}
         </div>
       `;
     }).join('');
@@ -773,18 +870,10 @@ function displayActivityHistory(data) {
     // Append new activities to the existing entries
     entriesDiv.insertAdjacentHTML('beforeend', newEntriesHTML);
 
-    // Update checkboxes (ensure unique and sorted)
-    checkboxesDiv.innerHTML = Array.from(activityTypes).sort().map(t => {
-      const c = getActivityColor(t);
-      return `
-        <label style="margin-right:12px;">
-          <input type="checkbox" value="${t}" checked onchange="updateActivityChart()">
-          <span style="color:${c}">${t}</span>
-        </label>
-      `;
-    }).join('');
+    renderActivityCheckboxes();
 
     // Update the "Load More" button visibility
+    nextHistoryCursor = data.next_cursor;
     loadMoreBtn.style.display = data.has_more ? 'block' : 'none';
 
     // Initialize or update chart
@@ -794,7 +883,7 @@ function displayActivityHistory(data) {
       initializeActivityChart();
     }
   } else {
-    if (currentOffset === 0) {
+    if (!activityData.length) {
       // If no activities at all
       entriesDiv.innerHTML = '<p>No activities recorded yet.</p>';
     }
@@ -852,6 +941,13 @@ function initializeActivityChart() {
           beginAtZero: true,
           grid: { color: 'rgba(255,255,255,0.1)' },
           ticks: { color: '#fff', stepSize: 1, precision: 0 }
+        },
+        energy: {
+          position: 'right',
+          min: 0,
+          max: 1,
+          grid: { drawOnChartArea: false },
+          ticks: { color: '#fff' }
         }
       },
       elements: {
@@ -882,59 +978,68 @@ function initializeActivityChart() {
   updateActivityChart();
 }
 
-function updateActivityChart() {
-  if (!activityChart || !activityData) return;
+// Update checkboxes (ensure unique and sorted)
+function renderActivityCheckboxes() {
+  const checkboxesDiv = document.getElementById('activityCheckboxes');
+  checkboxesDiv.innerHTML = Array.from(activityTypes).sort().map(t => {
+    const c = getActivityColor(t);
+    const checked = uncheckedActivityTypes.has(t) ? '' : 'checked';
+    return `
+      <label style="margin-right:12px;">
+        <input type="checkbox" value="${t}" ${checked} onchange="toggleActivityType(this)">
+        <span style="color:${c}">${t}</span>
+      </label>
+    `;
+  }).join('');
+}
 
-  const timeRange = document.getElementById('timeRange').value;
-  const selectedActivities = new Set(
-    Array.from(document.querySelectorAll('#activityCheckboxes input:checked'))
-      .map(c => c.value)
-  );
+function toggleActivityType(checkbox) {
+  if (checkbox.checked) {
+    uncheckedActivityTypes.delete(checkbox.value);
+  } else {
+    uncheckedActivityTypes.add(checkbox.value);
+  }
+  updateActivityChart();
+}
+
+// Counts per period are aggregated on the server over the whole history,
+// so the chart no longer depends on how much history has been loaded.
+async function updateActivityChart() {
+  if (!activityChart) return;
 
-  // We'll bucket the activities by period
-  const activities = {};
-  const now = new Date();
-  let startTime;
-  switch (timeRange) {
-    case 'hourly':
-      startTime = new Date(now.getTime() - 24 * 3600_000);
-      break;
-    case 'daily':
-      startTime = new Date(now.getTime() - 7 * 24 * 3600_000);
-      break;
-    case 'weekly':
-      startTime = new Date(now.getTime() - 4 * 7 * 24 * 3600_000);
-      break;
-    case 'monthly':
-      startTime = new Date(now.getTime() - 12 * 30 * 24 * 3600_000);
-      break;
-    default:
-      startTime = new Date(now.getTime() - 7 * 24 * 3600_000);
+  const timeRange = document.getElementById('timeRange').value;
+  const params = {
+    range: timeRange,
+    utc_offset: -new Date().getTimezoneOffset() * 60
+  };
+  if (uncheckedActivityTypes.size) {
+    params.activity_types = Array.from(activityTypes)
+      .filter(t => !uncheckedActivityTypes.has(t));
   }
 
-  // Count occurrences in each period bucket
-  activityData.forEach(act => {
-    if (!selectedActivities.has(act.activity_type)) return;
-    const ts = new Date(act.timestamp);
-    if (ts < startTime) return;
-    // Use getPeriodKey from chart-utils
-    const periodKey = getPeriodKey(ts, timeRange);
-    if (!activities[act.activity_type]) {
-      activities[act.activity_type] = {};
-    }
-    activities[act.activity_type][periodKey] =
-      (activities[act.activity_type][periodKey] || 0) + 1;
-  });
+  let resp, stateResp;
+  try {
+    [resp, stateResp] = await Promise.all([
+      sendCommand('activity_timeseries', params),
+      sendCommand('get_state_timeseries', { range: timeRange })
+    ]);
+  } catch (e) {
+    console.error('Error fetching activity time series:', e);
+    return;
+  }
+  if (!resp.success || resp.range !== document.getElementById('timeRange').value) return;
 
-  // We'll generate a list of all possible period keys
-  const allPeriods = getAllPeriods(startTime, now, timeRange);
+  // Types active in this range may not be in the loaded history yet
+  const before = activityTypes.size;
+  resp.activity_types.forEach(t => activityTypes.add(t));
+  if (activityTypes.size !== before) renderActivityCheckboxes();
 
   // Build the datasets
-  const datasets = Object.keys(activities).sort().map(actType => {
+  const datasets = Object.keys(resp.series).sort().map(actType => {
     const c = getActivityColor(actType);
-    const dataPoints = allPeriods.map(pk => ({
-      x: getPeriodDate(pk, timeRange),
-      y: activities[actType][pk] || 0
+    const dataPoints = resp.buckets.map((bucket, i) => ({
+      x: new Date(bucket),
+      y: resp.series[actType].total[i]
     }));
     return {
       label: actType,
@@ -946,6 +1051,21 @@ function updateActivityChart() {
     };
   });
 
+  // Energy on its own axis, so it can be read against the activity counts
+  if (stateResp.success && stateResp.timestamp.length) {
+    datasets.push({
+      label: 'Energy',
+      yAxisID: 'energy',
+      data: stateResp.timestamp.map((t, i) => ({ x: new Date(t), y: stateResp.energy[i] })),
+      borderColor: 'rgb(255, 255, 255)',
+      borderDash: [4, 4],
+      borderWidth: 1,
+      pointRadius: 0,
+      fill: false,
+      tension: 0.3
+    });
+  }
+
   activityChart.data.datasets = datasets;
   // Set x-axis time unit
   activityChart.options.scales.x.time.unit = (
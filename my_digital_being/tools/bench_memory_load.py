@@ -0,0 +1,113 @@
+"""
+Benchmark Memory startup time and peak RSS against memory.json size.
+
+Compares the legacy memory.json layout (fully parsed with json.load) with the
+line-oriented snapshot layout, which only decodes short-term memory at boot.
+Each measurement runs in a fresh subprocess and reads its peak RSS from
+/proc/self/status (VmHWM), which, unlike ru_maxrss, is not inherited from
+the benchmark process across fork/exec. Linux only.
+
+Usage (from my_digital_being/):
+    python tools/bench_memory_load.py [record_count ...]
+"""
+
+import json
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from framework.memory_snapshot import LazyLongTermMemory, write_snapshot  # noqa: E402
+
+ACTIVITY_TYPES = [
+    "NapActivity",
+    "DrawActivity",
+    "FetchNewsActivity",
+    "DailyThoughtActivity",
+    "AnalyzeDailyActivity",
+]
+
+
+def build_memory(record_count: int):
+    """Generate (short_term, long_term) with realistic-looking payloads."""
+    start = datetime.now(timezone.utc) - timedelta(minutes=record_count)
+    entries = [
+        {
+            "timestamp": (start + timedelta(minutes=i)).isoformat(),
+            "activity_type": ACTIVITY_TYPES[i % len(ACTIVITY_TYPES)],
+            "success": i % 7 != 0,
+            "error": None if i % 7 else "Simulated failure",
+            "data": {"message": f"Record {i} " + "lorem ipsum " * 20, "index": i},
+            "metadata": {"model": "gpt-4o", "finish_reason": "stop"},
+        }
+        for i in range(record_count)
+    ]
+    short_term = entries[-50:]
+    long_term = {}
+    for entry in entries[:-50]:
+        long_term.setdefault(entry["activity_type"], []).append(entry)
+    return short_term, long_term
+
+
+def measure_load(storage_dir: Path) -> dict:
+    """Construct a Memory in a subprocess and report load time and peak RSS."""
+    script = (
+        "import json, sys, time, logging\n"
+        "logging.disable(logging.CRITICAL)\n"
+        f"sys.path.insert(0, {str(Path(__file__).parent.parent)!r})\n"
+        "from framework.memory import Memory\n"
+        "def peak_kb():\n"
+        "    for line in open('/proc/self/status'):\n"
+        "        if line.startswith('VmHWM:'):\n"
+        "            return int(line.split()[1])\n"
+        "before = peak_kb()\n"
+        "start = time.perf_counter()\n"
+        f"memory = Memory({str(storage_dir)!r})\n"
+        "elapsed = time.perf_counter() - start\n"
+        "peak = peak_kb()\n"
+        "print(json.dumps({'seconds': elapsed, 'peak_kb': peak, 'delta_kb': peak - before}))\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or [1_000, 10_000, 100_000]
+    print(
+        f"{'records':>9} {'file MB':>8} {'layout':>7} "
+        f"{'load s':>8} {'peak RSS MB':>12} {'load RSS MB':>12}"
+    )
+    for count in counts:
+        short_term, long_term = build_memory(count)
+        for layout in ("legacy", "lines"):
+            with tempfile.TemporaryDirectory() as tmp:
+                memory_file = Path(tmp) / "memory.json"
+                if layout == "legacy":
+                    with open(memory_file, "w") as f:
+                        json.dump(
+                            {"short_term": short_term, "long_term": long_term},
+                            f,
+                            indent=2,
+                        )
+                else:
+                    write_snapshot(
+                        memory_file,
+                        count,
+                        short_term,
+                        LazyLongTermMemory(loaded=long_term),
+                    )
+                size_mb = memory_file.stat().st_size / 1e6
+                result = measure_load(Path(tmp))
+                print(
+                    f"{count:>9} {size_mb:>8.1f} {layout:>7} {result['seconds']:>8.3f} "
+                    f"{result['peak_kb'] / 1024:>12.1f} {result['delta_kb'] / 1024:>12.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Benchmark the resident cost of memory entries: plain dicts versus the slotted
+MemoryRecord (interned activity type, epoch-microsecond timestamp).
+
+For each layout and record count a fresh subprocess inserts the records into
+per-type buckets the way long-term memory holds them and reports:
+- resident memory added by the records (VmRSS delta, Linux only)
+- insert throughput
+- a find_activities-style scan (type + success + time range over everything)
+- exact timestamp lookups with bisect_records(), as used by _find_entry
+
+Usage (from my_digital_being/):
+    python tools/bench_memory_records.py [record_count ...]
+"""
+
+import gc
+import json
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from framework.memory_record import MemoryRecord, bisect_records  # noqa: E402
+
+ACTIVITY_TYPES = [
+    "NapActivity",
+    "DrawActivity",
+    "FetchNewsActivity",
+    "DailyThoughtActivity",
+    "AnalyzeDailyActivity",
+]
+LOOKUPS = 1000
+
+
+def rss_kb() -> int:
+    for line in open("/proc/self/status"):
+        if line.startswith("VmRSS:"):
+            return int(line.split()[1])
+    return 0
+
+
+def run_child(layout: str, count: int) -> dict:
+    """Build `count` entries in this process and measure them."""
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    gc.collect()
+    before = rss_kb()
+
+    buckets = {name: [] for name in ACTIVITY_TYPES}
+    began = time.perf_counter()
+    for i in range(count):
+        name = ACTIVITY_TYPES[i % len(ACTIVITY_TYPES)]
+        # A fresh string per entry, as json.loads produces when paging in
+        entry = {
+            "timestamp": (start + timedelta(seconds=i)).isoformat(),
+            "activity_type": (name + " ")[:-1],
+            "success": i % 7 != 0,
+            "error": None if i % 7 else "Simulated failure",
+            "data": {"message": f"Record {i}", "index": i},
+            "metadata": {"model": "gpt-4o"},
+            "duration": 0.25,
+        }
+        if layout == "records":
+            entry = MemoryRecord.from_dict(entry)
+        buckets[name].append(entry)
+    insert_seconds = time.perf_counter() - began
+    gc.collect()
+    resident_kb = rss_kb() - before
+
+    since = (start + timedelta(seconds=count // 2)).isoformat()
+    began = time.perf_counter()
+    matches = [
+        entry
+        for bucket in buckets.values()
+        for entry in bucket
+        if entry["activity_type"] == "DrawActivity"
+        and entry["success"]
+        and entry["timestamp"] >= since
+    ]
+    scan_seconds = time.perf_counter() - began
+
+    rng = random.Random(0)
+    targets = [
+        (
+            start + timedelta(seconds=rng.randrange(0, count, len(ACTIVITY_TYPES)))
+        ).isoformat()
+        for _ in range(LOOKUPS)
+    ]
+    bucket = buckets[ACTIVITY_TYPES[0]]
+    began = time.perf_counter()
+    for timestamp in targets:
+        i = bisect_records(bucket, timestamp)
+        assert bucket[i]["timestamp"] == timestamp
+    lookup_seconds = time.perf_counter() - began
+
+    return {
+        "resident_kb": resident_kb,
+        "insert_per_s": count / insert_seconds,
+        "scan_seconds": scan_seconds,
+        "scan_matches": len(matches),
+        "lookup_us": lookup_seconds / LOOKUPS * 1e6,
+    }
+
+
+def measure(layout: str, count: int) -> dict:
+    output = subprocess.run(
+        [sys.executable, __file__, "--child", layout, str(count)],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    if sys.argv[1:2] == ["--child"]:
+        print(json.dumps(run_child(sys.argv[2], int(sys.argv[3]))))
+        return
+
+    counts = [int(arg) for arg in sys.argv[1:]] or [100_000, 1_000_000]
+    print(
+        f"{'records':>9} {'layout':>8} {'RSS MB':>8} {'B/record':>9} "
+        f"{'insert/s':>10} {'scan s':>8} {'lookup us':>10}"
+    )
+    for count in counts:
+        for layout in ("dicts", "records"):
+            result = measure(layout, count)
+            print(
+                f"{count:>9} {layout:>8} {result['resident_kb'] / 1024:>8.1f} "
+                f"{result['resident_kb'] * 1024 / count:>9.0f} "
+                f"{result['insert_per_s']:>10.0f} {result['scan_seconds']:>8.3f} "
+                f"{result['lookup_us']:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
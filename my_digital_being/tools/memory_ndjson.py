@@ -0,0 +1,135 @@
+"""
+Export memory records to NDJSON, or import them, without loading the whole
+history. Files ending in .gz are gzip-compressed; "-" is stdout/stdin.
+
+The memory backend and storage settings are read from
+config/activity_constraints.json (memory_config) unless given on the command
+line, so an export from a json-backed being can be imported into a sqlite
+one and vice versa.
+
+The storage is locked while the tool has it open (framework/memory_lock), so
+it refuses to run against the storage of a running being: stop the being
+first, or export from the web UI.
+
+Usage (from my_digital_being/):
+    python tools/memory_ndjson.py export memory.ndjson.gz \\
+        [--since 2025-01-01] [--until 2025-02-01] [--type DrawActivity ...]
+    python tools/memory_ndjson.py import memory.ndjson.gz [--batch-size 1000]
+"""
+
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from framework.memory import Memory  # noqa: E402
+from framework.memory_lock import StorageLockedError  # noqa: E402
+from framework.memory_ndjson import (  # noqa: E402
+    decode_lines,
+    iter_chunks,
+    open_ndjson,
+)
+
+CONFIG_FILE = Path(__file__).parent.parent / "config" / "activity_constraints.json"
+
+
+def load_memory_config() -> dict:
+    try:
+        with open(CONFIG_FILE, "r", encoding="utf-8") as f:
+            return json.load(f).get("memory_config", {})
+    except (OSError, ValueError):
+        return {}
+
+
+def open_memory(args) -> Memory:
+    memory_config = load_memory_config()
+    return Memory(
+        storage_path=args.storage,
+        backend=args.backend or memory_config.get("backend", "json"),
+        cold_after_days=memory_config.get("cold_after_days", 30),
+        blob_threshold=memory_config.get("blob_threshold_bytes", 4096),
+        # Retention is left to the running being; an import keeps everything
+    )
+
+
+def export(args) -> int:
+    memory = open_memory(args)
+    count = 0
+
+    def counted(records):
+        nonlocal count
+        for entry in records:
+            count += 1
+            yield entry
+
+    records = counted(
+        memory.export_records(
+            since=args.since, until=args.until, activity_type=args.type or None
+        )
+    )
+    out = sys.stdout if args.file == "-" else open_ndjson(args.file, "w")
+    try:
+        for chunk in iter_chunks(records):
+            out.write(chunk)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        memory.close()
+    return count
+
+
+def import_(args) -> int:
+    memory = open_memory(args)
+    source = sys.stdin if args.file == "-" else open_ndjson(args.file, "r")
+    try:
+        return memory.import_records(decode_lines(source), args.batch_size)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        memory.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--storage", default="./storage", help="Memory directory")
+    parser.add_argument(
+        "--backend",
+        choices=["json", "sqlite", "tiered"],
+        help="Memory backend (default: memory_config.backend)",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = commands.add_parser("export", help="Write records as NDJSON")
+    export_parser.add_argument("file", help="Output file (.gz to compress) or -")
+    export_parser.add_argument("--since", help="ISO timestamp, inclusive")
+    export_parser.add_argument("--until", help="ISO timestamp, exclusive")
+    export_parser.add_argument(
+        "--type", action="append", help="Activity type (repeatable)"
+    )
+
+    import_parser = commands.add_parser("import", help="Load records from NDJSON")
+    import_parser.add_argument("file", help="Input file (.gz if compressed) or -")
+    import_parser.add_argument(
+        "--batch-size", type=int, default=1000, help="Records per write"
+    )
+
+    args = parser.parse_args()
+    # Progress goes to stderr; an export to stdout must stay pure NDJSON
+    logging.basicConfig(level=logging.WARNING, stream=sys.stderr)
+    try:
+        if args.command == "export":
+            count = export(args)
+            print(f"Exported {count} records", file=sys.stderr)
+        else:
+            count = import_(args)
+            print(f"Imported {count} records", file=sys.stderr)
+    except (ValueError, StorageLockedError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
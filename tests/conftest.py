@@ -0,0 +1,32 @@
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# Framework modules are imported the way server.py imports them
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "my_digital_being"))
+
+
+def store(memory, activity_type, data=None, success=True, duration=1.0):
+    """Record one activity result the way the being's main loop does."""
+    memory.store_activity_result(
+        {
+            "activity_type": activity_type,
+            "result": {"success": success, "data": data},
+            "duration": duration,
+        }
+    )
+
+
+def records(count, days_ago=0):
+    """`count` raw records one minute apart, alternating Nap/Draw, ending
+    `days_ago` days before now."""
+    start = datetime.now(timezone.utc) - timedelta(days=days_ago, minutes=count)
+    return [
+        {
+            "timestamp": (start + timedelta(minutes=i)).isoformat(),
+            "activity_type": "Draw" if i % 2 else "Nap",
+            "success": True,
+            "data": {"i": i, "days_ago": days_ago},
+        }
+        for i in range(count)
+    ]
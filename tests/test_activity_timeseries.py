@@ -0,0 +1,49 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from framework.memory import Memory
+from server import DigitalBeingServer
+
+
+def make_server(memory):
+    server = DigitalBeingServer.__new__(DigitalBeingServer)
+    server.being = SimpleNamespace(memory=memory)
+    return server
+
+
+def test_daily_series_are_zero_filled_per_type(tmp_path):
+    now = datetime.now(timezone.utc)
+    memory = Memory(str(tmp_path))
+    memory.import_records(
+        [
+            {
+                "timestamp": (now - timedelta(days=2)).isoformat(),
+                "activity_type": "Nap",
+                "success": True,
+            },
+            {
+                "timestamp": (now - timedelta(days=2, minutes=1)).isoformat(),
+                "activity_type": "Nap",
+                "success": False,
+            },
+            {
+                "timestamp": (now - timedelta(days=30)).isoformat(),
+                "activity_type": "Draw",
+                "success": True,
+            },
+        ]
+    )
+
+    result = make_server(memory)._activity_timeseries({"range": "daily"})
+    assert result["success"]
+    assert len(result["buckets"]) in (7, 8)
+    assert result["activity_types"] == ["Nap"]  # Draw is outside the window
+    naps = result["series"]["Nap"]
+    assert sum(naps["total"]) == 2
+    assert sum(naps["success"]) == sum(naps["failure"]) == 1
+    assert naps["total"].count(0) == len(result["buckets"]) - 1
+
+
+def test_unknown_range_is_rejected(tmp_path):
+    server = make_server(Memory(str(tmp_path)))
+    assert not server._activity_timeseries({"range": "yearly"})["success"]
@@ -0,0 +1,108 @@
+import pathlib
+from datetime import datetime
+
+import pytest
+
+from framework.activity_loader import ActivityLoader
+from framework.activity_selector import ActivitySelector
+from framework.checkpoint import Checkpoint, write_checkpoint
+from framework.memory import Memory
+
+ACTIVITY = """
+from framework.activity_decorator import ActivityBase
+
+
+class NapActivity(ActivityBase):
+    pass
+"""
+
+
+def test_sections_round_trip(tmp_path):
+    path = tmp_path / "runtime.ckpt"
+    write_checkpoint(path, {"state": {"mood": "calm"}, "loader": {}})
+    checkpoint = Checkpoint.load(path)
+    assert "state" in checkpoint and "memory" not in checkpoint
+    assert checkpoint.section("state") == {"mood": "calm"}
+    assert checkpoint.section("memory", "default") == "default"
+    checkpoint.close()
+
+
+def test_section_names_longer_than_the_table_allows_are_rejected(tmp_path):
+    path = tmp_path / "runtime.ckpt"
+    write_checkpoint(path, {"x" * 16: 1})
+    with pytest.raises(ValueError):
+        write_checkpoint(path, {"shared_data_written": {}})
+    with pytest.raises(ValueError):
+        write_checkpoint(path, {"é" * 9: 1})  # 9 characters, 18 bytes
+    checkpoint = Checkpoint.load(path)
+    assert checkpoint.section("x" * 16) == 1
+    checkpoint.close()
+
+
+def test_corrupt_sections_and_files_are_ignored(tmp_path):
+    path = tmp_path / "runtime.ckpt"
+    write_checkpoint(path, {"a": {"value": 1}, "b": {"value": 2}})
+    data = bytearray(path.read_bytes())
+    data[-3] ^= 0xFF  # Inside section b
+    path.write_bytes(bytes(data))
+    checkpoint = Checkpoint.load(path)
+    assert checkpoint.section("a") == {"value": 1}
+    assert checkpoint.section("b") is None
+    checkpoint.close()
+
+    path.write_bytes(bytes(data[: len(data) - 10]))
+    assert Checkpoint.load(path) is None  # Truncated
+    path.write_bytes(b"not a checkpoint at all")
+    assert Checkpoint.load(path) is None
+    assert Checkpoint.load(tmp_path / "missing.ckpt") is None
+
+
+def test_memory_loads_through_a_saved_cursor(tmp_path):
+    memory = Memory(str(tmp_path))
+    memory.import_records(
+        [
+            {
+                "timestamp": f"2023-01-01T00:0{i}:00+00:00",
+                "activity_type": "Nap",
+                "success": True,
+                "data": {"i": i},
+            }
+            for i in range(5)
+        ]
+    )
+    memory.close()
+    cursor = memory.snapshot_cursor()
+    assert cursor
+
+    reloaded = Memory(str(tmp_path), cursor=cursor)
+    assert reloaded.get_activity_count() == 5
+    reloaded.close()
+
+
+def test_selector_cooldowns_survive_a_restart():
+    selector = ActivitySelector({}, state=None)
+    selector.last_activity_times["NapActivity"] = datetime(2024, 1, 1, 12, 0)
+    restored = ActivitySelector({}, state=None)
+    restored.last_activity_times["DrawActivity"] = datetime(2024, 1, 2)
+    restored.restore_cooldowns(
+        {**selector.get_cooldowns(), "DrawActivity": "2023-01-01T00:00:00", "x": None}
+    )
+    assert restored.last_activity_times == {
+        "NapActivity": datetime(2024, 1, 1, 12, 0),
+        "DrawActivity": datetime(2024, 1, 2),  # Newer than the checkpoint
+    }
+
+
+def test_loader_manifest_skips_scanning_unchanged_files(tmp_path, monkeypatch):
+    (tmp_path / "activity_nap.py").write_text(ACTIVITY)
+    loader = ActivityLoader(str(tmp_path))
+    loader.load_activities()
+    assert loader.manifest["activity_nap.py"]["class_name"] == "NapActivity"
+
+    def no_reads(self, *args, **kwargs):
+        raise AssertionError(f"{self} was read")
+
+    monkeypatch.setattr(pathlib.Path, "read_text", no_reads)
+    resumed = ActivityLoader(str(tmp_path))
+    resumed.load_activities(loader.manifest)
+    assert resumed.get_activity("activity_nap").__name__ == "NapActivity"
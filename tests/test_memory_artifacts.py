@@ -0,0 +1,55 @@
+from framework.memory import Memory
+from framework.memory_artifacts import ArtifactIndex, extract_artifacts
+
+
+def draw(url, minute):
+    return {
+        "timestamp": f"2024-01-01T00:{minute:02d}:00+00:00",
+        "activity_type": "DrawActivity",
+        "success": True,
+        "data": {"image_data": {"url": url}},
+    }
+
+
+def tweet(tweet_id, media_urls, minute):
+    return {
+        "timestamp": f"2024-01-01T00:{minute:02d}:00+00:00",
+        "activity_type": "PostRecentMemoriesTweetActivity",
+        "success": True,
+        "data": {"tweet_id": tweet_id, "media_urls": media_urls},
+    }
+
+
+def test_extract_artifacts_reads_paths_and_metadata():
+    entry = {
+        **draw("https://x/1.png", 0),
+        "metadata": {"artifacts": {"commit": "abc"}, "artifacts_used": {"nope": 1}},
+    }
+    produced, used = extract_artifacts(entry)
+    assert produced == [("image", "https://x/1.png"), ("commit", "abc")]
+    assert used == []
+    assert extract_artifacts({**entry, "success": False}) == ([], [])
+
+
+def test_uses_mark_artifacts_even_when_seen_first(tmp_path):
+    index = ArtifactIndex(tmp_path / "memory.artifacts.json")
+    index.add(tweet("t1", ["https://x/2.png"], 0))
+    index.add(draw("https://x/1.png", 1))
+    index.add(draw("https://x/2.png", 2))
+    assert index.values("image", unused=True) == ["https://x/1.png"]
+    assert index.get("image", "https://x/2.png")["used_by"] == [["tweet", "t1"]]
+
+
+def test_memory_artifact_index_survives_reload(tmp_path):
+    memory = Memory(str(tmp_path))
+    memory.import_records(
+        [draw("https://x/1.png", 0), draw("https://x/2.png", 1)]
+        + [tweet("t1", ["https://x/1.png"], 2)]
+    )
+    assert memory.get_artifacts("image", unused=True) == ["https://x/2.png"]
+    memory.close()
+
+    reloaded = Memory(str(tmp_path))
+    assert reloaded.has_artifact("tweet", "t1")
+    assert reloaded.get_artifact("image", "https://x/1.png")["used_by"]
+    assert reloaded.get_artifacts("image", limit=1) == ["https://x/2.png"]
@@ -0,0 +1,77 @@
+from framework.memory import Memory
+from framework.memory_blobs import BlobStore, is_blob_ref
+
+
+def test_large_fields_are_stored_once(tmp_path):
+    blobs = BlobStore(tmp_path / "blobs", threshold=64)
+    payload = {"image": "x" * 100, "small": "ok"}
+
+    first = blobs.externalize(payload)
+    second = blobs.externalize(dict(payload))
+    assert is_blob_ref(first["image"])
+    assert first["small"] == "ok"
+    assert first == second
+    assert len(list((tmp_path / "blobs").glob("*/*"))) == 1
+    assert blobs.resolve(first) == payload
+
+
+def test_escaped_strings_count_their_encoded_size(tmp_path):
+    blobs = BlobStore(tmp_path / "blobs", threshold=120)
+    # 20 characters, but 122 bytes once \uXXXX-escaped
+    assert is_blob_ref(blobs.externalize("☃" * 20))
+    assert blobs.externalize("a" * 20) == "a" * 20
+
+
+def test_unreferenced_blobs_are_collected(tmp_path):
+    blobs = BlobStore(tmp_path / "blobs", threshold=8)
+    kept = blobs.put("kept payload")
+    blobs.put("dropped payload")
+    assert blobs.collect({kept["$blob"]}) == 1
+    assert blobs.get(kept["$blob"]) == "kept payload"
+
+
+def test_memory_resolves_blobs_on_read(tmp_path):
+    memory = Memory(str(tmp_path), blob_threshold=64)
+    memory.store_activity_result(
+        {
+            "activity_type": "Draw",
+            "result": {"success": True, "data": {"image": "y" * 500}},
+        }
+    )
+    memory.close()
+
+    reloaded = Memory(str(tmp_path), blob_threshold=64)
+    stored = reloaded.short_term_memory[0]["data"]["image"]
+    assert is_blob_ref(stored)
+    assert reloaded.get_recent_activities()[0]["data"]["image"] == "y" * 500
+    raw = reloaded.get_recent_activities(resolve_blobs=False)[0]
+    assert reloaded.load_blob(raw["data"]["image"]["$blob"]) == "y" * 500
+
+
+def test_user_values_shaped_like_references_round_trip(tmp_path):
+    memory = Memory(str(tmp_path), blob_threshold=64)
+    lookalike = {"$blob": "not a digest", "bytes": 3}
+    memory.store_activity_result(
+        {
+            "activity_type": "Draw",
+            "result": {
+                "success": True,
+                "data": {"field": lookalike, "nested": {"ref": lookalike}},
+                "metadata": lookalike,
+            },
+        }
+    )
+
+    activity = memory.get_recent_activities()[0]
+    assert activity["data"] == {"field": lookalike, "nested": {"ref": lookalike}}
+    assert activity["metadata"] == lookalike
+    found = memory.query(where=[["data.nested.ref.bytes", "==", 3]])
+    assert len(found) == 1
+    memory.close()
+
+
+def test_get_returns_a_copy(tmp_path):
+    blobs = BlobStore(tmp_path / "blobs", threshold=8)
+    ref = blobs.put({"items": [1, 2]})
+    blobs.get(ref["$blob"])["items"].append(3)
+    assert blobs.get(ref["$blob"]) == {"items": [1, 2]}
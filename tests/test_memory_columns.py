@@ -0,0 +1,90 @@
+import pytest
+
+from framework.memory import Memory
+from framework.memory_columns import MemoryColumnStore, bucket_starts, to_epoch
+
+
+def row(timestamp, activity_type="Nap", success=True, duration=1.0, **extra):
+    return {
+        "timestamp": timestamp,
+        "activity_type": activity_type,
+        "success": success,
+        "duration": duration,
+        **extra,
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    columns = MemoryColumnStore(tmp_path / "memory.columns", flush_rows=3)
+    columns.add(row("2024-01-01T00:10:00+00:00", duration=2.0))
+    columns.add(row("2024-01-01T01:10:00+00:00", success=False, duration=4.0))
+    columns.add(row("2024-01-02T00:10:00+00:00", "Draw", duration=None))
+    columns.add(row("2024-01-02T05:00:00+00:00", "Draw", duration=3.0))
+    return columns
+
+
+def test_aggregate_by_type(store):
+    by_type = {r["activity_type"]: r for r in store.aggregate()}
+    assert by_type["Nap"]["count"] == 2
+    assert by_type["Nap"]["success_rate"] == 0.5
+    assert by_type["Nap"]["avg_duration"] == 3.0
+    assert by_type["Draw"]["avg_duration"] == 3.0  # Unknown durations skipped
+
+
+def test_aggregate_by_time_bucket_and_filters(store):
+    days = store.aggregate(group_by=("time",), bucket="day")
+    assert [(r["time"], r["count"]) for r in days] == [
+        (to_epoch("2024-01-01T00:00:00+00:00"), 2),
+        (to_epoch("2024-01-02T00:00:00+00:00"), 2),
+    ]
+    since = to_epoch("2024-01-01T01:00:00+00:00")
+    failed = store.aggregate(group_by=(), since=since, success=False)
+    assert failed[0]["count"] == 1
+    assert store.aggregate(activity_type="Unknown") == []
+    with pytest.raises(ValueError):
+        store.aggregate(group_by=("nope",))
+
+
+def test_saved_columns_are_remapped_and_closed(store, tmp_path):
+    store.save()
+    first_maps = list(store._maps)
+    store.add(row("2024-01-03T00:00:00+00:00"))
+    store.save()
+    assert all(mapped.closed for mapped in first_maps)
+
+    loaded = MemoryColumnStore(tmp_path / "memory.columns")
+    assert loaded.load()
+    assert len(loaded) == 5
+    assert loaded.aggregate() == store.aggregate()
+
+
+def test_bucket_starts_zero_fill_months():
+    since = to_epoch("2024-01-15T00:00:00+00:00")
+    until = to_epoch("2024-03-02T00:00:00+00:00")
+    starts = bucket_starts(since, until, "month")
+    assert starts == [
+        to_epoch("2024-01-01T00:00:00+00:00"),
+        to_epoch("2024-02-01T00:00:00+00:00"),
+        to_epoch("2024-03-01T00:00:00+00:00"),
+    ]
+
+
+def test_repeat_runs_aggregate_the_same_after_rebuild(tmp_path):
+    memory = Memory(str(tmp_path))
+    memory.aggregate()  # Load the columns so they are updated live
+    for duration in (1.0, 2.0, 6.0):
+        memory.store_activity_result(
+            {
+                "activity_type": "Nap",
+                "result": {"success": True, "data": "zzz"},
+                "duration": duration,
+            }
+        )
+    live = memory.aggregate(group_by=("activity_type", "time"), bucket="hour")
+    assert live[0]["count"] == 3
+    assert live[0]["avg_duration"] == pytest.approx(3.0)
+
+    memory._drop_indexes()
+    rebuilt = memory.aggregate(group_by=("activity_type", "time"), bucket="hour")
+    assert rebuilt == pytest.approx(live)
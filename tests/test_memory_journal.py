@@ -0,0 +1,64 @@
+import json
+
+from conftest import store
+from framework.memory import Memory
+from framework.memory_journal import MemoryJournal
+
+
+def test_replay_returns_records_after_seq(tmp_path):
+    journal = MemoryJournal(tmp_path / "memory.journal.jsonl")
+    for seq in range(1, 4):
+        journal.append(seq, {"activity_type": "Nap", "seq": seq})
+    journal.close()
+
+    replayed = journal.replay(after_seq=1)
+    assert [seq for seq, _, _ in replayed] == [2, 3]
+    assert journal.record_count == 3
+
+
+def test_replay_truncates_torn_tail(tmp_path):
+    journal_file = tmp_path / "memory.journal.jsonl"
+    journal = MemoryJournal(journal_file)
+    journal.append(1, {"activity_type": "Nap"})
+    journal.close()
+    good_size = journal_file.stat().st_size
+    with open(journal_file, "ab") as f:
+        f.write(b'{"seq": 2, "record": {"activ')
+
+    replayed = journal.replay()
+    assert [seq for seq, _, _ in replayed] == [1]
+    assert journal_file.stat().st_size == good_size
+
+
+def test_uncompacted_records_survive_restart(tmp_path):
+    memory = Memory(str(tmp_path))
+    for i in range(3):
+        store(memory, "Nap", {"i": i})
+    memory._journal.close()  # Simulated crash: no compaction
+
+    reloaded = Memory(str(tmp_path))
+    assert [a["data"] for a in reloaded.short_term_memory] == [
+        {"i": 0},
+        {"i": 1},
+        {"i": 2},
+    ]
+    assert reloaded._seq == 3
+
+
+def test_compaction_keeps_seq_and_empties_journal(tmp_path):
+    memory = Memory(str(tmp_path))
+    for i in range(3):
+        store(memory, "Nap", {"i": i})
+    memory.compact()
+
+    assert (tmp_path / "memory.journal.jsonl").stat().st_size == 0
+    header = json.loads(
+        (tmp_path / "memory.json").read_bytes().split(b"\n")[0].rstrip(b",") + b"}"
+    )
+    assert header["seq"] == 3
+
+    store(memory, "Nap", {"i": 3})
+    memory._journal.close()
+    reloaded = Memory(str(tmp_path))
+    assert reloaded._seq == 4
+    assert reloaded.get_activity_count() == 4
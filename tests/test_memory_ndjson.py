@@ -0,0 +1,84 @@
+import asyncio
+import fcntl
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from conftest import records
+from framework.memory import Memory
+from framework.memory_lock import StorageLockedError
+from framework.memory_ndjson import decode_lines, iter_chunks, open_ndjson
+from server import DigitalBeingServer
+
+
+def test_chunks_hold_whole_lines():
+    expected = records(50)
+    chunks = list(iter_chunks(expected, chunk_bytes=256))
+    assert len(chunks) > 1
+    assert all(chunk.endswith("\n") for chunk in chunks)
+    assert list(decode_lines("".join(chunks).splitlines())) == expected
+
+
+def test_decode_lines_names_bad_lines():
+    with pytest.raises(ValueError, match="line 2"):
+        list(decode_lines(['{"a": 1}', "{nope"]))
+    with pytest.raises(ValueError, match="Line 1 is not a JSON object"):
+        list(decode_lines(["[1]"]))
+
+
+def test_round_trip_between_backends(tmp_path):
+    source = Memory(str(tmp_path / "json"))
+    source.import_records(records(20))
+    with open_ndjson(tmp_path / "memory.ndjson.gz", "w") as out:
+        for chunk in iter_chunks(source.export_records(activity_type="Draw")):
+            out.write(chunk)
+    source.close()
+
+    target = Memory(str(tmp_path / "sqlite"), backend="sqlite")
+    with open_ndjson(tmp_path / "memory.ndjson.gz", "r") as lines:
+        assert target.import_records(decode_lines(lines), batch_size=3) == 10
+    assert [e["data"]["i"] for e in target.export_records()] == list(range(1, 20, 2))
+    target.close()
+
+
+def test_storage_held_by_another_process_is_refused(tmp_path):
+    memory = Memory(str(tmp_path))
+    Memory(str(tmp_path)).close()  # Same process: shared
+    memory.close()
+
+    # Another open file description stands in for another process
+    fd = os.open(tmp_path / "memory.lock", os.O_RDWR)
+    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    try:
+        with pytest.raises(StorageLockedError):
+            Memory(str(tmp_path))
+    finally:
+        os.close(fd)
+    Memory(str(tmp_path)).close()
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, message):
+        self.sent.append(json.loads(message))
+
+
+def test_websocket_export_streams_chunks(tmp_path):
+    memory = Memory(str(tmp_path))
+    memory.import_records(records(30))
+    server = DigitalBeingServer.__new__(DigitalBeingServer)
+    server.being = SimpleNamespace(memory=memory)
+    websocket = FakeWebSocket()
+
+    result = asyncio.run(
+        server.stream_memory_export(
+            websocket, {"activity_type": "Nap,Draw", "chunk_bytes": 512}
+        )
+    )
+    assert result["success"] and result["chunks"] == len(websocket.sent) > 1
+    text = "".join(message["data"] for message in websocket.sent)
+    assert len(list(decode_lines(text.splitlines()))) == 30
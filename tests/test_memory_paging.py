@@ -0,0 +1,71 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from conftest import records
+from framework.memory import Memory
+from server import DigitalBeingServer
+
+
+def walk(memory, **kwargs):
+    pages, cursor = [], None
+    while True:
+        page, cursor = memory.page_activities(limit=7, cursor=cursor, **kwargs)
+        pages.append(page)
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.parametrize("backend", ["json", "sqlite", "tiered"])
+def test_pages_cover_every_tier_once_newest_first(tmp_path, backend):
+    memory = Memory(str(tmp_path), backend=backend, cold_after_days=30)
+    memory.import_records(records(40, days_ago=60) + records(80))
+
+    pages = walk(memory)
+    seen = [(a["data"]["days_ago"], a["data"]["i"]) for p in pages for a in p]
+    assert len(seen) == len(set(seen)) == 120
+    assert seen[0] == (0, 79)
+    assert seen[-1] == (60, 0)
+    assert all(len(p) == 7 for p in pages[:-1])
+
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_cursor_is_stable_across_new_records(tmp_path, backend):
+    memory = Memory(str(tmp_path), backend=backend)
+    memory.import_records(records(20))
+    first, cursor = memory.page_activities(limit=5)
+    memory.store_activity_result(
+        {"activity_type": "Nap", "result": {"success": True, "data": "new"}}
+    )
+
+    second, _ = memory.page_activities(limit=5, cursor=cursor)
+    assert second[0]["data"]["i"] == first[-1]["data"]["i"] - 1
+
+
+def test_type_filter_and_invalid_cursor(tmp_path):
+    memory = Memory(str(tmp_path))
+    memory.import_records(records(20))
+    naps = [a for p in walk(memory, activity_type="Nap") for a in p]
+    assert len(naps) == 10
+    assert {a["activity_type"] for a in naps} == {"Nap"}
+    with pytest.raises(ValueError):
+        memory.page_activities(cursor="not-a-cursor")
+
+
+def test_server_offset_paging_goes_through_cursors(tmp_path, monkeypatch):
+    memory = Memory(str(tmp_path))
+    memory.import_records(records(20))
+    monkeypatch.setattr(memory, "find_activities", None)  # Not used for paging
+    server = DigitalBeingServer.__new__(DigitalBeingServer)
+    server.being = SimpleNamespace(memory=memory)
+
+    def history(**params):
+        return asyncio.run(server.handle_command("get_activity_history", params))
+
+    page = history(offset=5, limit=5)
+    assert [a["data"]["i"] for a in page["activities"]] == [14, 13, 12, 11, 10]
+    following = history(cursor=page["next_cursor"], limit=5)
+    assert following["activities"][0]["data"]["i"] == 9
+    assert history(offset=20, limit=5)["activities"] == []
+    assert not history(offset=18, limit=5)["has_more"]
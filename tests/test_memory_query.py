@@ -0,0 +1,69 @@
+import pytest
+
+from framework.memory import Memory
+from framework.memory_query import compile_where, get_path, parse_where
+
+
+def records():
+    return [
+        {
+            "timestamp": f"2024-01-01T00:{i:02d}:00+00:00",
+            "activity_type": "PostTweet" if i % 2 else "Draw",
+            "success": i != 3,
+            "data": {"tweet_id": 1000 + i} if i % 2 else {"image": {"url": f"u{i}"}},
+            "metadata": {"model": "gpt-4o" if i < 5 else "other"},
+            "duration": float(i),
+        }
+        for i in range(10)
+    ]
+
+
+def test_get_path_and_predicates():
+    entry = {"data": {"items": [{"id": 7}]}}
+    assert get_path(entry, "data.items.0.id") == 7
+    match = compile_where(parse_where([["data.items.0.id", ">=", 7]]))
+    assert match(entry)
+    # Incompatible comparisons are false, not errors
+    assert not compile_where(parse_where([["data.items", ">", 1]]))(entry)
+    assert compile_where(parse_where([["data.missing", "missing"]]))(entry)
+
+
+@pytest.mark.parametrize(
+    "where", [[["data.x"]], [["data.x", "~=", 1]], [["data.x", "in"]], "nope"]
+)
+def test_malformed_predicates_raise(where):
+    with pytest.raises(ValueError):
+        parse_where(where)
+
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_query_filters_projects_and_sorts(tmp_path, backend):
+    memory = Memory(str(tmp_path), backend=backend)
+    memory.import_records(records())
+
+    tweets = memory.query(
+        activity_type="PostTweet",
+        success=True,
+        where=[["data.tweet_id", "exists"], ["metadata.model", "==", "gpt-4o"]],
+        fields=["data.tweet_id"],
+    )
+    assert tweets == [{"data": {"tweet_id": 1001}}]
+
+    slowest = memory.query(sort="-duration", limit=2, fields=["duration"])
+    assert [r["duration"] for r in slowest] == [9.0, 8.0]
+    oldest = memory.query(sort="timestamp", limit=1, offset=1)
+    assert oldest[0]["duration"] == 1.0
+
+    images = memory.query(where=[["data.image.url", "startswith", "u"]])
+    assert len(images) == 5
+    memory.close()
+
+
+def test_explain_query_names_index_and_scan_filters(tmp_path):
+    memory = Memory(str(tmp_path))
+    plan = memory.explain_query(
+        activity_type="Draw", success=True, where=[["data.image", "exists"]]
+    )
+    assert "type buckets" in plan["source"]
+    assert "success" in plan["scan_filters"]
+    assert "data.image" in plan["scan_filters"]
@@ -0,0 +1,43 @@
+from conftest import store
+from framework.memory import Memory
+
+
+def test_recent_activities_newest_first_with_offset(tmp_path):
+    memory = Memory(str(tmp_path))
+    for i in range(5):
+        store(memory, "Nap", {"i": i})
+
+    assert [a["data"]["i"] for a in memory.get_recent_activities(limit=3)] == [
+        4,
+        3,
+        2,
+    ]
+    page = memory.get_recent_activities(limit=2, offset=3)
+    assert [a["data"]["i"] for a in page] == [1, 0]
+    assert page[0]["timestamp"].endswith("UTC")
+
+
+def test_recent_index_follows_consolidation(tmp_path):
+    memory = Memory(str(tmp_path))
+    for i in range(101):
+        store(memory, "Nap", {"i": i})
+
+    assert len(memory._recent) == len(memory.short_term_memory)
+    assert memory.get_recent_activities(limit=1)[0]["data"]["i"] == 100
+    assert memory.get_last_activity_timestamp() == memory._recent[-1]["timestamp"]
+
+
+def test_recent_index_rebuilt_on_load(tmp_path):
+    memory = Memory(str(tmp_path))
+    store(memory, "Nap", {"i": 0})
+    store(memory, "Draw", {"i": 1})
+    memory.close()
+
+    reloaded = Memory(str(tmp_path))
+    assert [a["activity_type"] for a in reloaded.get_recent_activities()] == [
+        "Draw",
+        "Nap",
+    ]
+    assert Memory(str(tmp_path / "empty")).get_last_activity_timestamp() == (
+        "No activities recorded"
+    )
@@ -0,0 +1,74 @@
+import pytest
+
+from framework.memory_record import (
+    MemoryRecord,
+    bisect_records,
+    decode_timestamp,
+    encode_timestamp,
+)
+
+
+def entry(timestamp, **extra):
+    return {
+        "timestamp": timestamp,
+        "activity_type": "Nap",
+        "success": True,
+        "error": None,
+        "data": {"x": 1},
+        "metadata": {},
+        "duration": 2.5,
+        **extra,
+    }
+
+
+@pytest.mark.parametrize(
+    "timestamp",
+    [
+        "2024-01-01T12:00:00+00:00",
+        "2024-01-01T12:00:00.123456+00:00",
+    ],
+)
+def test_canonical_timestamps_are_stored_as_integers(timestamp):
+    encoded = encode_timestamp(timestamp)
+    assert isinstance(encoded, int)
+    assert decode_timestamp(encoded) == timestamp
+
+
+@pytest.mark.parametrize(
+    "timestamp",
+    ["2024-01-01T12:00:00", "2024-01-01T12:00:00Z", "2024-01-01T13:00:00+01:00"],
+)
+def test_other_timestamps_are_kept_verbatim(timestamp):
+    assert encode_timestamp(timestamp) == timestamp
+    assert MemoryRecord.from_dict(entry(timestamp))["timestamp"] == timestamp
+
+
+def test_record_behaves_like_its_dict():
+    source = entry("2024-01-01T12:00:00+00:00")
+    record = MemoryRecord.from_dict(source)
+    assert dict(record) == source
+    assert {**record} == record.to_dict() == source
+    assert record.get("missing") is None
+    assert "count" not in record
+    assert not hasattr(record, "__dict__")
+    assert MemoryRecord.from_dict(record) is record
+
+
+def test_repeat_fields_only_exist_on_runs():
+    run = MemoryRecord.from_dict(
+        entry("2024-01-01T12:00:00+00:00", count=3, last_seen="2024-01-01T12:20:00")
+    )
+    assert run["count"] == 3
+    assert set(run) >= {"count", "last_seen"}
+    assert run.to_dict()["last_seen"] == "2024-01-01T12:20:00"
+
+
+def test_bisect_records_by_timestamp_and_type():
+    records = [
+        MemoryRecord.from_dict(entry(f"2024-01-01T12:0{i}:00+00:00")) for i in range(5)
+    ]
+    assert bisect_records(records, "2024-01-01T12:02:00+00:00") == 2
+    assert bisect_records(records, "2024-01-01T12:02:30+00:00") == 3
+    assert bisect_records(records, "2024-01-01T12:02:00+00:00", "Zzz") == 3
+    legacy = [entry(r["timestamp"]) for r in records]
+    assert bisect_records(legacy, "2024-01-01T12:02:00+00:00") == 2
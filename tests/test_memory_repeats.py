@@ -0,0 +1,80 @@
+import shutil
+from datetime import datetime, timezone
+
+import pytest
+
+import framework.memory
+from conftest import store
+from framework.memory import Memory
+
+NOW = datetime(2024, 1, 1, 12, 30, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    class Clock(datetime):
+        current = NOW
+
+        @classmethod
+        def now(cls, tz=None):
+            return cls.current
+
+    monkeypatch.setattr(framework.memory, "datetime", Clock)
+    return Clock
+
+
+@pytest.mark.parametrize("backend", ["json", "sqlite", "tiered"])
+def test_repeats_fold_into_one_counted_run(tmp_path, clock, backend):
+    memory = Memory(str(tmp_path), backend=backend)
+    for duration in (1.0, 2.0, 6.0):
+        store(memory, "Nap", "same", duration=duration)
+    store(memory, "Nap", "different")
+
+    runs = memory.find_activities(activity_type="Nap")
+    assert sorted(run.get("count", 1) for run in runs) == [1, 3]
+    assert memory.get_activity_count() == 4
+    memory.close()
+
+    reloaded = Memory(str(tmp_path), backend=backend)
+    assert reloaded.get_activity_count() == 4
+    reloaded.close()
+
+
+def test_runs_do_not_cross_an_hour(tmp_path, clock):
+    memory = Memory(str(tmp_path))
+    store(memory, "Nap", "same")
+    clock.current = NOW.replace(hour=13, minute=0)
+    store(memory, "Nap", "same")
+    assert len(memory.find_activities(activity_type="Nap")) == 2
+
+
+def test_unloaded_long_term_runs_are_counted(tmp_path):
+    run = {
+        "timestamp": "2023-01-01T00:00:00+00:00",
+        "activity_type": "Nap",
+        "success": True,
+        "data": None,
+        "count": 5,
+        "last_seen": "2023-01-01T00:20:00+00:00",
+    }
+    memory = Memory(str(tmp_path))
+    memory.import_records([run] + [{**run, "activity_type": "Draw", "count": 1}])
+    memory.close()
+
+    reloaded = Memory(str(tmp_path))
+    assert not reloaded.long_term_memory.is_loaded("Nap")
+    assert reloaded.get_activity_count() == 6
+    reloaded.close()
+
+
+def test_run_durations_agree_live_and_rebuilt(tmp_path, clock):
+    memory = Memory(str(tmp_path))
+    for duration in (1.0, 2.0, 6.0):
+        store(memory, "Nap", "same", duration=duration)
+    live = memory.aggregate()
+    memory.close()
+
+    shutil.rmtree(tmp_path / "memory.columns")
+    rebuilt = Memory(str(tmp_path)).aggregate()
+    assert rebuilt == live
+    assert live[0]["count"] == 3 and live[0]["avg_duration"] == 3.0
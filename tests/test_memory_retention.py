@@ -0,0 +1,168 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from framework.memory import Memory
+from framework.memory_archive import MemoryArchive
+from framework.memory_retention import RetentionPolicy, RetentionRecord, plan_evictions
+
+NOW = datetime(2024, 6, 1, tzinfo=timezone.utc)
+
+
+def entry(days_ago, activity_type="Nap", success=True, data=None):
+    return {
+        "timestamp": (NOW - timedelta(days=days_ago)).isoformat(),
+        "activity_type": activity_type,
+        "success": success,
+        "data": data,
+    }
+
+
+def plan(entries, config, recent=()):
+    records = [RetentionRecord(i, e) for i, e in enumerate(entries)]
+    recent = [RetentionRecord(None, e) for e in recent]
+    policy = RetentionPolicy(config)
+    return plan_evictions(records, recent, policy, NOW.timestamp())
+
+
+def test_policy_is_disabled_without_limits():
+    assert not RetentionPolicy({}).enabled
+    assert RetentionPolicy({"types": {"Nap": {"max_count": 5}}}).enabled
+
+
+def test_records_past_max_age_are_evicted():
+    evicted = plan(
+        [entry(40), entry(10), entry(40, "Draw")],
+        {"types": {"Nap": {"max_age_days": 30}}},
+    )
+    assert [(r.activity_type, r.key) for r in evicted] == [("Nap", 0)]
+
+
+def test_max_count_keeps_failures_and_referenced_records():
+    entries = [
+        entry(5, success=False),
+        entry(4, data="https://example.com/image-1.png"),
+        entry(3),
+        entry(2),
+    ]
+    recent = [entry(0, "Tweet", data="https://example.com/image-1.png")]
+    evicted = plan(entries, {"types": {"Nap": {"max_count": 2}}}, recent)
+    assert sorted(r.key for r in evicted) == [2, 3]
+
+
+def test_short_term_records_are_never_evicted():
+    recent = [entry(100) for _ in range(3)]
+    evicted = plan([entry(50)], {"default": {"max_count": 1}}, recent)
+    assert [r.key for r in evicted] == [0]
+
+
+def test_memory_apply_retention_summarizes_evictions(tmp_path):
+    memory = Memory(
+        str(tmp_path),
+        retention={"types": {"Nap": {"max_age_days": 30}}},
+    )
+    old = [entry(d) for d in range(40, 100)]
+    memory.import_records([{**e, "data": {"i": i}} for i, e in enumerate(old)])
+    for i in range(60):
+        memory.store_activity_result(
+            {"activity_type": "Nap", "result": {"success": True, "data": i}}
+        )
+
+    evicted = memory.apply_retention(now=datetime.now(timezone.utc))
+    assert evicted == 60
+    assert memory.get_activity_count() == 60
+    summaries = memory.get_eviction_summaries("Nap")
+    assert sum(s["count"] for s in summaries) == 60
+    assert all(s["successes"] == s["count"] for s in summaries)
+
+
+@pytest.mark.parametrize("backend", ["sqlite", "tiered"])
+def test_retention_on_database_backends(tmp_path, backend):
+    memory = Memory(
+        str(tmp_path),
+        backend=backend,
+        retention={"types": {"Nap": {"max_count": 10}}},
+    )
+    memory.import_records(
+        [{**entry(d), "data": {"i": d}} for d in range(1, 200)] + [entry(0, "Draw")]
+    )
+    memory.apply_retention()
+    assert memory.get_activity_count() < 200
+    assert len(memory.find_activities(activity_type="Draw")) == 1
+    memory.close()
+
+
+def test_evictions_update_indexes_in_place(tmp_path):
+    memory = Memory(
+        str(tmp_path),
+        retention={"types": {"Nap": {"max_age_days": 30}}},
+    )
+    memory.import_records(
+        [{**entry(d), "data": {"note": f"old nap {d}"}} for d in range(40, 100)]
+    )
+    for i in range(60):
+        memory.store_activity_result(
+            {"activity_type": "Nap", "result": {"success": True, "data": f"nap {i}"}}
+        )
+    memory.search("nap")
+    memory.recall("nap")
+    memory.aggregate()
+
+    assert memory.apply_retention(now=datetime.now(timezone.utc)) == 60
+    assert len(memory._indexes["search"].docs) == 60
+    vectors = memory._indexes["vectors"]
+    assert len(vectors.docs) - len(vectors.deleted) == 60
+    assert all("old" not in str(a["data"]) for a in memory.recall("old nap", k=20))
+    assert [(r["activity_type"], r["count"]) for r in memory.aggregate()] == [
+        ("Nap", 60)
+    ]
+    assert memory._indexes["retention"].counts() == {"Nap": 60}
+    assert (tmp_path / "memory.search.idx").exists()
+
+
+def test_retention_only_reads_records_that_can_be_evicted(tmp_path, monkeypatch):
+    memory = Memory(
+        str(tmp_path),
+        backend="tiered",
+        retention={"types": {"Nap": {"max_count": 500}, "Draw": {"max_count": 5}}},
+    )
+    memory.import_records(
+        [{**entry(d), "data": {"i": d}} for d in range(1, 200)]
+        + [{**entry(d, "Draw"), "data": {"i": d}} for d in range(100, 110)]
+    )
+    memory._index("retention")  # Built once from every record
+    read = []
+    read_lines = MemoryArchive._read_lines
+    monkeypatch.setattr(
+        MemoryArchive,
+        "_read_lines",
+        staticmethod(lambda path: read.append(path.name) or read_lines(path)),
+    )
+
+    assert memory.apply_retention() == 5
+    draw_months = {e["timestamp"][:7] for e in (entry(d) for d in range(100, 110))}
+    assert read and {name[:7] for name in read} <= draw_months
+    read.clear()
+    assert memory.apply_retention() == 0
+    assert not read
+    memory.close()
+
+
+def test_evicted_blobs_are_deleted_once_unreferenced(tmp_path):
+    memory = Memory(
+        str(tmp_path),
+        blob_threshold=64,
+        retention={"types": {"Nap": {"max_age_days": 30}}},
+    )
+    big = "x" * 200
+    memory.import_records(
+        [{**entry(40), "data": {"big": big}}, {**entry(10), "data": {"big": big}}]
+        + [entry(i / 100, "Draw") for i in range(110, 0, -1)]  # Short-term
+    )
+    blobs = list((tmp_path / "blobs").glob("*/*"))
+    assert len(blobs) == 1
+
+    assert memory.apply_retention(now=NOW) == 1
+    assert blobs[0].exists()  # Still referenced by the newer record
+    assert memory.apply_retention(now=NOW + timedelta(days=30)) == 1
+    assert not blobs[0].exists()
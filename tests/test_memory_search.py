@@ -0,0 +1,54 @@
+import json
+
+from framework.memory import Memory
+from framework.memory_search import MemorySearchIndex, tokenize
+
+
+def record(i, text, activity_type="Draw"):
+    return {
+        "timestamp": f"2024-01-01T00:{i:02d}:00+00:00",
+        "activity_type": activity_type,
+        "data": {"text": text},
+    }
+
+
+def test_tokenize_drops_stopwords_and_single_characters():
+    assert tokenize("The Cat and a hat, x 42") == ["cat", "hat", "42"]
+
+
+def test_bm25_ranks_rarer_terms_higher(tmp_path):
+    index = MemorySearchIndex(tmp_path / "memory.search.idx")
+    index.add(record(0, "sunset over the ocean"))
+    index.add(record(1, "ocean waves ocean spray"))
+    index.add(record(2, "forest trail", "Nap"))
+
+    hits = index.search("ocean")
+    assert [timestamp[14:16] for _, timestamp, _ in hits] == ["01", "00"]
+    assert index.search("forest", activity_type="Draw") == []
+    assert index.search("the") == []
+
+
+def test_index_round_trips_as_json(tmp_path):
+    path = tmp_path / "memory.search.idx"
+    index = MemorySearchIndex(path)
+    index.rebuild([record(0, "sunset ocean"), record(1, "forest")], indexed_seq=2)
+    index.save()
+    json.loads(path.read_text())  # Plain JSON, not pickle
+
+    loaded = MemorySearchIndex(path)
+    assert loaded.load()
+    assert loaded.indexed_seq == 2
+    assert loaded.postings == index.postings
+    assert loaded.search("ocean") == index.search("ocean")
+
+
+def test_unreadable_index_is_rebuilt(tmp_path):
+    memory = Memory(str(tmp_path))
+    memory.store_activity_result(
+        {"activity_type": "Draw", "result": {"success": True, "data": "red fox"}}
+    )
+    (tmp_path / "memory.search.idx").write_bytes(b"\x80\x04garbage")
+
+    hits = memory.search("fox")
+    assert len(hits) == 1
+    assert hits[0]["data"] == "red fox"
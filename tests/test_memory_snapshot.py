@@ -0,0 +1,82 @@
+import json
+
+from framework.memory import Memory
+from framework.memory_record import MemoryRecord
+from framework.memory_snapshot import LazyLongTermMemory, load_snapshot, write_snapshot
+
+
+def entry(activity_type, i):
+    return MemoryRecord.from_dict(
+        {
+            "timestamp": f"2024-01-01T00:{i:02d}:00+00:00",
+            "activity_type": activity_type,
+            "success": True,
+            "error": None,
+            "data": {"i": i},
+            "metadata": {},
+            "duration": 1.0,
+        }
+    )
+
+
+def write(path):
+    long_term = LazyLongTermMemory(
+        loaded={
+            "Nap": [entry("Nap", i) for i in range(3)],
+            "Draw": [entry("Draw", i) for i in range(2)],
+        }
+    )
+    return write_snapshot(path, 6, [entry("Nap", 10)], long_term)
+
+
+def test_snapshot_is_valid_json(tmp_path):
+    path = tmp_path / "memory.json"
+    write(path)
+    data = json.loads(path.read_text())
+    assert data["seq"] == 6
+    assert len(data["long_term"]["Nap"]) == 3
+
+
+def test_buckets_are_paged_in_on_access(tmp_path):
+    path = tmp_path / "memory.json"
+    write(path)
+    seq, short_term, long_term, _ = load_snapshot(path)
+
+    assert seq == 6
+    assert [a["data"]["i"] for a in short_term] == [10]
+    assert not long_term.is_loaded("Nap")
+    assert long_term.bucket_size("Nap") == 3
+    assert [a["data"]["i"] for a in long_term["Nap"]] == [0, 1, 2]
+    assert long_term.is_loaded("Nap")
+    assert not long_term.is_loaded("Draw")
+
+
+def test_cursor_skips_scan_until_file_changes(tmp_path):
+    path = tmp_path / "memory.json"
+    cursor = write(path)
+    assert load_snapshot(path, cursor)[3] is cursor
+
+    stale = {**cursor, "size": cursor["size"] + 1}
+    assert load_snapshot(path, stale)[3] != stale
+
+
+def test_entries_added_to_unloaded_bucket_are_kept(tmp_path):
+    path = tmp_path / "memory.json"
+    write(path)
+    _, short_term, long_term, _ = load_snapshot(path)
+    long_term.add_entry("Draw", entry("Draw", 5))
+    write_snapshot(path, 7, short_term, long_term)
+
+    _, _, reloaded, _ = load_snapshot(path)
+    assert [a["data"]["i"] for a in reloaded["Draw"]] == [0, 1, 5]
+
+
+def test_legacy_memory_file_still_loads(tmp_path):
+    legacy = {
+        "short_term": [entry("Nap", 1).to_dict()],
+        "long_term": {"Nap": [entry("Nap", 0).to_dict()]},
+    }
+    (tmp_path / "memory.json").write_text(json.dumps(legacy))
+
+    memory = Memory(str(tmp_path))
+    assert memory.get_activity_count() == 2
@@ -0,0 +1,59 @@
+from conftest import store
+from framework import memory_lock
+from framework.memory import Memory
+
+
+def test_sqlite_backend_persists_records(tmp_path):
+    memory = Memory(str(tmp_path), backend="sqlite")
+    for i in range(5):
+        store(memory, "Nap", data={"i": i})
+    memory.close()
+
+    reloaded = Memory(str(tmp_path), backend="sqlite")
+    assert reloaded.get_activity_count() == 5
+    assert [a["data"]["i"] for a in reloaded.get_recent_activities(limit=2)] == [4, 3]
+    reloaded.close()
+
+
+def test_find_activities_filters_by_type_and_success(tmp_path):
+    memory = Memory(str(tmp_path), backend="sqlite")
+    store(memory, "Nap", data={"i": 0})
+    store(memory, "Draw", success=False, data={"i": 1})
+    store(memory, "Draw", data={"i": 2})
+
+    drawings = memory.find_activities(activity_type="Draw")
+    assert [a["data"]["i"] for a in drawings] == [2, 1]
+    failed = memory.find_activities(success=False)
+    assert [a["data"]["i"] for a in failed] == [1]
+    assert len(memory.find_activities(limit=1)) == 1
+    memory.close()
+
+
+def test_sqlite_backend_keeps_short_term_split(tmp_path):
+    memory = Memory(str(tmp_path), backend="sqlite")
+    for i in range(120):
+        store(memory, "Nap", data={"i": i})
+
+    assert len(memory.short_term_memory) < 120
+    assert memory.get_activity_count() == 120
+    history = memory.get_activity_history("Nap")
+    assert len(history) + len(memory.short_term_memory) == 120
+    memory.close()
+
+
+def test_json_memory_is_migrated_once(tmp_path):
+    memory = Memory(str(tmp_path))
+    for i in range(3):
+        store(memory, "Nap", data={"i": i})
+    memory.close()
+
+    migrated = Memory(str(tmp_path), backend="sqlite")
+    assert migrated.get_activity_count() == 3
+    store(migrated, "Nap", data={"i": 3})
+    migrated.close()
+    # The json Memory read for the migration was closed too
+    assert (tmp_path / "memory.lock").resolve() not in memory_lock._held
+
+    reloaded = Memory(str(tmp_path), backend="sqlite")
+    assert reloaded.get_activity_count() == 4
+    reloaded.close()
@@ -0,0 +1,119 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from framework.memory import Memory
+from framework.memory_summaries import LLMSummarizer, MemorySummaries, describe_counts
+
+WEEK_START = datetime(2024, 1, 1, tzinfo=timezone.utc)  # A Monday
+
+
+def records(hours):
+    return [
+        {
+            "timestamp": (WEEK_START + timedelta(hours=h, minutes=5)).isoformat(),
+            "activity_type": "Nap" if h % 3 else "Draw",
+            "success": h % 5 != 0,
+            "error": None if h % 5 else "tired",
+            "data": {"note": f"hour {h} " + "detail " * 30},
+        }
+        for h in range(hours)
+    ]
+
+
+class CountingCompletion:
+    def __init__(self):
+        self.calls = 0
+
+    async def __call__(self, prompt, system_prompt, max_tokens):
+        self.calls += 1
+        return {"success": True, "data": {"content": f"summary {self.calls}"}}
+
+
+def make_summaries(tmp_path, entries):
+    def fetch(since, until):
+        return [e for e in entries if since <= e["timestamp"] < until]
+
+    return MemorySummaries(tmp_path / "memory.summaries.json", fetch)
+
+
+def test_describe_counts():
+    assert describe_counts({}) == "No activities."
+    assert describe_counts({"Nap": [2, 1], "Draw": [1, 0]}) == (
+        "4 activities: Nap x3 (1 failed), Draw x1"
+    )
+
+
+def test_cold_week_summary_makes_one_model_call(tmp_path):
+    entries = records(7 * 24)
+    summaries = make_summaries(tmp_path, entries)
+    complete = CountingCompletion()
+    since = int(WEEK_START.timestamp())
+    now = since + 8 * 86400
+
+    # Starts mid-day: 23 hours, 6 days and the reduce over them
+    summary = asyncio.run(
+        summaries.summarize(
+            since + 3600, since + 7 * 86400, now, LLMSummarizer(complete, min_chars=0)
+        )
+    )
+    assert complete.calls == 1
+    assert summary["text"] == "summary 1"
+    assert summary["count"] == len(entries) - 1
+    assert summary["counts"]["Draw"][0] + summary["counts"]["Draw"][1] == 55
+
+
+def test_windows_are_cached_and_reused(tmp_path):
+    entries = records(48)
+    fetched = []
+    summaries = MemorySummaries(
+        tmp_path / "memory.summaries.json",
+        lambda since, until: fetched.append(since) or entries,
+    )
+    since = int(WEEK_START.timestamp())
+    now = since + 3 * 86400
+    asyncio.run(
+        summaries.summarize(since, since + 86400, now, summaries.window_summarizer)
+    )
+    first_fetches = len(fetched)
+    asyncio.run(summaries.summarize(since, since + 86400, now, LLMSummarizer(None)))
+    assert first_fetches == 24
+    assert len(fetched) == first_fetches
+
+    reloaded = make_summaries(tmp_path, [])
+    day = asyncio.run(
+        reloaded.summarize(since, since + 86400, now, reloaded.window_summarizer)
+    )
+    assert day["count"] > 0  # Served from memory.summaries.json
+
+
+def test_old_hours_are_pruned_only_once_their_day_is_cached(tmp_path):
+    summaries = make_summaries(tmp_path, records(48))
+    since = int(WEEK_START.timestamp())
+    late = since + 30 * 86400
+
+    # Hours of a partial day: the day itself is never built
+    asyncio.run(
+        summaries.summarize(
+            since + 3600, since + 5 * 3600, late, summaries.window_summarizer
+        )
+    )
+    assert any("|hour|" in key for key in summaries._cache)
+
+    asyncio.run(
+        summaries.summarize(since, since + 86400, late, summaries.window_summarizer)
+    )
+    assert not any("|hour|" in key for key in summaries._cache)
+    assert any("|day|" in key for key in summaries._cache)
+
+
+def test_memory_get_summary(tmp_path):
+    memory = Memory(str(tmp_path))
+    for i in range(3):
+        memory.store_activity_result(
+            {"activity_type": "Nap", "result": {"success": True, "data": i}}
+        )
+    summary = asyncio.run(
+        memory.get_summary(since=datetime.now(timezone.utc) - timedelta(hours=1))
+    )
+    assert summary["count"] == 3
+    assert summary["text"].startswith("3 activities")
@@ -0,0 +1,75 @@
+import gzip
+import json
+from datetime import datetime, timedelta, timezone
+
+from framework.memory import Memory
+from framework.memory_archive import MemoryArchive
+
+
+def old_records(days_ago, count, activity_type="Nap"):
+    start = datetime.now(timezone.utc) - timedelta(days=days_ago)
+    return [
+        {
+            "timestamp": (start + timedelta(minutes=i)).isoformat(),
+            "activity_type": activity_type,
+            "success": True,
+            "data": {"i": i},
+        }
+        for i in range(count)
+    ]
+
+
+def test_cold_records_move_to_archive(tmp_path):
+    memory = Memory(str(tmp_path), backend="tiered", cold_after_days=30)
+    memory.import_records(old_records(90, 60) + old_records(1, 60, "Draw"))
+
+    assert memory._archive.count() > 0
+    assert memory._store.count() + memory._archive.count() == 120
+    assert memory.get_activity_count() == 120
+    assert next((tmp_path / "archive").glob("*.jsonl.zst"))
+    memory.close()
+
+
+def test_queries_span_archive_and_database(tmp_path):
+    memory = Memory(str(tmp_path), backend="tiered", cold_after_days=30)
+    memory.import_records(old_records(90, 60) + old_records(1, 60, "Draw"))
+
+    naps = memory.find_activities(activity_type="Nap")
+    assert len(naps) == 60
+    assert naps[0]["data"]["i"] == 59
+    history = memory.get_activity_history("Nap")
+    assert [a["data"]["i"] for a in history] == list(range(60))
+    memory.close()
+
+
+def test_archive_is_idempotent_and_reads_gzip_months(tmp_path):
+    archive = MemoryArchive(tmp_path)
+    records = [(seq, r) for seq, r in enumerate(old_records(90, 3), start=1)]
+    assert archive.add(records) == 3
+    assert archive.add(records) == 0  # Re-archiving after a crash
+
+    # Months written as gzip by older versions stay readable
+    month = "2020-01"
+    record = {**old_records(0, 1)[0], "timestamp": "2020-01-15T00:00:00+00:00"}
+    lines = json.dumps({"seq": 10, "record": record}) + "\n"
+    with gzip.open(tmp_path / f"{month}.jsonl.gz", "wb") as f:
+        f.write(lines.encode("utf-8"))
+    archive.manifest[month] = {
+        "file": f"{month}.jsonl.gz",
+        "count": 1,
+        "types": {"Nap": 1},
+        "max_seq": 10,
+    }
+    assert len(list(archive.iter_records("Nap"))) == 4
+    assert archive.count("Nap") == 4
+
+
+def test_second_archive_on_same_directory_keeps_months(tmp_path):
+    first = MemoryArchive(tmp_path)
+    second = MemoryArchive(tmp_path)  # Loaded before first writes anything
+    first.add([(1, old_records(90, 1)[0])])
+    second.add([(2, old_records(30, 1, "Draw")[0])])
+
+    assert first.count() == 2 and second.count() == 2
+    assert MemoryArchive(tmp_path).count("Nap") == 1
+    assert {e["activity_type"] for _, e in first.iter_records()} == {"Nap", "Draw"}
@@ -0,0 +1,78 @@
+import json
+import math
+
+from framework.memory import Memory
+from framework.memory_vectors import MemoryVectorIndex, embed
+
+
+def record(i, text, activity_type="DrawActivity"):
+    return {
+        "timestamp": f"2024-01-01T00:{i:02d}:00+00:00",
+        "activity_type": activity_type,
+        "data": {"text": text},
+    }
+
+
+def test_embedding_is_normalized_and_sparse():
+    vector = embed("drawing a sunset over the ocean")
+    assert math.isclose(sum(v * v for v in vector.values()), 1.0, rel_tol=1e-6)
+    assert len(vector) < 64
+    assert embed("the a") == {}
+
+
+def test_inflections_share_prefix_features():
+    drawing, drawings = embed("drawing"), embed("drawings")
+    similarity = sum(v * drawings.get(d, 0.0) for d, v in drawing.items())
+    assert similarity > 0
+
+
+def test_search_ranks_similar_records_first(tmp_path):
+    index = MemoryVectorIndex(tmp_path / "memory.vectors")
+    index.add(record(0, "quiet forest trail at dawn", "NapActivity"))
+    index.add(record(1, "sunset over the ocean waves"))
+    index.add(record(2, "ocean sunset painting"))
+
+    hits = index.search("ocean sunset", k=2)
+    assert {timestamp[14:16] for _, timestamp, _ in hits} == {"01", "02"}
+    typed = index.search("forest", activity_type="NapActivity")
+    assert [t for _, _, t in typed] == ["NapActivity"]
+
+
+def test_saved_index_is_mapped_with_json_meta(tmp_path):
+    base = tmp_path / "memory.vectors"
+    index = MemoryVectorIndex(base, flush_rows=2)
+    index.rebuild([record(i, f"ocean note {i}") for i in range(3)], indexed_seq=3)
+    index.save()
+    meta = json.loads((tmp_path / "memory.vectors.meta").read_text())
+    assert meta["rows"] == 3
+
+    loaded = MemoryVectorIndex(base)
+    assert loaded.load()
+    assert loaded.indexed_seq == 3
+    assert loaded._mapped.shape == (3, 512)
+    assert loaded.search("ocean", k=3) == index.search("ocean", k=3)
+
+
+def test_memory_recall(tmp_path):
+    memory = Memory(str(tmp_path))
+    for text in ("a red fox in the snow", "stock market news", "fox drawing"):
+        memory.store_activity_result(
+            {"activity_type": "DrawActivity", "result": {"success": True, "data": text}}
+        )
+
+    hits = memory.recall("fox", k=2)
+    assert {hit["data"] for hit in hits} == {"a red fox in the snow", "fox drawing"}
+    assert all(0 < hit["similarity"] <= 1 for hit in hits)
+
+
+def test_ivf_partitioning_finds_close_records(tmp_path):
+    index = MemoryVectorIndex(tmp_path / "memory.vectors", ivf_threshold=16, nprobe=4)
+    words = ["ocean", "forest", "market", "castle"]
+    index.rebuild(
+        [record(i, f"{words[i % 4]} scene {i}") for i in range(32)], indexed_seq=32
+    )
+    index.save()
+
+    hits = index.search("castle", k=3)
+    assert index._centroids is not None
+    assert hits and all(int(ts[14:16]) % 4 == 3 for _, ts, _ in hits)
@@ -0,0 +1,94 @@
+import asyncio
+import threading
+
+import pytest
+
+from framework.shared_data import SharedData
+
+
+@pytest.fixture
+def shared():
+    data = SharedData()
+    data.initialize()
+    return data
+
+
+def test_snapshots_never_change_under_readers(shared):
+    shared.set("temp", "a", 1)
+    snapshot = shared.get_category_data("temp")
+    version = shared.version("temp")
+
+    shared.update("temp", {"a": 2, "b": 3})
+    shared.delete("temp", "a")
+    assert dict(snapshot) == {"a": 1}
+    assert dict(shared.get_category_data("temp")) == {"b": 3}
+    assert shared.version("temp") == version + 2
+    with pytest.raises(TypeError):
+        snapshot["a"] = 5
+
+
+def test_reads_need_no_copy(shared):
+    shared.set("temp", "a", 1)
+    assert shared.get_category_data("temp") is shared.get_category_data("temp")
+    shared.clear_category("temp")
+    assert not shared.exists("temp", "a")
+
+
+def test_invalid_categories(shared):
+    assert not shared.set("nope", "a", 1)
+    assert not shared.delete("temp", "missing")
+    assert shared.get("nope", "a", "default") == "default"
+    assert shared.version("nope") == 0
+    assert dict(shared.get_category_data("nope")) == {}
+
+
+def test_threadsafe_writes_run_on_the_loop(shared):
+    applied_on = []
+    set_ = shared.set
+
+    def recording_set(*args):
+        applied_on.append(threading.current_thread())
+        return set_(*args)
+
+    shared.set = recording_set
+
+    async def main():
+        facade = shared.threadsafe()
+        loop = asyncio.get_running_loop()
+        results = await asyncio.gather(
+            *(
+                loop.run_in_executor(None, facade.set, "temp", f"k{i}", i)
+                for i in range(20)
+            )
+        )
+        return results
+
+    assert all(asyncio.run(main()))
+    assert set(applied_on) == {threading.main_thread()}
+    assert len(shared.get_category_data("temp")) == 20
+
+
+def test_threadsafe_without_a_loop_serializes_writes(shared):
+    facade = shared.threadsafe()
+    threads = [
+        threading.Thread(target=facade.update, args=("temp", {f"k{i}": i}))
+        for i in range(20)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(facade.get_category_data("temp")) == 20
+
+
+def test_concurrent_writers_never_drop_keys(shared):
+    def write(thread):
+        for i in range(2000):
+            shared.threadsafe().set("temp", f"{thread}-{i}", i)
+
+    threads = [threading.Thread(target=write, args=(t,)) for t in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(shared.get_category_data("temp")) == 8000
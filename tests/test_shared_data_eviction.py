@@ -0,0 +1,130 @@
+import pytest
+
+import framework.shared_data as shared_data_module
+import framework.shared_data_eviction as eviction
+from framework.shared_data import SharedData
+
+
+class Clock:
+    """Stands in for both time.monotonic() and time.time()."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    for module in (shared_data_module, eviction):
+        monkeypatch.setattr(module.time, "monotonic", clock)
+        monkeypatch.setattr(module.time, "time", clock)
+    return clock
+
+
+def make(tmp_path, **limits):
+    shared = SharedData(
+        {"spill_dir": str(tmp_path / "spill"), "categories": {"temp": limits}}
+    )
+    shared.initialize()
+    return shared
+
+
+def spilled_files(tmp_path):
+    return sorted((tmp_path / "spill" / "temp").glob("*.json"))
+
+
+def test_expired_keys_read_as_missing_until_expire(tmp_path, clock):
+    shared = make(tmp_path, ttl_seconds=10)
+    shared.set("temp", "a", 1)
+    clock.now += 10
+    assert shared.get("temp", "a") is None
+    assert shared.exists("temp", "a")
+    assert shared.expire() == 1
+    assert not shared.exists("temp", "a")
+
+
+def test_least_recently_used_keys_are_evicted(tmp_path, clock):
+    shared = make(tmp_path, max_entries=2)
+    shared.set("temp", "a", 1)
+    shared.set("temp", "b", 2)
+    shared.get("temp", "a")
+    shared.set("temp", "c", 3)
+    assert set(shared.get_category_data("temp")) == {"a", "c"}
+    assert shared.eviction_stats()["temp"]["evicted"] == 1
+
+    by_size = make(tmp_path, max_bytes=10)
+    by_size.set("temp", "a", "x" * 6)
+    by_size.set("temp", "b", "y" * 6)
+    assert set(by_size.get_category_data("temp")) == {"b"}
+
+
+def test_spilled_values_keep_their_ttl(tmp_path, clock):
+    shared = make(tmp_path, ttl_seconds=100, max_entries=1, spill=True)
+    shared.set("temp", "a", {"big": 1})
+    clock.now += 60
+    shared.set("temp", "b", 2)
+    assert shared.get("temp", "a") == {"big": 1}  # Read back from spill_dir
+
+    clock.now += 40  # a's TTL, counted from its write, has run out
+    assert shared.get("temp", "a") is None
+    assert spilled_files(tmp_path) == []
+
+
+def test_expire_prunes_spilled_values(tmp_path, clock):
+    shared = make(tmp_path, ttl_seconds=100, max_entries=1, spill=True)
+    shared.set("temp", "a", 1)
+    shared.set("temp", "b", 2)
+    assert len(spilled_files(tmp_path)) == 1
+    clock.now += 100
+    assert shared.expire() == 2  # b in memory, a on disk
+    assert spilled_files(tmp_path) == []
+
+
+def test_spill_dir_is_bounded(tmp_path, clock):
+    shared = make(tmp_path, max_entries=1, spill=True, spill_max_entries=3)
+    for i in range(10):
+        clock.now += 1
+        shared.set("temp", f"k{i}", i)
+    assert len(spilled_files(tmp_path)) == 3
+    assert shared.get("temp", "k8") == 8
+    assert shared.get("temp", "k2") is None
+
+    # A restart indexes the existing files and keeps bounding them
+    restarted = make(tmp_path, max_entries=1, spill=True, spill_max_entries=3)
+    restarted.set("temp", "x", 0)
+    restarted.set("temp", "y", 0)
+    assert len(spilled_files(tmp_path)) == 3
+    assert restarted.get("temp", "k6") is None
+    assert restarted.get("temp", "x") == 0
+
+
+def test_restore_keeps_remaining_ttls(tmp_path, clock):
+    shared = make(tmp_path, ttl_seconds=100)
+    shared.set("temp", "old", 1)
+    clock.now += 80
+    shared.set("temp", "new", 2)
+    exported = shared.export_serializable()
+    write_times = shared.export_write_times()
+
+    clock.now += 10
+    restored = make(tmp_path, ttl_seconds=100)
+    restored.restore(exported, write_times)
+    assert restored.get("temp", "old") == 1
+    clock.now += 10
+    assert restored.get("temp", "old") is None
+    assert restored.get("temp", "new") == 2
+
+    clock.now += 200
+    late = make(tmp_path, ttl_seconds=100)
+    late.restore(exported, write_times)
+    assert dict(late.get_category_data("temp")) == {}
+
+
+def test_restore_without_write_times_starts_new_ttls(tmp_path, clock):
+    shared = make(tmp_path, ttl_seconds=100)
+    shared.restore({"temp": {"a": 1}, "unknown": {"b": 2}})
+    clock.now += 99
+    assert shared.get("temp", "a") == 1
@@ -0,0 +1,49 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from framework.state import MAX_ENERGY, State
+
+T0 = datetime(2024, 1, 1, 12, 0)
+
+
+def state_at(tmp_path, energy, regen=0.1):
+    state = State(str(tmp_path), energy_regen_per_hour=regen)
+    state._set_energy(energy, T0)
+    return state
+
+
+def test_energy_regenerates_with_time_up_to_the_maximum(tmp_path):
+    state = state_at(tmp_path, 0.2)
+    assert state.get_energy(T0) == 0.2
+    assert state.get_energy(T0 + timedelta(hours=3)) == pytest.approx(0.5)
+    assert state.get_energy(T0 + timedelta(days=2)) == MAX_ENERGY
+    # A clock that went backwards never drains energy
+    assert state.get_energy(T0 - timedelta(hours=1)) == 0.2
+
+
+def test_seconds_until_energy(tmp_path):
+    state = state_at(tmp_path, 0.2)
+    assert state.seconds_until_energy(0.1, T0) == 0.0
+    assert state.seconds_until_energy(0.5, T0) == pytest.approx(3 * 3600)
+    assert state.seconds_until_energy(MAX_ENERGY + 0.1, T0) is None
+    assert state_at(tmp_path, 0.2, regen=0).seconds_until_energy(0.5, T0) is None
+
+
+def test_consume_energy_starts_from_the_regenerated_value(tmp_path):
+    state = State(str(tmp_path), energy_regen_per_hour=0.1)
+    state._set_energy(0.2, datetime.now() - timedelta(hours=2))
+    state.consume_energy(0.3)
+    assert state.get_energy() == pytest.approx(0.1, abs=1e-3)
+    assert json.loads(state.state_file.read_text())["energy_updated_at"]
+
+
+def test_legacy_state_files_get_an_energy_timestamp(tmp_path):
+    (tmp_path / "state.json").write_text(
+        json.dumps({"mood": "neutral", "energy": 0.4, "active_tasks": []})
+    )
+    state = State(str(tmp_path))
+    state.initialize({})
+    assert state.current_state["energy_updated_at"]
+    assert state.get_energy() == pytest.approx(0.4, abs=1e-3)
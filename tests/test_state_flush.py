@@ -0,0 +1,82 @@
+import asyncio
+import json
+
+from framework.state import State
+
+
+def read(state):
+    return json.loads(state.state_file.read_text())
+
+
+def test_without_a_loop_changes_are_written_through(tmp_path):
+    state = State(str(tmp_path))
+    state.update_mood("happy")
+    assert read(state)["mood"] == "happy"
+    assert not (tmp_path / "state.json.tmp").exists()
+
+
+def test_changes_in_a_loop_are_coalesced_into_one_write(tmp_path, monkeypatch):
+    state = State(str(tmp_path), flush_delay=0.05)
+    writes = []
+    write = state._write
+    monkeypatch.setattr(
+        state, "_write", lambda snapshot: writes.append(snapshot) or write(snapshot)
+    )
+
+    async def mutate():
+        for i in range(10):
+            state.add_active_task(f"task-{i}")
+        state.update_mood("busy")
+        assert not state.state_file.exists()
+        await asyncio.sleep(0.2)
+
+    asyncio.run(mutate())
+    assert len(writes) == 1
+    assert read(state)["mood"] == "busy"
+    assert len(read(state)["active_tasks"]) == 10
+
+
+def test_close_flushes_pending_changes(tmp_path):
+    state = State(str(tmp_path), flush_delay=60)
+
+    async def mutate():
+        state.update_mood("sleepy")
+        state.close()
+
+    asyncio.run(mutate())
+    assert read(state)["mood"] == "sleepy"
+
+
+def test_older_snapshots_never_replace_newer_ones(tmp_path):
+    state = State(str(tmp_path))
+    state.current_state["mood"] = "first"
+    state._dirty = True
+    older = state._snapshot()
+    state.current_state["mood"] = "second"
+    state._dirty = True
+    state._write(state._snapshot())
+    state._write(older)
+    assert read(state)["mood"] == "second"
+
+
+def test_second_state_does_not_overwrite_newer_changes(tmp_path):
+    first = State(str(tmp_path), flush_delay=60)
+    first.initialize({})
+
+    async def mutate():
+        first.update_mood("busy")  # Pending when the second State starts
+        second = State(str(tmp_path))
+        second.initialize({})
+        first.flush()
+        second.flush()
+        second.close()
+
+    asyncio.run(mutate())
+    assert read(first)["mood"] == "busy"
+
+    first.update_mood("calm")
+    stale = State(str(tmp_path))
+    stale.current_state["mood"] = "stale"
+    stale._dirty = True
+    stale.flush()
+    assert read(first)["mood"] == "calm"
@@ -0,0 +1,70 @@
+import asyncio
+from datetime import datetime
+
+from framework.state import State
+from server import DigitalBeingServer
+
+
+def test_listeners_hear_every_change(tmp_path):
+    state = State(str(tmp_path))
+    seen = []
+    state.subscribe(seen.append)
+    state.update_mood("happy")
+    state.add_active_task("t1")
+    state.unsubscribe(seen.append)
+    state.remove_active_task("t1")
+    assert [s["mood"] for s in seen] == ["happy", "happy"]
+    assert seen[-1]["active_tasks"] == ["t1"]
+
+
+def test_regeneration_is_pushed_throttled(tmp_path):
+    state = State(str(tmp_path), energy_regen_per_hour=360.0)
+    state.energy_notify_interval = 0.05
+    state._set_energy(0.2, datetime.now())
+    seen = []
+
+    async def watch():
+        state.subscribe(seen.append)
+        await asyncio.sleep(0.23)
+        state.close()
+
+    asyncio.run(watch())
+    assert 2 <= len(seen) <= 4
+    energies = [s["energy"] for s in seen]
+    assert energies == sorted(energies) and energies[0] > 0.2
+
+
+def test_full_energy_is_not_pushed(tmp_path):
+    state = State(str(tmp_path), energy_regen_per_hour=360.0)
+    state.energy_notify_interval = 0.01
+    seen = []
+
+    async def watch():
+        state.subscribe(seen.append)
+        await asyncio.sleep(0.05)
+
+    asyncio.run(watch())
+    assert seen == []
+
+
+def test_server_broadcasts_changes_once_per_loop_step():
+    server = DigitalBeingServer.__new__(DigitalBeingServer)
+    server.being_state = {"mood": "neutral"}
+    server._broadcast_scheduled = False
+    server._broadcast_task = None
+    broadcasts = []
+
+    async def broadcast_state():
+        broadcasts.append(dict(server.being_state))
+
+    server.broadcast_state = broadcast_state
+
+    async def mutate():
+        server.update_being_state({"mood": "neutral"})  # Unchanged
+        await asyncio.sleep(0)
+        server.update_being_state({"mood": "happy"})
+        server.update_being_state({"paused": True})
+        await asyncio.sleep(0.01)
+
+    asyncio.run(mutate())
+    assert broadcasts == [{"mood": "happy", "paused": True}]
@@ -0,0 +1,106 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from framework.state import State
+from framework.state_timeseries import StateTimeSeries
+from server import DigitalBeingServer
+
+T0 = datetime(2024, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def sample(energy, mood="calm", tasks=0):
+    return {"energy": energy, "mood": mood, "active_tasks": ["t"] * tasks}
+
+
+def filled(tmp_path, **kwargs):
+    series = StateTimeSeries(tmp_path / "state_timeseries", **kwargs)
+    series.load()
+    # Two minutes of samples every 20 seconds, then one in the next hour
+    for i, energy in enumerate([0.1, 0.2, 0.3, 0.4, 0.5, 0.6]):
+        series.record(sample(energy, tasks=i % 3), T0 + timedelta(seconds=20 * i))
+    series.record(sample(0.9, mood="happy"), T0 + timedelta(hours=1))
+    return series
+
+
+def test_minutes_and_hours_roll_up(tmp_path):
+    series = filled(tmp_path)
+    minutes = series.query(resolution="1m")
+    assert minutes["energy"] == pytest.approx([0.2, 0.5, 0.9])
+    assert minutes["energy_min"] == pytest.approx([0.1, 0.4, 0.9])
+    assert minutes["active_tasks"] == [2, 2, 0]
+
+    hours = series.query(resolution="1h")
+    assert hours["timestamp"][0] == T0.isoformat()
+    assert hours["energy"] == pytest.approx([0.35, 0.9])  # Open hour included
+    assert hours["energy_max"][0] == pytest.approx(0.6)
+    assert hours["mood"] == ["calm", "happy"]
+    with pytest.raises(ValueError):
+        series.query(resolution="1d")
+
+
+def test_query_picks_the_finest_tier_reaching_back(tmp_path):
+    series = filled(tmp_path, capacity={"raw": 3})
+    assert series.query(since=T0 + timedelta(seconds=90))["resolution"] == "raw"
+    assert series.query(since=T0)["resolution"] == "1m"
+
+
+def test_reload_reads_tails_and_reopens_buckets(tmp_path):
+    series = filled(tmp_path, capacity={"raw": 4})
+    expected = series.query(resolution="1h")
+    series.close()
+
+    reloaded = StateTimeSeries(tmp_path / "state_timeseries", capacity={"raw": 4})
+    reloaded.load()
+    assert len(reloaded.query(resolution="raw")["energy"]) == 4
+    assert reloaded.query(resolution="1h") == expected
+
+
+def test_tier_files_are_cut_back_and_torn_tails_dropped(tmp_path):
+    series = filled(tmp_path, capacity={"raw": 2})
+    series.close()
+    raw_file = tmp_path / "state_timeseries" / "raw.bin"
+    assert raw_file.stat().st_size < 7 * 40  # Rewritten at twice the capacity
+
+    with open(raw_file, "ab") as f:
+        f.write(b"torn")
+    reloaded = StateTimeSeries(tmp_path / "state_timeseries", capacity={"raw": 2})
+    reloaded.load()
+    assert raw_file.stat().st_size % 40 == 0
+    assert reloaded.query(resolution="raw")["energy"][-1] == pytest.approx(0.9)
+
+
+def test_samples_from_a_clock_going_backwards_are_dropped(tmp_path):
+    series = filled(tmp_path)
+    series.record(sample(0.0), T0)
+    assert series.query(resolution="raw")["energy"][-1] == pytest.approx(0.9)
+    assert series.due(T0 + timedelta(hours=1, seconds=60))
+    assert not series.due(T0 + timedelta(hours=1, seconds=1))
+
+
+def test_states_on_one_storage_share_a_recorder(tmp_path):
+    first = State(str(tmp_path))
+    first.initialize({})
+    second = State(str(tmp_path))
+    second.initialize({})
+    assert second.timeseries is first.timeseries
+
+    first.update_mood("happy")
+    rows = len(first.timeseries.query(resolution="raw")["energy"])
+    assert (tmp_path / "state_timeseries" / "raw.bin").stat().st_size == rows * 40
+    assert StateTimeSeries.shared(tmp_path / "state_timeseries") is first.timeseries
+
+
+def test_server_state_timeseries(tmp_path):
+    server = DigitalBeingServer.__new__(DigitalBeingServer)
+    series = StateTimeSeries(tmp_path / "state_timeseries")
+    series.load()
+    series.record(sample(0.5))
+    server.being = SimpleNamespace(state=SimpleNamespace(timeseries=series))
+
+    result = server._state_timeseries({"range": "hourly"})
+    assert result["success"] and result["resolution"] == "1m"
+    assert result["energy"] == [0.5]
+    assert not server._state_timeseries({"range": "yearly"})["success"]
+    assert not server._state_timeseries({"resolution": "1d"})["success"]